@@ -1,14 +1,263 @@
 import os
+import re
+import atexit
+import io
+import time
+import hashlib
+import itertools
+import mimetypes
+import sqlite3
 import logging
-from flask import Flask, render_template, request, redirect, url_for, flash
-from data_manager.sqlite_data_manager import SQLiteDataManager, OMDbException
+import threading
+import click
+from flask import (Flask, render_template, request, redirect, url_for, flash, jsonify, g, Response,
+                   current_app, session, make_response, send_file, abort)
+from flask.cli import AppGroup
+from werkzeug.local import LocalProxy
+from data_manager import migrations
+from data_manager.sqlite_data_manager import SQLiteDataManager
+from data_manager.memory_data_manager import InMemoryDataManager
+from data_manager.fetch_jobs import OMDbFetchWorker
+from data_manager.bulk_import import BulkOMDbFetcher, clean_titles, import_titles
+from data_manager.identity_map import IdentityMap
+from data_manager.collection_io import (export_csv, export_jsonl, iter_csv_records,
+                                       iter_jsonl_records, import_records, ImportAborted)
+from data_manager.read_cache import CachingDataManager
+from data_manager.page_cache import PageCache, FLASH_SLOT
+from data_manager.static_assets import CACHE_CONTROL, StaticAssets, build_assets
+from data_manager.poster_store import PosterStore, sniff_image_type
+from data_manager.title_index import TitleIndex
+from data_manager.user_stats import ALL_USERS
+from data_manager.metrics import Instrumentation, InstrumentedDataManager
+from data_manager.pagination import MOVIE_SORT_KEYS, encode_cursor, decode_cursor
 from urllib.parse import urlparse
 from datetime import datetime # Import datetime for year validation
 
-app = Flask(__name__)
-app.secret_key = os.environ.get("FLASK_SECRET_KEY", "a_very_secure_default_secret_key_for_dev")
-data_manager = SQLiteDataManager('movies.db')
-logging.basicConfig(level=logging.INFO)
+def env_flag(name, default=''):
+    return os.environ.get(name, default).lower() in ('1', 'true', 'yes')
+
+def default_config():
+    """Settings read from the environment; ``create_app(config)`` overrides any of them."""
+    return {
+        'SECRET_KEY': os.environ.get("FLASK_SECRET_KEY", "a_very_secure_default_secret_key_for_dev"),
+        # 'sqlite' (default) or 'memory': everything in process memory, for single-process
+        # deployments and tests, optionally persisted to MEMORY_SNAPSHOT on shutdown.
+        'DATA_BACKEND': os.environ.get('MOVIEWEB_BACKEND', 'sqlite'),
+        'MEMORY_SNAPSHOT': os.environ.get('MOVIEWEB_SNAPSHOT'),
+        'DATABASE': os.environ.get('MOVIEWEB_DATABASE', 'movies.db'),
+        'DB_POOL_SIZE': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'DB_HIGH_CONCURRENCY': env_flag('DB_HIGH_CONCURRENCY'), # Opt-in WAL + single writer
+        # Apply pending migrations when a process first opens the database. Production
+        # deployments can turn this off and run `flask migrate` once per release instead.
+        'DB_AUTO_MIGRATE': env_flag('DB_AUTO_MIGRATE', '1'),
+        'READ_CACHE_ENTRIES': int(os.environ.get('READ_CACHE_ENTRIES', 1024)), # 0 disables the read cache
+        'PAGE_SIZE': int(os.environ.get('PAGE_SIZE', 50)), # Default rows per listing page (?per_page=)
+        # Rendered user list / movie grid pages served with ETags; 0 disables. Content
+        # versions are read on every request unless PAGE_CACHE_CHECK_INTERVAL (seconds)
+        # allows reusing them, at the cost of other processes' writes showing up that late.
+        'PAGE_CACHE_BYTES': int(os.environ.get('PAGE_CACHE_BYTES', 8 * 1024 * 1024)),
+        'PAGE_CACHE_CHECK_INTERVAL': float(os.environ.get('PAGE_CACHE_CHECK_INTERVAL', 0)),
+        # Output of `flask build-assets`; defaults to static/build
+        'ASSET_BUILD_DIR': os.environ.get('ASSET_BUILD_DIR'),
+        # Serve posters from a local mirror (downloaded once, with grid thumbnails)
+        # instead of hot-linking the image hosts. Opt-in: it downloads third-party images.
+        'POSTER_MIRROR': env_flag('POSTER_MIRROR'),
+        'POSTER_DIR': os.environ.get('POSTER_DIR', 'posters'),
+        'POSTER_THUMB_WIDTH': int(os.environ.get('POSTER_THUMB_WIDTH', 200)),
+        # Poster hosts fetched without checking that they resolve to public addresses
+        # (comma-separated); every other host must not be loopback, private or link-local.
+        'POSTER_ALLOWED_HOSTS': [host for host in os.environ.get('POSTER_ALLOWED_HOSTS', '').split(',') if host],
+        # Seconds before the title autocomplete index re-checks for writes it was not
+        # told about (other processes, batch operations) and rebuilds if there were any.
+        'TITLE_INDEX_REFRESH': float(os.environ.get('TITLE_INDEX_REFRESH', 300)),
+        'SLOW_QUERY_MS': float(os.environ.get('SLOW_QUERY_MS', 100)),
+        'OMDB_FETCH_WORKERS': int(os.environ.get('OMDB_FETCH_WORKERS', 2)),
+        # Seconds an upstream OMDb lookup may take before it fails (and counts
+        # against the circuit breaker that stops calling OMDb while it is down).
+        'OMDB_LATENCY_BUDGET': float(os.environ.get('OMDB_LATENCY_BUDGET', 5)),
+        # Bulk imports: concurrent OMDb requests, and requests per second across them
+        'OMDB_BULK_WORKERS': int(os.environ.get('OMDB_BULK_WORKERS', 8)),
+        'OMDB_BULK_RATE': float(os.environ.get('OMDB_BULK_RATE', 10)),
+        'LOG_LEVEL': os.environ.get('LOG_LEVEL', 'INFO'),
+    }
+
+class AppServices:
+    """
+    The data manager, OMDb fetch worker and metrics bound to one app.
+
+    Nothing is opened at construction time: the data manager (and with it
+    the schema check and the fetch worker) is built on first use, so
+    importing the app or forking workers stays cheap.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.instrumentation = Instrumentation(slow_query_threshold=config['SLOW_QUERY_MS'] / 1000)
+        self.page_cache = PageCache(config['PAGE_CACHE_BYTES'], check_interval=config['PAGE_CACHE_CHECK_INTERVAL'])
+        self.template_fingerprint = None
+        self.assets = None # StaticAssets, set by create_app()
+        self._data_manager = None
+        self._backend = None
+        self._fetch_worker = None
+        self._poster_store = None
+        self._title_index = None
+        self._title_index_refreshing = False
+        self._lock = threading.RLock()
+
+    @property
+    def data_manager(self):
+        if self._data_manager is None:
+            with self._lock:
+                if self._data_manager is None:
+                    self._data_manager = self._build_data_manager()
+                    self.fetch_worker # Resumes jobs left unfinished by a previous process
+        return self._data_manager
+
+    def _build_data_manager(self):
+        config = self.config
+        if config['DATA_BACKEND'] == 'memory':
+            dm = self._backend = InMemoryDataManager(config['MEMORY_SNAPSHOT'], omdb_budget=config['OMDB_LATENCY_BUDGET'],
+                                                     instrumentation=self.instrumentation)
+            atexit.register(dm.close) # Writes the snapshot, if configured
+            # Reads are already in-process, so the read cache would only add copies
+            return InstrumentedDataManager(dm, self.instrumentation)
+        if config['DATA_BACKEND'] != 'sqlite':
+            raise ValueError(f"Unknown DATA_BACKEND: {config['DATA_BACKEND']!r}")
+        dm = SQLiteDataManager(
+            config['DATABASE'],
+            pool_size=config['DB_POOL_SIZE'],
+            high_concurrency=config['DB_HIGH_CONCURRENCY'],
+            instrumentation=self.instrumentation,
+            migrate=config['DB_AUTO_MIGRATE'],
+            omdb_budget=config['OMDB_LATENCY_BUDGET'],
+        )
+        self._backend = dm
+        atexit.register(dm.close) # Close pooled connections on interpreter shutdown
+        if config['READ_CACHE_ENTRIES'] > 0:
+            # Cross-worker read cache, invalidated through the change_counter table
+            dm = CachingDataManager(dm, max_entries=config['READ_CACHE_ENTRIES'])
+        return InstrumentedDataManager(dm, self.instrumentation)
+
+    @property
+    def fetch_worker(self):
+        if self._fetch_worker is None:
+            with self._lock:
+                if self._fetch_worker is None:
+                    worker = OMDbFetchWorker(self.data_manager, movie_fields_from_omdb,
+                                             workers=self.config['OMDB_FETCH_WORKERS'],
+                                             on_complete=self._fetch_completed)
+                    worker.start()
+                    atexit.register(worker.shutdown, wait=False)
+                    self._fetch_worker = worker
+        return self._fetch_worker
+
+    def _fetch_completed(self, fields):
+        self.prefetch_posters(fields['poster'])
+        self.index_titles(add=[fields['title']])
+
+    @property
+    def poster_store(self):
+        if self._poster_store is None:
+            with self._lock:
+                if self._poster_store is None:
+                    store = PosterStore(self.config['POSTER_DIR'], thumb_width=self.config['POSTER_THUMB_WIDTH'],
+                                        allowed_hosts=self.config['POSTER_ALLOWED_HOSTS'])
+                    atexit.register(store.shutdown, wait=False)
+                    self._poster_store = store
+        return self._poster_store
+
+    def prefetch_posters(self, *urls):
+        """Mirrors posters in the background, if the poster mirror is enabled."""
+        if self.config['POSTER_MIRROR']:
+            self.poster_store.prefetch(urls)
+
+    def poster_stats(self):
+        return self._poster_store.stats() if self._poster_store is not None else {}
+
+    @property
+    def title_index(self):
+        """
+        Prefix index over movie titles and cached OMDb results, built on
+        first use and rebuilt in the background once it is older than
+        TITLE_INDEX_REFRESH seconds and the data changed meanwhile.
+        """
+        if self._title_index is None:
+            with self._lock:
+                if self._title_index is None:
+                    index = TitleIndex()
+                    self._rebuild_title_index(index)
+                    self._title_index = index
+        elif self._title_index.is_stale(self.config['TITLE_INDEX_REFRESH']):
+            with self._lock:
+                start, self._title_index_refreshing = not self._title_index_refreshing, True
+            if start:
+                threading.Thread(target=self._refresh_title_index, name="title-index", daemon=True).start()
+        return self._title_index
+
+    def _rebuild_title_index(self, index):
+        dm = self.data_manager
+        version = dm.get_content_version(ALL_USERS) # Read first: later writes trigger another rebuild
+        start = time.perf_counter()
+        index.rebuild(itertools.chain(dm.get_movie_titles(), dm.omdb_cache.titles()), version=version)
+        logging.info(f"Built the title index: {len(index)} titles in {time.perf_counter() - start:.3f}s")
+
+    def _refresh_title_index(self):
+        index = self._title_index
+        try:
+            version = self.data_manager.get_content_version(ALL_USERS)
+            if version is not None and version == index.version:
+                index.mark_current()
+            else:
+                self._rebuild_title_index(index)
+        finally:
+            with self._lock:
+                self._title_index_refreshing = False
+
+    def index_titles(self, add=(), remove=()):
+        """Applies title changes to the autocomplete index, if it was built."""
+        index = self._title_index
+        if index is None:
+            return # Built from the database on first use, so nothing is lost
+        for title in remove:
+            index.discard(title)
+        for title in add:
+            index.add(title)
+
+    def close(self):
+        """Stops the background workers and closes the data manager, if they were started."""
+        with self._lock:
+            worker, self._fetch_worker = self._fetch_worker, None
+            posters, self._poster_store = self._poster_store, None
+            dm, self._backend = self._backend, None
+            self._data_manager = None
+            self._title_index = None
+        if worker is not None:
+            worker.shutdown(wait=True)
+        if posters is not None:
+            posters.shutdown(wait=True)
+        if dm is not None:
+            dm.close()
+
+def services():
+    """Returns the current app's AppServices."""
+    return current_app.extensions['movieweb']
+
+# Module-level handles used by the views; each resolves to the current app's object.
+data_manager = LocalProxy(lambda: services().data_manager)
+fetch_worker = LocalProxy(lambda: services().fetch_worker)
+instrumentation = LocalProxy(lambda: services().instrumentation)
+
+# Views and CLI commands are declared at module level and registered on
+# every app built by create_app(), keeping their endpoint names unchanged.
+_views = []
+commands = AppGroup('movieweb')
+
+def route(rule, **options):
+    """Declares a view function for create_app() to register."""
+    def decorator(view):
+        _views.append((rule, view, options))
+        return view
+    return decorator
 
 # --- Helper Functions ---
 def is_valid_url_format(url):
@@ -39,32 +288,221 @@ def parse_year(year_str):
         logging.warning(f"Could not parse year string: '{year_str}'")
         return None
 
+def movie_fields_from_omdb(movie_data, title):
+    """Maps an OMDb response onto the movie columns (title, director, year, plot, poster, rating) plus imdb_id."""
+    poster = movie_data.get('Poster')
+    if poster == 'N/A': poster = ''
+    rating_str = movie_data.get('imdbRating', None)
+    rating = None
+    if rating_str and rating_str.lower() != 'n/a':
+        try:
+            rating = float(rating_str)
+        except ValueError:
+            rating = None
+    return {
+        'title': movie_data.get('Title', title),
+        'director': movie_data.get('Director', 'N/A'),
+        'year': parse_year(movie_data.get('Year')), # Use helper function to parse
+        'plot': movie_data.get('Plot', ''),
+        'poster': poster,
+        'rating': rating,
+        'imdb_id': movie_data.get('imdbID'),
+    }
+
+# --- Request-scoped Identity Map ---
+
+def identity_map():
+    """Returns this request's IdentityMap, creating it on first use."""
+    if 'identity_map' not in g:
+        g.identity_map = IdentityMap()
+    return g.identity_map
+
+def load_user(user_id):
+    """Loads a user at most once per request."""
+    return identity_map().get_user(user_id, data_manager.get_user_by_id)
+
+def load_movie_with_user(movie_id):
+    """Loads a movie and its owner with a single JOIN, at most once per request."""
+    return identity_map().get_movie_with_user(movie_id, data_manager.get_movie_with_user)
+
+# --- Pagination ---
+
+MAX_PAGE_SIZE = 500
+
+def get_page_size():
+    """Reads ?per_page= from the request (default PAGE_SIZE), clamped to 1..MAX_PAGE_SIZE."""
+    default = current_app.config['PAGE_SIZE']
+    try:
+        page_size = int(request.args.get('per_page', default))
+    except ValueError:
+        page_size = default
+    return max(1, min(page_size, MAX_PAGE_SIZE))
+
+# --- Page Cache ---
+
+def template_fingerprint():
+    """Hash of all templates, so a deployment that changes the markup changes every ETag."""
+    app_services = services()
+    if app_services.template_fingerprint is None:
+        digest = hashlib.sha1()
+        for name in sorted(current_app.jinja_env.list_templates()):
+            source = current_app.jinja_loader.get_source(current_app.jinja_env, name)[0]
+            digest.update(f"{name}\0{source}\0".encode('utf-8'))
+        # Pages link to hashed asset names, so a new asset build changes them too
+        digest.update(repr(sorted(app_services.assets.manifest.items())).encode('utf-8'))
+        app_services.template_fingerprint = digest.hexdigest()
+    return app_services.template_fingerprint
+
+def is_not_modified(etag, last_modified):
+    """Evaluates If-None-Match, or If-Modified-Since when no entity tags were sent."""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    since = request.if_modified_since
+    return last_modified is not None and since is not None and since.timestamp() >= last_modified
+
+def with_validators(response, etag, last_modified):
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'private, no-cache' # Always revalidate
+    return response
+
+def cached_page(scope, render):
+    """
+    Serves a page from the page cache, keyed by URL and tagged with the
+    content version of ``scope`` (a user ID, or ALL_USERS).
+
+    ``render(**context)`` builds the page; anything but a string (e.g. a
+    redirect) is passed through uncached. A request repeating the page's
+    ETag gets a 304 without rendering or any read beyond the version.
+    Pending flash messages are filled into the cached page; such responses
+    carry no validators, as the messages are shown only once.
+    """
+    page_cache = services().page_cache
+    state = page_cache.version(scope, data_manager.get_content_version) if page_cache.enabled else None
+    if state is None:
+        return render()
+    version, updated_at = state
+    key = request.full_path
+    etag = page_cache.etag(key, version, template_fingerprint())
+    # Last-Modified has one-second resolution: only send it once that second is over,
+    # so any later change is guaranteed to move it forward.
+    last_modified = updated_at if 0 < updated_at < int(time.time()) else None
+    has_flashes = bool(session.get('_flashes'))
+    if not has_flashes and is_not_modified(etag, last_modified):
+        page_cache.count_not_modified()
+        return with_validators(Response(status=304), etag, last_modified)
+    entry = page_cache.get(key, version)
+    if entry is None:
+        page = render(flash_slot=FLASH_SLOT)
+        if not isinstance(page, str):
+            return page
+        entry = page_cache.put(key, version, etag, page)
+    etag, head, tail = entry
+    if has_flashes:
+        response = make_response(head + render_template('flash_messages.html') + tail)
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+    return with_validators(make_response(head + tail), etag, last_modified)
+
+def forget_page_versions(response):
+    """After a write in this process, re-read content versions even within PAGE_CACHE_CHECK_INTERVAL."""
+    if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+        services().page_cache.forget_versions()
+    return response
+
 # --- Routes ---
 
-@app.route('/')
+@route('/')
 def home():
     # ... (no changes) ...
     return render_template('home.html')
 
-@app.route('/users')
+@route('/users')
 def list_users():
      # ... (no changes) ...
-    users = data_manager.get_all_users()
-    return render_template('users.html', users=users)
+    return cached_page(ALL_USERS, render_users_page)
+
+def render_users_page(**context):
+    page_size = get_page_size()
+    after = request.args.get('after') or None
+    users = data_manager.get_all_users(limit=page_size + 1, after=after) # One extra row tells us if there is a next page
+    next_cursor = None
+    if len(users) > page_size:
+        users = users[:page_size]
+        next_cursor = users[-1]['username']
+    # Both reads come from the trigger-maintained summary tables
+    user_totals = data_manager.get_user_stat_totals(tuple(user['id'] for user in users))
+    global_stats = data_manager.get_global_stats()
+    return render_template('users.html', users=users, next_cursor=next_cursor, user_totals=user_totals,
+                           global_stats=global_stats, is_first_page=after is None, per_page=page_size, **context)
 
-@app.route('/users/<int:user_id>')
+@route('/users/<int:user_id>')
 def user_movies(user_id):
      # ... (no changes) ...
-    user = data_manager.get_user_by_id(user_id)
+    return cached_page(user_id, lambda **context: render_user_movies_page(user_id, **context))
+
+def render_user_movies_page(user_id, **context):
+    user = load_user(user_id)
     if not user:
         flash("User not found.", "warning")
         return redirect(url_for('list_users'))
-    movies = data_manager.get_movies_for_user(user_id)
-    return render_template('user_movies.html', user=user, movies=movies)
+    page_size = get_page_size()
+    sort = request.args.get('sort', 'title')
+    if sort not in MOVIE_SORT_KEYS:
+        sort = 'title'
+    order = 'desc' if request.args.get('order') == 'desc' else 'asc'
+    after = decode_cursor(request.args.get('after'), 2)
+    # Summary rows carry only what the grid shows (no plot text)
+    movies = data_manager.get_movie_summaries_for_user(user_id, limit=page_size + 1, after=after,
+                                                       sort=sort, descending=(order == 'desc'))
+    next_cursor = None
+    if len(movies) > page_size:
+        movies = movies[:page_size]
+        next_cursor = encode_cursor([getattr(movies[-1], sort), movies[-1].id])
+    fetch_jobs = data_manager.get_fetch_jobs_for_user(user_id)
+    stats = data_manager.get_user_stats(user_id)
+    return render_template('user_movies.html', user=user, movies=movies, fetch_jobs=fetch_jobs, stats=stats,
+                           sort=sort, order=order, sort_keys=MOVIE_SORT_KEYS, next_cursor=next_cursor,
+                           is_first_page=after is None, per_page=page_size, **context)
+
+MAX_SEARCH_PAGE = 1000 # Deeper pages are not useful, and huge offsets overflow SQLite integers
+MAX_ROW_ID = 2 ** 63 - 1
+
+@route('/search')
+def search():
+    query = request.args.get('q', '').strip()
+    user_id = request.args.get('user_id', type=int)
+    if user_id is not None and not 0 < user_id <= MAX_ROW_ID:
+        user_id = None
+    page_size = get_page_size()
+    page = min(max(1, request.args.get('page', 1, type=int)), MAX_SEARCH_PAGE)
+    user = load_user(user_id) if user_id else None
+    results = []
+    has_next = False
+    if query:
+        results = data_manager.search_movies(query, user_id=user_id, limit=page_size + 1,
+                                             offset=(page - 1) * page_size)
+        has_next = len(results) > page_size
+        results = results[:page_size]
+    return render_template('search.html', query=query, user=user, results=results,
+                           page=page, has_next=has_next, per_page=page_size)
+
+MAX_TITLE_SUGGESTIONS = 20
+
+@route('/api/titles/suggest')
+def suggest_titles():
+    """Title autocomplete: known titles starting with ``q`` (case and accents ignored), as JSON."""
+    query = request.args.get('q', '').strip()
+    limit = min(max(request.args.get('limit', 10, type=int), 1), MAX_TITLE_SUGGESTIONS)
+    suggestions = services().title_index.suggest(query, limit) if query else []
+    response = jsonify({'query': query, 'suggestions': suggestions})
+    response.headers['Cache-Control'] = 'private, max-age=60'
+    return response
 
 # --- User Management Routes ---
 
-@app.route('/add_user', methods=['GET', 'POST'])
+@route('/add_user', methods=['GET', 'POST'])
 def add_user():
     # ... (no changes) ...
     add_user_template = 'add_user.html'
@@ -85,13 +523,14 @@ def add_user():
              return render_template(add_user_template, form_data=request.form)
     return render_template(add_user_template, form_data={})
 
-@app.route('/users/<int:user_id>/delete', methods=['POST'])
+@route('/users/<int:user_id>/delete', methods=['POST'])
 def delete_user(user_id):
     # ... (no changes) ...
-    user = data_manager.get_user_by_id(user_id)
+    user = load_user(user_id)
     if not user:
         flash("User not found.", "warning")
         return redirect(url_for('list_users'))
+    identity_map().invalidate_user(user_id)
     if data_manager.delete_user(user_id):
         flash(f"User '{user['username']}' and their movies deleted successfully.", "success")
     else:
@@ -101,9 +540,9 @@ def delete_user(user_id):
 # --- Movie Management Routes ---
 
 # --- MODIFIED add_movie to handle year ---
-@app.route('/users/<int:user_id>/add_movie', methods=['GET', 'POST'])
+@route('/users/<int:user_id>/add_movie', methods=['GET', 'POST'])
 def add_movie(user_id):
-    user = data_manager.get_user_by_id(user_id)
+    user = load_user(user_id)
     if not user:
         flash("User not found.", "warning")
         return redirect(url_for('list_users'))
@@ -111,7 +550,7 @@ def add_movie(user_id):
     add_movie_template = 'add_movie.html'
 
     if request.method == 'POST':
-        app.logger.info(f"Add movie form data: {request.form}")
+        current_app.logger.info(f"Add movie form data: {request.form}")
         add_method = request.form.get('add_method')
         title = request.form.get('title', '').strip()
         year_int = None # Initialize year
@@ -121,38 +560,17 @@ def add_movie(user_id):
             return render_template(add_movie_template, user=user, form_data=request.form)
 
         if add_method == 'fetch':
-            try:
-                movie_data = data_manager.fetch_movie_details_from_omdb(title)
-                fetched_title = movie_data.get('Title', title)
-                director = movie_data.get('Director', 'N/A')
-                year_str = movie_data.get('Year') # Get year string from API
-                year_int = parse_year(year_str) # Use helper function to parse
-                plot = movie_data.get('Plot', '')
-                poster = movie_data.get('Poster')
-                if poster == 'N/A': poster = ''
-                rating_str = movie_data.get('imdbRating', None)
-                rating = None
-                if rating_str and rating_str.lower() != 'n/a':
-                    try:
-                        rating = float(rating_str)
-                    except ValueError:
-                        rating = None
-
-                # Pass year_int to data_manager
-                if data_manager.add_movie(user_id, fetched_title, director, year_int, plot, poster, rating):
-                     flash(f"Successfully fetched and added movie: {fetched_title}", "success")
-                     return redirect(url_for('user_movies', user_id=user_id))
-                else:
-                     flash(f"Database error saving fetched movie data.", "danger")
-                     return render_template(add_movie_template, user=user, form_data=request.form)
-
-            except OMDbException as e:
-                flash(f"OMDb API Error: {e}", "danger")
+            # Lookups run in the background so the request never waits on OMDb.
+            if not data_manager.omdb_api_key:
+                flash("OMDb API Error: OMDb API key is not configured.", "danger")
                 return render_template(add_movie_template, user=user, form_data=request.form)
-            except Exception as e:
-                flash(f"An unexpected error occurred fetching data: {e}", "danger")
-                app.logger.error(f"Error fetching OMDb data for title '{title}': {e}", exc_info=True)
+            job = data_manager.create_fetch_job(user_id, title)
+            if not job:
+                flash(f"Database error saving movie '{title}'.", "danger")
                 return render_template(add_movie_template, user=user, form_data=request.form)
+            fetch_worker.submit(job['job_id'])
+            flash(f"Added '{title}'. Fetching details from OMDb in the background...", "info")
+            return redirect(url_for('user_movies', user_id=user_id))
 
         elif add_method == 'manual':
             director = request.form.get('director', '').strip()
@@ -190,6 +608,8 @@ def add_movie(user_id):
 
             # Pass year_int to data_manager
             if data_manager.add_movie(user_id, title, director, year_int, plot, poster, rating):
+                services().prefetch_posters(poster)
+                services().index_titles(add=[title])
                 flash(f"Successfully added movie manually: {title}", "success")
                 return redirect(url_for('user_movies', user_id=user_id))
             else:
@@ -202,31 +622,29 @@ def add_movie(user_id):
     # GET request
     return render_template(add_movie_template, user=user, form_data={})
 
-@app.route('/movie/<int:movie_id>')
+@route('/movie/<int:movie_id>')
 def movie_detail(movie_id):
     # ... (no changes needed here, year is fetched from DB) ...
-    movie = data_manager.get_movie_by_id(movie_id)
+    movie, user = load_movie_with_user(movie_id)
     if not movie:
         flash("Movie not found.", "warning")
         return redirect(url_for('list_users'))
-    user = data_manager.get_user_by_id(movie['user_id'])
     if not user:
-         app.logger.error(f"Data inconsistency: Movie ID {movie_id}, User ID {movie['user_id']} not found.")
+         current_app.logger.error(f"Data inconsistency: Movie ID {movie_id}, User ID {movie['user_id']} not found.")
          flash("Could not find the user associated with this movie.", "danger")
          return redirect(url_for('list_users'))
     return render_template('movie_detail.html', movie=movie, user=user)
 
 # --- MODIFIED update_movie to handle year ---
-@app.route('/movie/<int:movie_id>/update', methods=['GET', 'POST'])
+@route('/movie/<int:movie_id>/update', methods=['GET', 'POST'])
 def update_movie(movie_id):
-    original_movie = data_manager.get_movie_by_id(movie_id)
+    original_movie, user = load_movie_with_user(movie_id)
     if not original_movie:
         flash("Movie not found.", "warning")
         return redirect(url_for('list_users'))
 
-    user = data_manager.get_user_by_id(original_movie['user_id'])
     if not user:
-         app.logger.error(f"Data inconsistency: Movie ID {movie_id}, User ID {original_movie['user_id']} not found during update.")
+         current_app.logger.error(f"Data inconsistency: Movie ID {movie_id}, User ID {original_movie['user_id']} not found during update.")
          flash("Could not find the user associated with this movie.", "danger")
          return redirect(url_for('list_users'))
 
@@ -267,7 +685,10 @@ def update_movie(movie_id):
                 return render_template(update_template, user=user, movie=request.form, movie_id=movie_id)
 
         # Pass year_int to data_manager update
+        identity_map().invalidate_movie(movie_id)
         if data_manager.update_movie(movie_id, title, director, year_int, plot, poster, rating):
+            services().prefetch_posters(poster)
+            services().index_titles(add=[title], remove=[original_movie['title']])
             flash(f"Movie '{title}' updated successfully.", "success")
             return redirect(url_for('movie_detail', movie_id=movie_id))
         else:
@@ -277,32 +698,537 @@ def update_movie(movie_id):
     # GET request
     return render_template(update_template, user=user, movie=original_movie, movie_id=movie_id)
 
-@app.route('/movie/<int:movie_id>/delete', methods=['POST'])
+@route('/movie/<int:movie_id>/delete', methods=['POST'])
 def delete_movie(movie_id):
     # ... (no changes needed here) ...
-    movie = data_manager.get_movie_by_id(movie_id)
+    movie, _ = load_movie_with_user(movie_id)
     if not movie:
         flash("Movie not found.", "warning")
         return redirect(url_for('list_users'))
     user_id = movie['user_id']
+    identity_map().invalidate_movie(movie_id)
     if data_manager.delete_movie(movie_id):
+        services().index_titles(remove=[movie['title']])
         flash(f"Movie '{movie['title']}' deleted successfully.", "success")
     else:
         flash(f"Failed to delete movie '{movie['title']}'. Check logs.", "danger")
     return redirect(url_for('user_movies', user_id=user_id))
 
+# --- Batch Movie Operations ---
+
+MAX_BATCH_MOVIES = 1000
+
+def selected_movie_ids():
+    """Returns the de-duplicated movie IDs ticked in the grid form (invalid values are dropped)."""
+    ids = dict.fromkeys(request.form.getlist('movie_ids', type=int))
+    return list(ids)[:MAX_BATCH_MOVIES]
+
+def flash_batch_result(affected, requested, verb):
+    """Flashes how many selected movies a batch operation changed and how many it skipped."""
+    if affected is None:
+        flash(f"Database error: no movies were {verb}. Check logs.", "danger")
+        return
+    flash(f"{affected} movie(s) {verb}.", "success")
+    if affected < requested:
+        flash(f"{requested - affected} selected movie(s) were not found for this user and were skipped.", "warning")
+
+def batch_target_user(user_id):
+    """Loads the owner for a batch route; returns (user, movie_ids) or (None, None) after flashing."""
+    user = load_user(user_id)
+    if not user:
+        flash("User not found.", "warning")
+        return None, None
+    movie_ids = selected_movie_ids()
+    if not movie_ids:
+        flash("Select at least one movie.", "warning")
+        return user, None
+    return user, movie_ids
+
+@route('/users/<int:user_id>/movies/delete', methods=['POST'])
+def delete_movies(user_id):
+    user, movie_ids = batch_target_user(user_id)
+    if not user:
+        return redirect(url_for('list_users'))
+    if movie_ids:
+        for movie_id in movie_ids:
+            identity_map().invalidate_movie(movie_id)
+        flash_batch_result(data_manager.delete_movies(user_id, movie_ids), len(movie_ids), "deleted")
+    return redirect(url_for('user_movies', user_id=user_id))
+
+@route('/users/<int:user_id>/movies/update', methods=['POST'])
+def update_movies(user_id):
+    user, movie_ids = batch_target_user(user_id)
+    if not user:
+        return redirect(url_for('list_users'))
+    if not movie_ids:
+        return redirect(url_for('user_movies', user_id=user_id))
+
+    # Same year/rating rules as the single-movie update form; blank fields are left unchanged
+    year_str = request.form.get('year', '').strip()
+    rating_str = request.form.get('rating', '').strip()
+    fields = {}
+    if year_str:
+        year_int = parse_year(year_str)
+        if year_int is None:
+            flash("Invalid year format or out of range.", "warning")
+            return redirect(url_for('user_movies', user_id=user_id))
+        fields['year'] = year_int
+    if rating_str:
+        try:
+            rating = float(rating_str)
+        except ValueError:
+            flash("Invalid rating format.", "warning")
+            return redirect(url_for('user_movies', user_id=user_id))
+        if not (0.0 <= rating <= 10.0):
+            flash("Rating must be between 0.0 and 10.0.", "warning")
+            return redirect(url_for('user_movies', user_id=user_id))
+        fields['rating'] = rating
+    if not fields:
+        flash("Enter a year and/or rating to apply.", "warning")
+        return redirect(url_for('user_movies', user_id=user_id))
+
+    for movie_id in movie_ids:
+        identity_map().invalidate_movie(movie_id)
+    flash_batch_result(data_manager.update_movies(user_id, movie_ids, fields), len(movie_ids), "updated")
+    return redirect(url_for('user_movies', user_id=user_id))
+
+@route('/users/<int:user_id>/movies/move', methods=['POST'])
+def move_movies(user_id):
+    user, movie_ids = batch_target_user(user_id)
+    if not user:
+        return redirect(url_for('list_users'))
+    if not movie_ids:
+        return redirect(url_for('user_movies', user_id=user_id))
+    target_user_id = request.form.get('target_user_id', type=int)
+    target_user = load_user(target_user_id) if target_user_id else None
+    if not target_user:
+        flash("Target user not found.", "warning")
+        return redirect(url_for('user_movies', user_id=user_id))
+    if target_user_id == user_id:
+        flash("Movies already belong to this user.", "warning")
+        return redirect(url_for('user_movies', user_id=user_id))
+
+    for movie_id in movie_ids:
+        identity_map().invalidate_movie(movie_id)
+    moved = data_manager.move_movies(user_id, movie_ids, target_user_id)
+    flash_batch_result(moved, len(movie_ids), f"moved to {target_user['username']}")
+    return redirect(url_for('user_movies', user_id=user_id))
+
+# --- Bulk Import ---
+
+MAX_IMPORT_TITLES = 1000
+
+def make_bulk_fetcher():
+    """Builds the concurrent, rate-limited OMDb fetcher used by bulk imports."""
+    return BulkOMDbFetcher(
+        workers=current_app.config['OMDB_BULK_WORKERS'],
+        rate=current_app.config['OMDB_BULK_RATE'],
+        cache=data_manager.omdb_cache,
+        client=data_manager.omdb_client, # Shares the circuit breaker and request coalescing
+    )
+
+@route('/users/<int:user_id>/import', methods=['GET', 'POST'])
+def bulk_import(user_id):
+    user = load_user(user_id)
+    if not user:
+        flash("User not found.", "warning")
+        return redirect(url_for('list_users'))
+
+    import_template = 'bulk_import.html'
+
+    if request.method == 'POST':
+        lines = request.form.get('titles', '').splitlines()
+        upload = request.files.get('titles_file')
+        if upload and upload.filename:
+            try:
+                lines += upload.read().decode('utf-8').splitlines()
+            except UnicodeDecodeError:
+                flash("Uploaded file must be UTF-8 text.", "warning")
+                return render_template(import_template, user=user, form_data=request.form, max_titles=MAX_IMPORT_TITLES)
+
+        titles = clean_titles(lines)
+        if not titles:
+            flash("Enter or upload at least one title.", "warning")
+            return render_template(import_template, user=user, form_data=request.form, max_titles=MAX_IMPORT_TITLES)
+        if len(titles) > MAX_IMPORT_TITLES:
+            flash(f"Too many titles ({len(titles)}); the limit is {MAX_IMPORT_TITLES}.", "warning")
+            return render_template(import_template, user=user, form_data=request.form, max_titles=MAX_IMPORT_TITLES)
+        if not data_manager.omdb_api_key:
+            flash("OMDb API Error: OMDb API key is not configured.", "danger")
+            return render_template(import_template, user=user, form_data=request.form, max_titles=MAX_IMPORT_TITLES)
+
+        fetcher = make_bulk_fetcher()
+        try:
+            report = import_titles(data_manager, user_id, titles, movie_fields_from_omdb, fetcher)
+        finally:
+            fetcher.close()
+        added = sum(1 for entry in report if entry['status'] == 'added')
+        flash(f"Imported {added} of {len(report)} titles.", "success" if added == len(report) else "warning")
+        return render_template(import_template, user=user, form_data={}, report=report, max_titles=MAX_IMPORT_TITLES)
+
+    return render_template(import_template, user=user, form_data={}, max_titles=MAX_IMPORT_TITLES)
+
+@commands.command('import-titles')
+@click.argument('user_id', type=int)
+@click.argument('titles_file', type=click.File('r', encoding='utf-8'))
+def import_titles_command(user_id, titles_file):
+    """Bulk-imports titles (one per line) from TITLES_FILE for USER_ID."""
+    if not data_manager.get_user_by_id(user_id):
+        raise click.ClickException(f"User ID {user_id} not found.")
+    if not data_manager.omdb_api_key:
+        raise click.ClickException("OMDB_API_KEY is not configured.")
+    fetcher = make_bulk_fetcher()
+    try:
+        report = import_titles(data_manager, user_id, clean_titles(titles_file), movie_fields_from_omdb, fetcher)
+    finally:
+        fetcher.close()
+    for entry in report:
+        click.echo(f"{entry['status']:>6}  {entry['title']}  {entry['detail']}")
+    added = sum(1 for entry in report if entry['status'] == 'added')
+    click.echo(f"Imported {added} of {len(report)} titles.")
+
+# --- Collection Export / Import ---
+
+def validate_movie_record(record):
+    """
+    Validates one imported record with the same year/URL/rating rules as the forms.
+
+    Returns:
+        tuple: ``(row, None)`` with row = (title, director, year, plot, poster, rating),
+               or ``(None, error_message)``.
+    """
+    def text(field):
+        value = record.get(field)
+        return '' if value is None else str(value).strip()
+
+    title = text('title')
+    if not title:
+        return None, "Title is required."
+    year_str = text('year')
+    year_int = parse_year(year_str)
+    if year_str and year_int is None:
+        return None, f"Invalid year '{year_str}'."
+    poster = text('poster')
+    if poster and not is_valid_url_format(poster):
+        return None, "Invalid Poster URL format."
+    rating = None
+    rating_str = text('rating')
+    if rating_str:
+        try:
+            rating = float(rating_str)
+        except ValueError:
+            return None, f"Invalid rating '{rating_str}'."
+        if not (0.0 <= rating <= 10.0):
+            return None, "Rating must be between 0.0 and 10.0."
+    return (title, text('director') or None, year_int, text('plot'), poster, rating), None
+
+def parse_collection_stream(filename, binary_stream):
+    """Chooses the CSV or JSON Lines parser from the file extension; returns None if unsupported."""
+    text_stream = io.TextIOWrapper(binary_stream, encoding='utf-8-sig', newline='')
+    if filename.lower().endswith('.csv'):
+        return iter_csv_records(text_stream)
+    if filename.lower().endswith(('.jsonl', '.ndjson')):
+        return iter_jsonl_records(text_stream)
+    return None
+
+def export_response(user_id, renderer, mimetype, extension):
+    """Streams a user's collection through ``renderer`` as a download."""
+    user = load_user(user_id)
+    if not user:
+        flash("User not found.", "warning")
+        return redirect(url_for('list_users'))
+    movies = data_manager.iter_movies_for_user(user_id)
+    filename = f"{user['username']}_movies.{extension}"
+    return Response(renderer(movies), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+@route('/users/<int:user_id>/export.csv')
+def export_movies_csv(user_id):
+    return export_response(user_id, export_csv, 'text/csv', 'csv')
+
+@route('/users/<int:user_id>/export.jsonl')
+def export_movies_jsonl(user_id):
+    return export_response(user_id, export_jsonl, 'application/x-ndjson', 'jsonl')
+
+@route('/users/<int:user_id>/import_collection', methods=['POST'])
+def import_collection(user_id):
+    user = load_user(user_id)
+    if not user:
+        flash("User not found.", "warning")
+        return redirect(url_for('list_users'))
+    upload = request.files.get('collection_file')
+    if not upload or not upload.filename:
+        flash("Choose a CSV or JSONL file to import.", "warning")
+        return redirect(url_for('bulk_import', user_id=user_id))
+    records = parse_collection_stream(upload.filename, upload.stream)
+    if records is None:
+        flash("Unsupported file type; use .csv or .jsonl.", "warning")
+        return redirect(url_for('bulk_import', user_id=user_id))
+    try:
+        summary = import_records(data_manager, user_id, records, validate_movie_record)
+    except ImportAborted as e:
+        flash(f"Import stopped: {e} {e.summary['imported']} movies before that point were imported.", "warning")
+        return redirect(url_for('user_movies', user_id=user_id) if e.summary['imported']
+                        else url_for('bulk_import', user_id=user_id))
+    flash(f"Imported {summary['imported']} movies; {summary['rejected']} rows rejected.",
+          "success" if not summary['rejected'] else "warning")
+    for error in summary['errors'][:10]:
+        flash(error, "warning")
+    return redirect(url_for('user_movies', user_id=user_id))
+
+@commands.command('import-collection')
+@click.argument('user_id', type=int)
+@click.argument('collection_file', type=click.Path(exists=True, dir_okay=False))
+def import_collection_command(user_id, collection_file):
+    """Imports a CSV or JSONL collection export from COLLECTION_FILE for USER_ID."""
+    if not data_manager.get_user_by_id(user_id):
+        raise click.ClickException(f"User ID {user_id} not found.")
+    with open(collection_file, 'rb') as binary_stream:
+        records = parse_collection_stream(collection_file, binary_stream)
+        if records is None:
+            raise click.ClickException("Unsupported file type; use .csv or .jsonl.")
+        try:
+            summary = import_records(data_manager, user_id, records, validate_movie_record)
+        except ImportAborted as e:
+            raise click.ClickException(f"Import stopped: {e} "
+                                       f"{e.summary['imported']} movies before that point were imported.")
+    for error in summary['errors']:
+        click.echo(error, err=True)
+    click.echo(f"Imported {summary['imported']} movies; {summary['rejected']} rows rejected.")
+
+# --- Collection Statistics ---
+
+@commands.command('check-stats')
+@click.option('--repair', is_flag=True, help="Rebuild the summaries if they differ.")
+def check_stats_command(repair):
+    """Diffs the materialized statistics against a full recomputation."""
+    differences = data_manager.check_stats_consistency(repair=repair)
+    if differences is None:
+        raise click.ClickException("Database error while checking statistics; see the log.")
+    for difference in differences:
+        click.echo(difference)
+    if not differences:
+        click.echo("Statistics are consistent.")
+    elif repair:
+        click.echo(f"Rebuilt statistics ({len(differences)} rows differed).")
+    else:
+        raise click.ClickException(f"{len(differences)} rows differ; rerun with --repair to rebuild.")
+
+# --- Shared Catalog ---
+
+@commands.command('backfill-catalog')
+@click.option('--batch-size', type=int, default=500, show_default=True, help="Movies per write transaction.")
+@click.option('--pause', type=float, default=0.0, help="Seconds to sleep between batches.")
+def backfill_catalog_command(batch_size, pause):
+    """Links existing movies to the shared catalog, then prunes unused entries."""
+    totals = data_manager.backfill_catalog(movie_fields_from_omdb, batch_size=batch_size, pause=pause)
+    if totals is None:
+        raise click.ClickException("Database error during the catalog backfill; rerun to resume.")
+    pruned = data_manager.prune_catalog()
+    click.echo(f"Linked {totals['linked']} of {totals['scanned']} unlinked movies; "
+               f"pruned {pruned or 0} unused catalog entries.")
+    click.echo("Run VACUUM during a quiet period to return the freed pages to the file system.")
+
+# --- In-Memory Backend ---
+
+@commands.command('snapshot')
+@click.argument('path', type=click.Path(dir_okay=False))
+def snapshot_command(path):
+    """Copies all data into an in-memory snapshot at PATH (for DATA_BACKEND=memory)."""
+    snapshot = InMemoryDataManager.from_data_manager(data_manager)
+    if snapshot.save_snapshot(path) is None:
+        raise click.ClickException(f"Could not write the snapshot to {path}; see the log.")
+    click.echo(f"Wrote {len(snapshot.get_all_users())} users to {path}.")
+
+# --- Background Fetch Job Routes ---
+
+@route('/jobs/<int:job_id>')
+def fetch_job_status(job_id):
+    """Returns the status of a background OMDb fetch job as JSON (polled by user_movies.html)."""
+    job = data_manager.get_fetch_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found.'}), 404
+    return jsonify({key: job[key] for key in ('id', 'movie_id', 'title', 'status', 'error')})
+
+# --- Static Assets ---
+
+def asset_url(filename):
+    """URL of a static file: its fingerprinted build if `flask build-assets` made one."""
+    hashed = services().assets.hashed(filename)
+    if hashed is None:
+        return url_for('static', filename=filename)
+    return url_for('asset', filename=hashed)
+
+@route('/assets/<path:filename>')
+def asset(filename):
+    """Serves a fingerprinted asset, precompressed when the client accepts it, cached for a year."""
+    path, encoding, has_variants = services().assets.resolve(filename, request.accept_encodings)
+    if path is None:
+        abort(404)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    response = send_file(path, mimetype=mimetype, conditional=True)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if has_variants:
+        response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = CACHE_CONTROL
+    return response
+
+@commands.command('build-assets')
+def build_assets_command():
+    """Fingerprints and precompresses the static files; restart the app to use the new build."""
+    build_folder = services().assets.build_folder
+    manifest = build_assets(current_app.static_folder, build_folder)
+    for name, hashed in sorted(manifest.items()):
+        click.echo(f"{name} -> {hashed}")
+    click.echo(f"Built {len(manifest)} assets into {build_folder}.")
+
+# --- Poster Mirror ---
+
+def poster_url(movie, size='thumb'):
+    """
+    URL of a movie's poster (``size`` 'thumb' for grids, 'full' otherwise).
+
+    With POSTER_MIRROR on, mirrored posters link to the local copy and the
+    others to movie_poster, which mirrors them on first request; without
+    it, the poster URL itself. Movies without a poster get the placeholder.
+    """
+    if not movie.poster:
+        return asset_url('placeholder.png')
+    if not current_app.config['POSTER_MIRROR']:
+        return movie.poster
+    store = services().poster_store
+    digest = store.digest_for(movie.poster)
+    if digest is None:
+        store.prefetch([movie.poster])
+        return url_for('movie_poster', movie_id=movie.id, size=size)
+    return url_for('poster_image', size=size, digest=digest)
+
+@route('/posters/<any(full, thumb):size>/<digest>')
+def poster_image(size, digest):
+    """Serves a mirrored poster; the URL names the content, so it is cached for a year."""
+    if not re.fullmatch(r'[0-9a-f]{64}', digest):
+        abort(404)
+    path = services().poster_store.object_path(digest, thumbnail=(size == 'thumb'))
+    if path is None:
+        abort(404)
+    with open(path, 'rb') as f:
+        mimetype = sniff_image_type(f.read(16)) or 'application/octet-stream'
+    response = send_file(path, mimetype=mimetype, conditional=True)
+    response.headers['Cache-Control'] = CACHE_CONTROL
+    return response
+
+@route('/movies/<int:movie_id>/poster/<any(full, thumb):size>')
+def movie_poster(movie_id, size):
+    """Mirrors a movie's poster if needed and redirects to it, or to the placeholder."""
+    movie = data_manager.get_movie_by_id(movie_id)
+    digest = None
+    if movie and movie.poster and current_app.config['POSTER_MIRROR']:
+        digest = services().poster_store.fetch(movie.poster)
+    if digest is None:
+        return redirect(asset_url('placeholder.png'))
+    return redirect(url_for('poster_image', size=size, digest=digest))
+
+# --- Metrics ---
+
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+def record_request_latency(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        instrumentation.observe_request(request.endpoint or 'unmatched', request.method,
+                                        response.status_code, time.perf_counter() - started)
+    return response
+
+def pool_stats():
+    return data_manager.pool.stats() if hasattr(data_manager, 'pool') else {}
+
+def read_cache_stats():
+    stats = data_manager.cache_stats() if hasattr(data_manager, 'cache_stats') else {}
+    return {key: value for key, value in stats.items() if key != 'max_entries'}
+
+@route('/metrics')
+def metrics():
+    """Prometheus text exposition of the collected metrics."""
+    return Response(instrumentation.render(), mimetype='text/plain; version=0.0.4')
+
+@route('/metrics/slow-queries')
+def slow_queries():
+    """Recent statements over SLOW_QUERY_MS, with their query plans, as JSON."""
+    return jsonify(instrumentation.slow_queries())
+
 # --- Error Handlers ---
-@app.errorhandler(404)
 def page_not_found(e):
     # ... (no changes) ...
-    app.logger.warning(f"404 Not Found error: {request.url} - {e}")
+    current_app.logger.warning(f"404 Not Found error: {request.url} - {e}")
     return render_template('404.html'), 404
 
-@app.errorhandler(500)
 def internal_server_error(e):
     # ... (no changes) ...
-    app.logger.error(f"500 Internal Server Error: {e}", exc_info=True)
+    current_app.logger.error(f"500 Internal Server Error: {e}", exc_info=True)
     return render_template('500.html'), 500
 
+@commands.command('migrate')
+@click.option('--status', is_flag=True, help="Only show the current and pending versions.")
+def migrate_command(status):
+    """Applies pending schema migrations to DATABASE; run once per deployment."""
+    conn = sqlite3.connect(current_app.config['DATABASE'])
+    conn.execute("PRAGMA foreign_keys = ON")
+    try:
+        if status:
+            click.echo(f"Current version: {migrations.current_version(conn)} (latest: {migrations.latest_version()})")
+            return
+        applied = migrations.apply_migrations(conn)
+        click.echo(f"Applied {len(applied)} migration(s); schema at version {migrations.current_version(conn)}.")
+    finally:
+        conn.close()
+
+# --- App Factory ---
+
+def create_app(config=None):
+    """
+    Builds a MovieWeb app; ``config`` (a dict) overrides ``default_config()``.
+
+    The database is not touched here. It is opened, and its schema
+    checked, by the first request or CLI command that needs it.
+    """
+    app = Flask(__name__)
+    app.config.update(default_config())
+    app.config.update(config or {})
+    logging.basicConfig(level=app.config['LOG_LEVEL'])
+    app.extensions['movieweb'] = app_services = AppServices(app.config)
+    app_services.assets = StaticAssets(app.config['ASSET_BUILD_DIR'] or os.path.join(app.static_folder, 'build'))
+    app.add_template_global(asset_url)
+    app.add_template_global(poster_url)
+
+    for rule, view, options in _views:
+        app.add_url_rule(rule, view_func=view, **options)
+    for command in commands.commands.values():
+        app.cli.add_command(command)
+    app.before_request(start_request_timer)
+    app.after_request(record_request_latency)
+    app.after_request(forget_page_versions)
+    app.register_error_handler(404, page_not_found)
+    app.register_error_handler(500, internal_server_error)
+
+    registry = app_services.instrumentation.registry
+    registry.add_gauge_collector(
+        'movieweb_db_pool_connections', 'SQLite connection pool usage.', pool_stats)
+    registry.add_gauge_collector(
+        'movieweb_omdb_cache', 'OMDb response cache counters.', lambda: data_manager.omdb_cache.stats())
+    registry.add_gauge_collector(
+        'movieweb_omdb_client', 'OMDb request, coalescing and circuit breaker counters.',
+        lambda: data_manager.omdb_client.stats())
+    registry.add_gauge_collector(
+        'movieweb_read_cache', 'Read cache counters.', read_cache_stats)
+    registry.add_gauge_collector(
+        'movieweb_page_cache', 'Rendered page cache counters and size in bytes.', app_services.page_cache.stats)
+    registry.add_gauge_collector(
+        'movieweb_posters', 'Poster mirror download counters.', app_services.poster_stats)
+    return app
+
+app = create_app()
+
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
\ No newline at end of file
@@ -0,0 +1,91 @@
+"""
+Benchmark: streaming CSV/JSONL export and chunked import of one collection.
+
+Seeds one user with a large collection (1M movies by default), exports it
+in both formats, then re-imports each export into a fresh user. Reports
+throughput and tracemalloc peak memory, which should stay flat as the
+collection grows.
+
+Usage:
+    python benchmarks/bench_collection_io.py [--movies 1000000] [--batch-size 5000]
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import validate_movie_record
+from data_manager.collection_io import (export_csv, export_jsonl, iter_csv_records,
+                                       iter_jsonl_records, import_records)
+from data_manager.sqlite_data_manager import SQLiteDataManager
+
+
+def measure(label, run, rows):
+    """Runs ``run()`` under tracemalloc and returns a result dict."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'step': label,
+        'rows': rows,
+        'seconds': round(elapsed, 2),
+        'rows_per_second': round(rows / elapsed),
+        'peak_mib': round(peak / 2 ** 20, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--movies', type=int, default=1000000)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    args = parser.parse_args(argv)
+    logging.disable(logging.WARNING)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        dm = SQLiteDataManager(os.path.join(tmp, 'bench.db'))
+        dm.add_user('source')
+        for start in range(0, args.movies, 10000):
+            dm.add_movies_bulk(1, [(f'Movie {i}', f'Director {i % 500}', 1950 + i % 75, 'A short plot.',
+                                    f'https://example.com/{i}.jpg', (i % 100) / 10)
+                                   for i in range(start, min(start + 10000, args.movies))])
+
+        for name, export, parse in (('csv', export_csv, iter_csv_records),
+                                    ('jsonl', export_jsonl, iter_jsonl_records)):
+            path = os.path.join(tmp, f'export.{name}')
+
+            def run_export():
+                with open(path, 'w', encoding='utf-8', newline='') as out:
+                    for chunk in export(dm.iter_movies_for_user(1)):
+                        out.write(chunk)
+
+            dm.add_user(f'target_{name}')
+            target_id = dm.get_all_users()[-1]['id']
+
+            def run_import():
+                with open(path, encoding='utf-8', newline='') as source:
+                    summary = import_records(dm, target_id, parse(source), validate_movie_record,
+                                             batch_size=args.batch_size)
+                assert summary['imported'] == args.movies, summary
+
+            results.append(measure(f'export {name}', run_export, args.movies))
+            results.append(measure(f'import {name}', run_import, args.movies))
+        dm.close()
+
+    for row in results:
+        print(f"{row['step']:>12}: {row['rows_per_second']:>8} rows/s, {row['seconds']} s, "
+              f"peak {row['peak_mib']} MiB", file=sys.stderr)
+    print(json.dumps({'benchmark': 'collection_io', 'results': results}, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
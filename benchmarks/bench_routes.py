@@ -0,0 +1,450 @@
+"""
+Benchmark: latency and throughput of every route in app.py.
+
+Builds a synthetic database (see synthetic_data.py), a static asset build
+and local stub OMDb and poster image servers, with the poster mirror on
+(--no-poster-mirror hot-links posters instead). It then drives every route, either in-process through
+the Flask test client or over HTTP from several threads against a
+threaded Werkzeug server. Per-route p50/p95/p99 latency and overall
+throughput are printed as JSON. Save a run with --out and pass it to
+--compare on a later commit to see the difference.
+
+Usage:
+    python benchmarks/bench_routes.py [--driver client|http] [--users 50] [--movies 200]
+                                      [--rounds 20] [--threads 8] [--no-poster-mirror]
+                                      [--out run.json] [--compare base.json]
+"""
+import io
+import os
+import sys
+import json
+import math
+import time
+import queue
+import random
+import sqlite3
+import logging
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+from collections import deque
+from urllib.parse import quote
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.dirname(HERE)
+sys.path.insert(0, REPO)
+sys.path.insert(0, os.path.join(REPO, 'testing_files'))
+sys.path.insert(0, HERE)
+from omdb_stub import StubOMDbServer
+from image_stub import StubImageServer
+from synthetic_data import generate_database, movie_row
+from data_manager.sqlite_data_manager import SQLiteDataManager
+from data_manager.static_assets import build_assets
+
+SEARCH_WORDS = ('night', 'love', 'king', 'river', 'shadow', 'golden', 'mann', 'legend')
+POSTER_JPEG = b'\xff\xd8\xff\xe0' + bytes(range(256)) * 120  # Every stub poster; about 30 KB, like OMDb's
+
+
+class BenchContext:
+    """IDs the scenarios read and write; scratch rows are consumed by destructive routes."""
+
+    def __init__(self, info, scratch, seed):
+        self.rng = random.Random(seed)
+        self.user_ids = info['user_ids']
+        self.movie_ids = info['movie_ids']
+        self.titles = info['titles']
+        # Autocomplete input: 2-5 leading characters of known titles, as typed
+        self.prefixes = [title[:2 + n % 4].lower() for n, title in enumerate(self.titles)]
+        self.assets = info['assets']
+        self.poster_digests = info['poster_digests']
+        self.owner_id = scratch['owner_id']
+        self.target_id = scratch['target_id']
+        self.updatable_ids = scratch['updatable_ids']
+        self.deletable_ids = deque(scratch['deletable_ids'])
+        self.deletable_users = deque(scratch['user_ids'])
+        self._serial = iter(range(10 ** 9))
+        self._lock = threading.Lock()
+
+    def choice(self, values):
+        with self._lock:
+            return self.rng.choice(values)
+
+    def serial(self):
+        with self._lock:
+            return next(self._serial)
+
+    def take(self, pool, count=1):
+        taken = []
+        while len(taken) < count:
+            try:
+                taken.append(pool.popleft())
+            except IndexError:
+                break
+        return taken
+
+
+def csv_upload(ctx, rows=20):
+    lines = ['title,director,year,plot,poster,rating']
+    for n in range(rows):
+        lines.append(f"Uploaded {ctx.serial()} {n},Someone,1999,Plot,,7.0")
+    return ('bench.csv', '\n'.join(lines).encode('utf-8'))
+
+
+def scenarios():
+    """
+    Returns ``(name, endpoint, build)`` tuples, where ``build(ctx)`` returns a
+    request spec dict (method, path, data, files) or None to skip.
+    """
+    def get(path, headers=None):
+        return {'method': 'GET', 'path': path, 'headers': headers or {}}
+
+    def post(path, data=None, files=None):
+        return {'method': 'POST', 'path': path, 'data': data or {}, 'files': files or {}}
+
+    def delete_movie(ctx):
+        ids = ctx.take(ctx.deletable_ids)
+        return post(f"/movie/{ids[0]}/delete") if ids else None
+
+    def delete_user(ctx):
+        ids = ctx.take(ctx.deletable_users)
+        return post(f"/users/{ids[0]}/delete") if ids else None
+
+    def asset(ctx):
+        if not ctx.assets:
+            return None
+        return get(f"/assets/{ctx.choice(ctx.assets)}", {'Accept-Encoding': 'br, gzip'})
+
+    def poster_image(ctx):
+        if not ctx.poster_digests:
+            return None
+        return get(f"/posters/{ctx.choice(('thumb', 'full'))}/{ctx.choice(ctx.poster_digests)}")
+
+    def batch(action, count, extra=None):
+        def build(ctx):
+            if action == 'update':
+                ids = [ctx.choice(ctx.updatable_ids) for _ in range(count)]
+            else:
+                ids = ctx.take(ctx.deletable_ids, count)
+            if not ids:
+                return None
+            return post(f"/users/{ctx.owner_id}/movies/{action}",
+                        dict({'movie_ids': [str(i) for i in ids]}, **(extra(ctx) if extra else {})))
+        return build
+
+    return [
+        ('home', 'home', lambda ctx: get('/')),
+        ('list_users', 'list_users', lambda ctx: get('/users')),
+        ('user_movies', 'user_movies', lambda ctx: get(f"/users/{ctx.choice(ctx.user_ids)}")),
+        ('user_movies_by_rating', 'user_movies',
+         lambda ctx: get(f"/users/{ctx.choice(ctx.user_ids)}?sort=rating&order=desc")),
+        ('search', 'search', lambda ctx: get(f"/search?q={ctx.choice(SEARCH_WORDS)}")),
+        ('search_in_user', 'search',
+         lambda ctx: get(f"/search?q={ctx.choice(SEARCH_WORDS)}&user_id={ctx.choice(ctx.user_ids)}")),
+        ('suggest_titles', 'suggest_titles',
+         lambda ctx: get(f"/api/titles/suggest?q={quote(ctx.choice(ctx.prefixes))}")),
+        ('movie_detail', 'movie_detail', lambda ctx: get(f"/movie/{ctx.choice(ctx.movie_ids)}")),
+        ('update_movie_form', 'update_movie', lambda ctx: get(f"/movie/{ctx.choice(ctx.movie_ids)}/update")),
+        ('update_movie', 'update_movie',
+         lambda ctx: post(f"/movie/{ctx.choice(ctx.updatable_ids)}/update",
+                          {'title': f"Updated {ctx.serial()}", 'director': 'Someone', 'year': '2001',
+                           'plot': 'Updated plot.', 'poster': '', 'rating': '7.5'})),
+        ('delete_movie', 'delete_movie', delete_movie),
+        ('add_user_form', 'add_user', lambda ctx: get('/add_user')),
+        ('add_user', 'add_user', lambda ctx: post('/add_user', {'username': f"bench_{ctx.serial()}"})),
+        ('delete_user', 'delete_user', delete_user),
+        ('add_movie_form', 'add_movie', lambda ctx: get(f"/users/{ctx.owner_id}/add_movie")),
+        ('add_movie_manual', 'add_movie',
+         lambda ctx: post(f"/users/{ctx.owner_id}/add_movie",
+                          {'add_method': 'manual', 'title': f"Manual {ctx.serial()}", 'director': 'Someone',
+                           'year': '1999', 'plot': '', 'poster': '', 'rating': '6.0'})),
+        ('add_movie_fetch', 'add_movie',
+         lambda ctx: post(f"/users/{ctx.owner_id}/add_movie", {'add_method': 'fetch', 'title': ctx.choice(ctx.titles)})),
+        ('fetch_job_status', 'fetch_job_status', lambda ctx: get('/jobs/1')),
+        ('batch_update', 'update_movies', batch('update', 20, lambda ctx: {'rating': '8.0', 'year': ''})),
+        ('batch_delete', 'delete_movies', batch('delete', 5)),
+        ('batch_move', 'move_movies', batch('move', 5, lambda ctx: {'target_user_id': str(ctx.target_id)})),
+        ('bulk_import_form', 'bulk_import', lambda ctx: get(f"/users/{ctx.owner_id}/import")),
+        ('bulk_import', 'bulk_import',
+         lambda ctx: post(f"/users/{ctx.owner_id}/import",
+                          {'titles': '\n'.join(ctx.choice(ctx.titles) for _ in range(5))})),
+        ('import_collection', 'import_collection',
+         lambda ctx: post(f"/users/{ctx.owner_id}/import_collection", files={'collection_file': csv_upload(ctx)})),
+        ('export_csv', 'export_movies_csv', lambda ctx: get(f"/users/{ctx.choice(ctx.user_ids)}/export.csv")),
+        ('export_jsonl', 'export_movies_jsonl', lambda ctx: get(f"/users/{ctx.choice(ctx.user_ids)}/export.jsonl")),
+        ('asset', 'asset', asset),
+        ('poster_image', 'poster_image', poster_image),
+        ('movie_poster', 'movie_poster', lambda ctx: get(f"/movies/{ctx.choice(ctx.movie_ids)}/poster/thumb")),
+        ('metrics', 'metrics', lambda ctx: get('/metrics')),
+        ('slow_queries', 'slow_queries', lambda ctx: get('/metrics/slow-queries')),
+    ]
+
+
+class FlaskClientDriver:
+    """Issues requests in-process through app.test_client()."""
+
+    def __init__(self, app):
+        self.client = app.test_client(use_cookies=False)
+
+    def request(self, spec):
+        data = dict(spec.get('data') or {})
+        for field, (filename, content) in (spec.get('files') or {}).items():
+            data[field] = (io.BytesIO(content), filename)
+        response = self.client.open(spec['path'], method=spec['method'], data=data, headers=spec.get('headers'))
+        response.get_data()  # Drain streamed bodies so they are part of the timing
+        return response.status_code
+
+
+class HTTPDriver:
+    """Issues requests over HTTP with one keep-alive session per thread."""
+
+    def __init__(self, base_url):
+        import requests
+        self.base_url = base_url.rstrip('/')
+        self._requests = requests
+        self._local = threading.local()
+
+    def request(self, spec):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = self._requests.Session()
+        files = {field: (name, content) for field, (name, content) in (spec.get('files') or {}).items()}
+        response = session.request(spec['method'], self.base_url + spec['path'], data=spec.get('data'),
+                                   files=files or None, headers=spec.get('headers'), allow_redirects=False,
+                                   timeout=60)
+        session.cookies.clear()
+        return response.status_code
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def summarize(samples):
+    """Turns ``{name: [(seconds, status), ...]}`` into per-route latency stats (ms)."""
+    routes = {}
+    for name, entries in sorted(samples.items()):
+        latencies = sorted(seconds * 1000 for seconds, _ in entries)
+        routes[name] = {
+            'count': len(entries),
+            'errors': sum(1 for _, status in entries if status is None or status >= 500),
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+            'mean_ms': round(sum(latencies) / len(latencies), 3),
+            'max_ms': round(latencies[-1], 3),
+        }
+    return routes
+
+
+def run(driver, ctx, tasks, threads):
+    """Executes ``tasks`` (scenario tuples) with ``threads`` workers; returns (samples, wall seconds)."""
+    samples = {}
+    lock = threading.Lock()
+    work = queue.Queue()
+    for task in tasks:
+        work.put(task)
+
+    def worker():
+        while True:
+            try:
+                name, _, build = work.get_nowait()
+            except queue.Empty:
+                return
+            spec = build(ctx)
+            if spec is None:
+                continue
+            started = time.perf_counter()
+            try:
+                status = driver.request(spec)
+            except Exception as e:
+                logging.getLogger('bench').error(f"{name} failed: {e}")
+                status = None
+            elapsed = time.perf_counter() - started
+            with lock:
+                samples.setdefault(name, []).append((elapsed, status))
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return samples, time.perf_counter() - started
+
+
+def prepare_scratch(db_file, rounds, seed, poster_base):
+    """Adds the rows destructive scenarios consume, so reads keep hitting the same data."""
+    rng = random.Random(seed + 1)
+    dm = SQLiteDataManager(db_file)
+    try:
+        dm.add_user('zz_scratch_owner')
+        dm.add_user('zz_scratch_target')
+        for n in range(rounds + 5):
+            dm.add_user(f"zz_scratch_user_{n:05d}")
+        users = {user['username']: user['id'] for user in dm.get_all_users()}
+        owner_id = users['zz_scratch_owner']
+        needed = 200 + rounds * 12
+        dm.add_movies_bulk(owner_id, [movie_row(rng, 10 ** 7 + n, 35, poster_base) for n in range(needed)])
+        ids = [movie['id'] for movie in dm.get_movies_for_user(owner_id)]
+        rng.shuffle(ids)
+        return {
+            'owner_id': owner_id,
+            'target_id': users['zz_scratch_target'],
+            'user_ids': [uid for name, uid in users.items() if name.startswith('zz_scratch_user_')],
+            'updatable_ids': ids[:200],
+            'deletable_ids': ids[200:],
+        }
+    finally:
+        dm.close()
+
+
+def sample_movie_ids(db_file, user_ids, seed, count=500):
+    rng = random.Random(seed + 2)
+    dm = SQLiteDataManager(db_file)
+    try:
+        ids = []
+        for user_id in rng.sample(user_ids, min(len(user_ids), 20)):
+            ids.extend(movie['id'] for movie in dm.get_movie_summaries_for_user(user_id, limit=count // 20 + 1))
+        return ids[:count]
+    finally:
+        dm.close()
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(result, baseline):
+    """Prints per-route p50/p95 deltas against an earlier run to stderr."""
+    print(f"\nComparison with {baseline.get('commit')} ({baseline.get('driver')} driver):", file=sys.stderr)
+    for name, stats in result['routes'].items():
+        base = baseline.get('routes', {}).get(name)
+        if not base:
+            continue
+        deltas = []
+        for key in ('p50_ms', 'p95_ms'):
+            change = (stats[key] - base[key]) / base[key] * 100 if base[key] else 0.0
+            deltas.append(f"{key[:3]} {base[key]:.2f} -> {stats[key]:.2f} ms ({change:+.0f}%)")
+        print(f"{name:>22}: {', '.join(deltas)}", file=sys.stderr)
+    base_rps = baseline.get('totals', {}).get('throughput_rps')
+    if base_rps:
+        rps = result['totals']['throughput_rps']
+        print(f"{'throughput':>22}: {base_rps} -> {rps} req/s ({(rps - base_rps) / base_rps * 100:+.0f}%)",
+              file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--driver', choices=('client', 'http'), default='client')
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--movies', type=int, default=200, help="Movies per user.")
+    parser.add_argument('--plot-words', type=int, default=35)
+    parser.add_argument('--rounds', type=int, default=20, help="Requests per scenario.")
+    parser.add_argument('--threads', type=int, default=8, help="Concurrent clients (http driver only).")
+    parser.add_argument('--omdb-delay', type=float, default=0.0, help="Stub OMDb latency in seconds.")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--no-read-cache', action='store_true')
+    parser.add_argument('--no-poster-mirror', action='store_true', help="Hot-link posters instead of mirroring.")
+    parser.add_argument('--out', help="Also write the JSON result to this file.")
+    parser.add_argument('--compare', help="Earlier result JSON to compare against.")
+    args = parser.parse_args(argv)
+    logging.disable(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp, StubImageServer(default=('image/jpeg', POSTER_JPEG)) as images:
+        db_file = os.path.join(tmp, 'movies.db')
+        info = generate_database(db_file, args.users, args.movies, args.plot_words, args.seed, images.url)
+        scratch = prepare_scratch(db_file, args.rounds, args.seed, images.url)
+        info['movie_ids'] = sample_movie_ids(db_file, info['user_ids'], args.seed)
+        build_folder = os.path.join(tmp, 'build')
+        info['assets'] = sorted(build_assets(os.path.join(REPO, 'static'), build_folder).values())
+        catalog = {title: {'Director': 'Stub Director', 'Year': '1999', 'Plot': 'Stub plot.',
+                           'imdbRating': '7.1', 'Poster': 'N/A'} for title in info['titles']}
+
+        with StubOMDbServer(catalog, delay=args.omdb_delay) as omdb:
+            os.environ.update({'OMDB_API_KEY': 'bench-key', 'OMDB_BASE_URL': omdb.url})
+            from app import create_app
+            app = create_app({'DATABASE': db_file, 'READ_CACHE_ENTRIES': 0 if args.no_read_cache else 1024,
+                              'OMDB_BULK_RATE': 1000, 'ASSET_BUILD_DIR': build_folder,
+                              'POSTER_MIRROR': not args.no_poster_mirror, 'POSTER_DIR': os.path.join(tmp, 'posters'),
+                              'POSTER_ALLOWED_HOSTS': ['127.0.0.1']})
+            server = None
+            try:
+                # Stub posters share their bytes, so one mirrored poster is every poster_image target
+                digest = None
+                if not args.no_poster_mirror:
+                    digest = app.extensions['movieweb'].poster_store.fetch(f"{images.url}/posters/0.jpg")
+                info['poster_digests'] = [digest] if digest else []
+                ctx = BenchContext(info, scratch, args.seed)
+                plan = scenarios()
+                covered = {endpoint for _, endpoint, _ in plan}
+                endpoints = {rule.endpoint for rule in app.url_map.iter_rules()} - {'static'}
+
+                if args.driver == 'http':
+                    from werkzeug.serving import make_server
+                    server = make_server('127.0.0.1', 0, app, threaded=True)
+                    threading.Thread(target=server.serve_forever, daemon=True).start()
+                    driver = HTTPDriver(f"http://127.0.0.1:{server.server_port}")
+                    threads = args.threads
+                else:
+                    driver = FlaskClientDriver(app)
+                    threads = 1
+
+                run(driver, ctx, plan, 1)  # Warm-up: one request per scenario, in order
+                tasks = [scenario for scenario in plan for _ in range(args.rounds)]
+                random.Random(args.seed).shuffle(tasks)
+                samples, wall = run(driver, ctx, tasks, threads)
+            finally:
+                if server is not None:
+                    server.shutdown()
+                app.extensions['movieweb'].close()
+
+    total = sum(len(entries) for entries in samples.values())
+    result = {
+        'benchmark': 'routes',
+        'commit': git_commit(),
+        'driver': args.driver,
+        'params': {key: value for key, value in vars(args).items() if key not in ('out', 'compare')},
+        'environment': {'python': platform.python_version(), 'sqlite': sqlite3.sqlite_version,
+                        'platform': platform.platform()},
+        'dataset': {'users': info['users'], 'movies': info['movies'], 'generate_seconds': info['seconds']},
+        'totals': {
+            'requests': total,
+            'seconds': round(wall, 3),
+            'throughput_rps': round(total / wall, 1) if wall else None,
+            'errors': sum(1 for entries in samples.values() for _, status in entries if status is None or status >= 500),
+        },
+        'routes': summarize(samples),
+        'uncovered_endpoints': sorted(endpoints - covered),
+    }
+
+    for name, stats in result['routes'].items():
+        print(f"{name:>22}: p50 {stats['p50_ms']:>8.2f} ms  p95 {stats['p95_ms']:>8.2f} ms  "
+              f"p99 {stats['p99_ms']:>8.2f} ms  errors {stats['errors']}", file=sys.stderr)
+    print(f"{'total':>22}: {total} requests in {wall:.2f}s ({result['totals']['throughput_rps']} req/s)",
+          file=sys.stderr)
+    if result['uncovered_endpoints']:
+        print(f"Endpoints without a scenario: {', '.join(result['uncovered_endpoints'])}", file=sys.stderr)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(result, json.load(f))
+
+    output = json.dumps(result, indent=2)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Benchmark: per-row memory of movie records versus dict(sqlite3.Row) copies.
+
+Loads one user's collection (100k movies by default) both ways and reports
+tracemalloc peak and retained bytes per row, plus load time.
+
+Usage:
+    python benchmarks/bench_row_memory.py [--movies 100000] [--plot-words 40]
+"""
+import os
+import sys
+import gc
+import json
+import time
+import sqlite3
+import logging
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from data_manager.sqlite_data_manager import SQLiteDataManager
+
+
+def measure(label, load, rows):
+    """Runs ``load()`` under tracemalloc and returns a result dict."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = load()
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(result) == rows
+    del result
+    return {
+        'variant': label,
+        'rows': rows,
+        'load_ms': round(elapsed * 1000, 1),
+        'retained_bytes_per_row': round(retained / rows, 1),
+        'peak_bytes_per_row': round(peak / rows, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--movies', type=int, default=100000)
+    parser.add_argument('--plot-words', type=int, default=40)
+    args = parser.parse_args(argv)
+    logging.disable(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dm = SQLiteDataManager(os.path.join(tmp, 'bench.db'))
+        dm.add_user('power_user')
+        plot = ' '.join(['lorem'] * args.plot_words)
+        for start in range(0, args.movies, 10000):
+            dm.add_movies_bulk(1, [(f'Movie {i}', f'Director {i % 500}', 1950 + i % 75, plot,
+                                    f'https://example.com/{i}.jpg', (i % 100) / 10)
+                                   for i in range(start, min(start + 10000, args.movies))])
+
+        def load_dicts():
+            # The previous read path: sqlite3.Row copied into a dict per row.
+            conn = sqlite3.connect(dm.db_file)
+            conn.row_factory = sqlite3.Row
+            try:
+                rows = conn.execute("SELECT * FROM movies WHERE user_id = ? ORDER BY title", (1,)).fetchall()
+                return [dict(row) for row in rows]
+            finally:
+                conn.close()
+
+        results = [
+            measure('dict(sqlite3.Row)', load_dicts, args.movies),
+            measure('Movie records', lambda: dm.get_movies_for_user(1), args.movies),
+            measure('MovieSummary records', lambda: dm.get_movie_summaries_for_user(1), args.movies),
+        ]
+        dm.close()
+
+    for row in results:
+        print(f"{row['variant']:>22}: {row['retained_bytes_per_row']:>7} B/row retained, "
+              f"{row['peak_bytes_per_row']:>7} B/row peak, {row['load_ms']} ms", file=sys.stderr)
+    print(json.dumps({'benchmark': 'row_memory', 'results': results}, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Benchmark: FTS5 search latency as the movies table grows.
+
+Grows one database through SQLiteDataManager.add_movies_bulk (so the FTS
+triggers do the indexing) and times search_movies() at each size.
+
+Usage:
+    python benchmarks/bench_search.py [--sizes 10000,100000,1000000] [--queries 200]
+"""
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from data_manager.sqlite_data_manager import SQLiteDataManager
+
+WORDS = ("night city dark love war star lost last king dead river house road blood ghost heart "
+         "storm iron glass silent broken golden winter summer shadow empire secret hunter dream fire").split()
+
+
+def random_movie(rng, n):
+    title = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))).title() + f' {n}'
+    director = f'{rng.choice(WORDS).title()} {rng.choice(WORDS).title()}son'
+    plot = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(20, 60)))
+    return (title, director, rng.randint(1920, 2025), plot, '', round(rng.uniform(1, 10), 1))
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='10000,100000,1000000')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+    logging.disable(logging.INFO)
+
+    rng = random.Random(args.seed)
+    sizes = [int(s) for s in args.sizes.split(',')]
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        dm = SQLiteDataManager(os.path.join(tmp, 'bench.db'))
+        for u in range(args.users):
+            dm.add_user(f'user{u}')
+        total = 0
+        for size in sizes:
+            while total < size:
+                batch = [random_movie(rng, total + i) for i in range(min(10000, size - total))]
+                dm.add_movies_bulk(rng.randint(1, args.users), batch)
+                total += len(batch)
+
+            # Selective queries (a unique title number, words plus a number) should
+            # stay flat; broad prefix queries rank every match and grow with the table.
+            query_sets = {
+                'selective': [str(rng.randrange(total)) for _ in range(args.queries)],
+                'multi_word': [f'{rng.choice(WORDS)} {rng.randrange(total)}' for _ in range(args.queries)],
+                'broad_prefix': [rng.choice(WORDS)[:3] for _ in range(max(1, args.queries // 10))],
+            }
+            for kind, queries in query_sets.items():
+                for scope in ('all', 'per_user'):
+                    samples = []
+                    for query in queries:
+                        user_id = rng.randint(1, args.users) if scope == 'per_user' else None
+                        start = time.perf_counter()
+                        dm.search_movies(query, user_id=user_id, limit=20)
+                        samples.append((time.perf_counter() - start) * 1000)
+                    results.append({
+                        'rows': total, 'kind': kind, 'scope': scope, 'queries': len(samples),
+                        'p50_ms': round(statistics.median(samples), 3),
+                        'p95_ms': round(percentile(samples, 95), 3),
+                        'p99_ms': round(percentile(samples, 99), 3),
+                    })
+            for row in results[-6:]:
+                print(f"{total:>9} rows {row['kind']:>12}/{row['scope']:<8} p50 {row['p50_ms']} ms, p95 {row['p95_ms']} ms",
+                      file=sys.stderr)
+        dm.close()
+
+    print(json.dumps({'benchmark': 'fts_search', 'results': results}, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
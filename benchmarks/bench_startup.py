@@ -0,0 +1,97 @@
+"""
+Benchmark: process startup, from `import app` to the first response.
+
+Each run starts a fresh interpreter. It times the import of app.py, then
+create_app() against a prepared database, then the first GET /users
+(which opens the database lazily). This is repeated with the per-process
+schema check on (DB_AUTO_MIGRATE=1) and off. Medians are printed as JSON.
+With --max-import-ms or --max-first-response-ms the script exits non-zero
+when a median exceeds the budget, so it can guard CI against regressions.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 10] [--users 20] [--movies 50]
+                                       [--max-import-ms 500] [--max-first-response-ms 1000]
+"""
+import os
+import sys
+import json
+import logging
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.dirname(HERE)
+sys.path.insert(0, REPO)
+sys.path.insert(0, HERE)
+from synthetic_data import generate_database
+
+# Runs in the child interpreter; prints one JSON line of timings (seconds).
+CHILD = """
+import sys, time, json
+started = time.perf_counter()
+sys.path.insert(0, {repo!r})
+import app as app_module
+imported = time.perf_counter()
+application = app_module.create_app({{'DATABASE': {db_file!r}, 'DB_AUTO_MIGRATE': {migrate!r},
+                                      'OMDB_FETCH_WORKERS': 1, 'LOG_LEVEL': 'WARNING'}})
+created = time.perf_counter()
+status = application.test_client().get('/users').status_code
+responded = time.perf_counter()
+application.extensions['movieweb'].close()
+print(json.dumps({{'import': imported - started, 'create_app': created - imported,
+                  'first_response': responded - created, 'total': responded - started, 'status': status}}))
+"""
+
+
+def run_child(code, cwd):
+    result = subprocess.run([sys.executable, '-c', code], cwd=cwd, capture_output=True, text=True, timeout=120)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--movies', type=int, default=50, help="Movies per user.")
+    parser.add_argument('--max-import-ms', type=float, default=None)
+    parser.add_argument('--max-first-response-ms', type=float, default=None)
+    args = parser.parse_args(argv)
+    logging.disable(logging.WARNING)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, 'movies.db')
+        generate_database(db_file, args.users, args.movies)
+        for migrate in (True, False):
+            code = CHILD.format(repo=REPO, db_file=db_file, migrate=migrate)
+            samples = [run_child(code, tmp) for _ in range(args.runs)]
+            assert all(sample['status'] == 200 for sample in samples)
+            row = {'auto_migrate': migrate, 'runs': args.runs}
+            for key in ('import', 'create_app', 'first_response', 'total'):
+                row[f'{key}_ms'] = round(statistics.median(sample[key] for sample in samples) * 1000, 2)
+            results.append(row)
+
+    for row in results:
+        print(f"auto_migrate={str(row['auto_migrate']):>5}: import {row['import_ms']:>7.1f} ms, "
+              f"create_app {row['create_app_ms']:>5.1f} ms, first response {row['first_response_ms']:>6.1f} ms, "
+              f"total {row['total_ms']:>7.1f} ms (median of {row['runs']})", file=sys.stderr)
+    print(json.dumps({'benchmark': 'startup', 'results': results}, indent=2))
+
+    failed = False
+    for row in results:
+        if args.max_import_ms is not None and row['import_ms'] > args.max_import_ms:
+            print(f"Import time {row['import_ms']} ms exceeds budget {args.max_import_ms} ms.", file=sys.stderr)
+            failed = True
+        if args.max_first_response_ms is not None and row['first_response_ms'] > args.max_first_response_ms:
+            print(f"First response {row['first_response_ms']} ms exceeds budget "
+                  f"{args.max_first_response_ms} ms.", file=sys.stderr)
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
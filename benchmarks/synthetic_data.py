@@ -0,0 +1,109 @@
+"""
+Synthetic MovieWeb databases for benchmarks.
+
+Creates N users x M movies through SQLiteDataManager (so migrations,
+triggers and indexes match production) with a fixed seed, so the same
+arguments always produce the same data. Titles, directors, years, ratings
+and posters follow rough real-world shapes. Plot lengths are log-normal
+around ``--plot-words`` (OMDb short plots are typically 20-60 words).
+
+Usage:
+    python benchmarks/synthetic_data.py OUT.db [--users 100] [--movies 200] [--plot-words 35] [--seed 42]
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import logging
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from data_manager.sqlite_data_manager import SQLiteDataManager
+
+WORDS = ("night city dark love war star lost last king dead river house road blood ghost heart storm iron "
+         "glass silent broken golden winter summer shadow empire secret hunter dream fire wild little big "
+         "american return rise fall legend island garden train stranger game machine journey ocean").split()
+FIRST_NAMES = "Ada Ben Clara David Elena Frank Grace Hugo Iris James Kara Leo Maya Noah Olga Paul Rosa Sam".split()
+LAST_NAMES = "Mann Scott Bigelow Nolan Varda Kurosawa Lynch Coppola Campion Fincher Gerwig Leone Ozu".split()
+BATCH_ROWS = 5000
+POSTER_BASE = "https://img.example.com"
+
+
+def movie_title(rng, serial):
+    """A title that reads like a film name; the serial keeps titles unique."""
+    words = ' '.join(rng.choice(WORDS) for _ in range(rng.choice((1, 2, 2, 3, 3, 4))))
+    return f"{words.title()} {serial}"
+
+
+def movie_row(rng, serial, plot_words, poster_base=POSTER_BASE):
+    """Returns (title, director, year, plot, poster, rating) for one movie."""
+    director = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}{rng.randint(1, 400)}"
+    year = min(2025, int(2025 - rng.expovariate(1 / 18)))
+    words = max(8, min(250, int(rng.lognormvariate(math.log(plot_words), 0.5))))
+    plot = ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+    poster = f"{poster_base}/posters/{serial}.jpg" if rng.random() < 0.8 else ''
+    rating = None if rng.random() < 0.05 else round(min(10.0, max(1.0, rng.gauss(6.5, 1.2))), 1)
+    return movie_title(rng, serial), director, max(1920, year), plot, poster, rating
+
+
+def generate_database(db_file, users=100, movies_per_user=200, plot_words=35, seed=42, poster_base=POSTER_BASE):
+    """
+    Fills ``db_file`` with ``users`` users owning ``movies_per_user`` movies
+    each. Poster URLs point below ``poster_base`` (e.g. a local image stub).
+
+    Returns:
+        dict: ``users``, ``movies``, ``seconds``, ``user_ids`` and ``titles``
+        (a deterministic sample of generated titles, e.g. for a stub OMDb).
+    """
+    rng = random.Random(seed)
+    dm = SQLiteDataManager(db_file)
+    started = time.perf_counter()
+    serial = 0
+    titles = []
+    try:
+        for n in range(users):
+            dm.add_user(f"user_{n:05d}")
+        user_ids = [user['id'] for user in dm.get_all_users()]
+        for user_id in user_ids:
+            remaining = movies_per_user
+            while remaining > 0:
+                rows = []
+                for _ in range(min(remaining, BATCH_ROWS)):
+                    rows.append(movie_row(rng, serial, plot_words, poster_base))
+                    serial += 1
+                if dm.add_movies_bulk(user_id, rows) is None:
+                    raise RuntimeError(f"Failed to insert movies for user ID {user_id}.")
+                if len(titles) < 1000:
+                    titles.extend(row[0] for row in rows[:1000 - len(titles)])
+                remaining -= len(rows)
+    finally:
+        dm.close()
+    return {
+        'users': users,
+        'movies': serial,
+        'seconds': round(time.perf_counter() - started, 2),
+        'user_ids': user_ids,
+        'titles': titles,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('db_file')
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--movies', type=int, default=200, help="Movies per user.")
+    parser.add_argument('--plot-words', type=int, default=35)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+    logging.disable(logging.WARNING)
+    if os.path.exists(args.db_file):
+        parser.error(f"{args.db_file} already exists.")
+    info = generate_database(args.db_file, args.users, args.movies, args.plot_words, args.seed)
+    print(json.dumps({key: info[key] for key in ('users', 'movies', 'seconds')}))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,180 @@
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from data_manager.omdb_client import (DEFAULT_OMDB_URL, OMDbCircuitOpen, OMDbClient, OMDbException,
+                                      OMDbUnavailable)
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` tokens per second, bursts up to ``capacity``."""
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError("rate must be positive.")
+        self.rate = rate
+        self.capacity = capacity or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a token is available, then consumes it."""
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            self._sleep(wait)
+
+
+class BulkOMDbFetcher:
+    """
+    Fetches many titles from OMDb concurrently.
+
+    Requests go through an ``OMDbClient``, normally the data manager's, so
+    bulk imports share its connection pool, circuit breaker and request
+    coalescing with single lookups. A token bucket caps the request rate
+    and transient failures are retried with exponential backoff; while the
+    circuit is open titles fail at once. Results go through the data
+    manager's OMDb cache when one is supplied.
+    """
+
+    def __init__(self, api_key=None, base_url=DEFAULT_OMDB_URL, workers=8, rate=10, retries=3,
+                 backoff=0.5, timeout=10, cache=None, session=None, instrumentation=None, client=None):
+        """
+        Args:
+            api_key (str): OMDb API key (when no client is given).
+            base_url (str): OMDb endpoint (when no client is given).
+            workers (int): Concurrent requests.
+            rate (float): Maximum requests per second across all workers.
+            retries (int): Retries per title for transient failures.
+            backoff (float): Base delay in seconds; doubles per retry.
+            timeout (float): Latency budget per request in seconds.
+            cache (OMDbCache): Optional response cache.
+            session (requests.Session): Optional session to reuse (when no client is given).
+            instrumentation (Instrumentation): Optional OMDb latency recorder (when no client is given).
+            client (OMDbClient): Client to share; by default one is created for this fetcher.
+        """
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.cache = cache
+        self.bucket = TokenBucket(rate)
+        self._owns_client = client is None
+        self.client = client or OMDbClient(api_key, base_url, budget=timeout, pool_size=workers,
+                                           session=session, instrumentation=instrumentation)
+
+    def fetch(self, title):
+        """
+        Fetches one title.
+
+        Returns:
+            tuple: ``(title, movie_data, error)``; exactly one of
+            ``movie_data`` and ``error`` is None.
+        """
+        if self.cache is not None:
+            cached, cached_data = self.cache.get(title)
+            if cached:
+                if cached_data is None:
+                    return title, None, f"Movie '{title}' not found in OMDb."
+                return title, cached_data, None
+
+        for attempt in range(self.retries + 1):
+            self.bucket.acquire()
+            try:
+                movie_data = self.client.lookup(title, budget=self.timeout)
+                break
+            except OMDbCircuitOpen as e:
+                return title, None, f"OMDb unavailable: {e}"
+            except OMDbUnavailable as e:
+                if attempt == self.retries:
+                    logging.warning(f"Giving up on OMDb lookup for '{title}' after {attempt + 1} attempts: {e}")
+                    return title, None, f"OMDb unavailable: {e}"
+                delay = self.backoff * (2 ** attempt) * (1 + random.random() / 2)
+                logging.info(f"Retrying OMDb lookup for '{title}' in {delay:.2f}s ({e})")
+                time.sleep(delay)
+            except OMDbException as e:
+                return title, None, f"Failed to fetch from OMDb: {e}"
+
+        if movie_data.get('Response') == 'True':
+            if self.cache is not None:
+                self.cache.put(title, movie_data)
+            return title, movie_data, None
+        if movie_data.get('Error') == 'Movie not found!':
+            if self.cache is not None:
+                self.cache.put_not_found(title)
+            return title, None, f"Movie '{title}' not found in OMDb."
+        return title, None, f"OMDb API Error: {movie_data.get('Error', 'Unknown OMDb API error')}"
+
+    def fetch_many(self, titles):
+        """Fetches all titles concurrently, preserving input order."""
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="omdb-bulk") as executor:
+            return list(executor.map(self.fetch, titles))
+
+    def close(self):
+        """Closes the client, unless it was shared."""
+        if self._owns_client:
+            self.client.close()
+
+
+def clean_titles(lines):
+    """Strips blank lines and duplicate titles (case-insensitive), keeping order."""
+    seen = set()
+    titles = []
+    for line in lines:
+        title = line.strip()
+        key = title.casefold()
+        if title and key not in seen:
+            seen.add(key)
+            titles.append(title)
+    return titles
+
+
+def import_titles(data_manager, user_id, titles, parse_movie_data, fetcher, batch_size=500):
+    """
+    Fetches ``titles`` through ``fetcher`` and inserts the hits for ``user_id``.
+
+    Args:
+        data_manager (SQLiteDataManager): Target database.
+        user_id (int): Owner of the imported movies.
+        titles (list): Titles to import (see ``clean_titles``).
+        parse_movie_data: Callable ``(movie_data, title)`` returning the movie fields.
+        fetcher (BulkOMDbFetcher): Fetch pipeline.
+        batch_size (int): Rows per insert transaction.
+
+    Returns:
+        list: One ``{'title', 'status', 'detail'}`` dict per title, where
+        status is 'added' or 'failed'.
+    """
+    report = []
+    rows = []
+    for title, movie_data, error in fetcher.fetch_many(titles):
+        if error:
+            report.append({'title': title, 'status': 'failed', 'detail': error})
+            continue
+        fields = parse_movie_data(movie_data, title)
+        rows.append((fields['title'], fields['director'], fields['year'],
+                     fields['plot'], fields['poster'], fields['rating'], fields.get('imdb_id')))
+        report.append({'title': title, 'status': 'added', 'detail': fields['title']})
+
+    added = [entry for entry in report if entry['status'] == 'added']
+    for start in range(0, len(rows), batch_size):
+        chunk = rows[start:start + batch_size]
+        if data_manager.add_movies_bulk(user_id, chunk) is None:
+            for entry in added[start:start + batch_size]:
+                entry['status'] = 'failed'
+                entry['detail'] = "Database error saving movie."
+
+    succeeded = sum(1 for entry in report if entry['status'] == 'added')
+    logging.info(f"Bulk import for user ID {user_id}: {succeeded} added, {len(report) - succeeded} failed.")
+    return report
@@ -0,0 +1,157 @@
+import io
+import csv
+import json
+import logging
+
+# Column order for exported collections; also the fields accepted on import.
+EXPORT_FIELDS = ('title', 'director', 'year', 'plot', 'poster', 'rating')
+MAX_REPORTED_ERRORS = 100
+
+
+class ImportAborted(Exception):
+    """
+    The rest of a collection file cannot be read (not UTF-8, or malformed
+    CSV). ``summary`` counts the rows imported before the failure, which
+    stay imported.
+    """
+
+    def __init__(self, message, summary=None):
+        super().__init__(message)
+        self.summary = summary
+
+
+def export_csv(movies, chunk_rows=500):
+    """
+    Yields a CSV document (header first) for an iterable of movie records.
+
+    Rows are rendered ``chunk_rows`` at a time so the response is streamed
+    in reasonably sized pieces without ever holding the whole collection.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    pending = 1
+    for movie in movies:
+        writer.writerow(['' if movie[field] is None else movie[field] for field in EXPORT_FIELDS])
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if pending:
+        yield buffer.getvalue()
+
+
+def export_jsonl(movies, chunk_rows=500):
+    """Yields one JSON object per line for an iterable of movie records."""
+    lines = []
+    for movie in movies:
+        lines.append(json.dumps({field: movie[field] for field in EXPORT_FIELDS}, ensure_ascii=False))
+        if len(lines) >= chunk_rows:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def iter_csv_records(text_stream):
+    """
+    Parses a CSV stream with a header row into ``(line_number, dict)`` pairs, lazily.
+
+    Raises:
+        ImportAborted: A line cannot be parsed (e.g. a field over the csv
+                       module's size limit); the reader cannot resume after it.
+    """
+    reader = csv.DictReader(text_stream)
+    try:
+        for record in reader:
+            yield reader.line_num, record
+    except csv.Error as e:
+        raise ImportAborted(f"Line {reader.line_num + 1}: {e}.") # line_num counts the lines parsed so far
+
+
+def iter_jsonl_records(text_stream):
+    """Parses a JSON Lines stream into ``(line_number, dict)`` pairs, lazily; bad lines yield None."""
+    for line_number, line in enumerate(text_stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield line_number, record if isinstance(record, dict) else None
+
+
+def import_records(data_manager, user_id, records, validate, batch_size=5000):
+    """
+    Validates and inserts parsed records in chunked transactions.
+
+    Args:
+        data_manager (SQLiteDataManager): Target database.
+        user_id (int): Owner of the imported movies.
+        records: Iterable of ``(line_number, record_dict_or_None)``.
+        validate: Callable ``(record)`` returning ``(row_tuple, None)`` or
+                  ``(None, error_message)``; rows are
+                  (title, director, year, plot, poster, rating).
+        batch_size (int): Rows per ``executemany`` transaction.
+
+    Returns:
+        dict: ``{'imported': int, 'rejected': int, 'errors': [str, ...]}``
+        where ``errors`` lists at most MAX_REPORTED_ERRORS messages.
+
+    Raises:
+        ImportAborted: The file stopped being readable; the valid rows before
+                       that point were imported and are counted in its summary.
+    """
+    summary = {'imported': 0, 'rejected': 0, 'errors': []}
+
+    def reject(line_number, message):
+        summary['rejected'] += 1
+        if len(summary['errors']) < MAX_REPORTED_ERRORS:
+            summary['errors'].append(f"Line {line_number}: {message}")
+
+    def flush(batch, first_line):
+        inserted = data_manager.add_movies_bulk(user_id, batch)
+        if inserted is None:
+            for _ in batch:
+                reject(first_line, "Database error saving the chunk starting here.")
+        else:
+            summary['imported'] += inserted
+
+    batch = []
+    batch_first_line = None
+    line_number = 0
+    try:
+        for line_number, record in records:
+            if record is None:
+                reject(line_number, "Not a valid record.")
+                continue
+            row, error = validate(record)
+            if error:
+                reject(line_number, error)
+                continue
+            if not batch:
+                batch_first_line = line_number
+            batch.append(row)
+            if len(batch) >= batch_size:
+                flush(batch, batch_first_line)
+                batch = []
+    except UnicodeDecodeError:
+        aborted = ImportAborted(f"File is not UTF-8 text after line {line_number}.")
+    except ImportAborted as e:
+        aborted = e
+    else:
+        aborted = None
+    if batch:
+        flush(batch, batch_first_line)
+    if aborted is not None:
+        logging.warning(f"Collection import for user ID {user_id} stopped after {summary['imported']} "
+                        f"imported rows: {aborted}")
+        aborted.summary = summary
+        raise aborted
+
+    logging.info(f"Collection import for user ID {user_id}: {summary['imported']} imported, "
+                 f"{summary['rejected']} rejected.")
+    return summary
@@ -0,0 +1,156 @@
+import sqlite3
+import logging
+import threading
+import time
+import queue
+from contextlib import contextmanager
+
+
+class SQLiteConnectionPool:
+    """
+    A thread-safe pool of long-lived SQLite connections.
+
+    Connections are checked out for the duration of one unit of work and
+    returned afterwards, so the connect/PRAGMA cost is paid once per
+    connection instead of once per query.
+    """
+
+    def __init__(self, db_file, pool_size=5, timeout=10, health_check_interval=30,
+                 connection_factory=sqlite3.Connection):
+        """
+        Initializes the pool. Connections are opened lazily on first checkout.
+
+        Args:
+            db_file (str): Path to the SQLite database file.
+            pool_size (int): Maximum number of open connections.
+            timeout (float): Seconds to wait for a free connection (also used
+                             as the SQLite busy timeout).
+            health_check_interval (float): Idle seconds after which a
+                             connection is pinged before being handed out.
+            connection_factory (type): sqlite3.Connection subclass to open
+                             (e.g. a statement-timing connection).
+        """
+        if pool_size < 1:
+            raise ValueError("pool_size must be at least 1.")
+        self.db_file = db_file
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.connection_factory = connection_factory
+        self._idle = queue.LifoQueue(maxsize=pool_size)
+        self._lock = threading.Lock()
+        self._open_count = 0
+        self._closed = False
+        self._configure_hooks = []
+
+    def add_configure_hook(self, hook):
+        """Registers a callable run on every newly opened connection."""
+        self._configure_hooks.append(hook)
+
+    def _open_connection(self):
+        """Opens and configures a new connection."""
+        conn = sqlite3.connect(self.db_file, timeout=self.timeout, check_same_thread=False,
+                               factory=self.connection_factory)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        for hook in self._configure_hooks:
+            hook(conn)
+        return conn
+
+    def _is_healthy(self, conn):
+        """Returns True if the connection still answers a trivial query."""
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, conn):
+        """Closes a connection and frees its slot."""
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self._open_count -= 1
+
+    def acquire(self):
+        """Checks out a connection, opening one if the pool is not yet full."""
+        if self._closed:
+            raise sqlite3.OperationalError("Connection pool is closed.")
+
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                conn, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_open = self._open_count < self.pool_size
+                    if can_open:
+                        self._open_count += 1
+                if can_open:
+                    try:
+                        return self._open_connection()
+                    except sqlite3.Error:
+                        with self._lock:
+                            self._open_count -= 1
+                        logging.exception(f"Database connection error to {self.db_file}")
+                        raise
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise sqlite3.OperationalError(
+                        f"Timed out waiting for a connection to {self.db_file} (pool size {self.pool_size})."
+                    )
+                try:
+                    conn, last_used = self._idle.get(timeout=remaining)
+                except queue.Empty:
+                    continue
+
+            if time.monotonic() - last_used > self.health_check_interval and not self._is_healthy(conn):
+                logging.warning(f"Discarding unhealthy pooled connection to {self.db_file}.")
+                self._discard(conn)
+                continue
+            return conn
+
+    def release(self, conn):
+        """Returns a connection to the pool, rolling back any open transaction."""
+        if self._closed:
+            self._discard(conn)
+            return
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+        self._idle.put((conn, time.monotonic()))
+
+    @contextmanager
+    def connection(self):
+        """Context manager yielding a pooled connection."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def stats(self):
+        """Returns a snapshot of pool usage."""
+        idle = self._idle.qsize()
+        return {
+            'pool_size': self.pool_size,
+            'open': self._open_count,
+            'idle': idle,
+            'in_use': self._open_count - idle,
+        }
+
+    def close(self):
+        """Closes all idle connections and refuses further checkouts."""
+        self._closed = True
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+        logging.info(f"Closed connection pool for {self.db_file}.")
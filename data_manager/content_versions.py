@@ -0,0 +1,65 @@
+"""
+Per-user content versions for conditional page responses.
+
+``content_versions`` holds one row per user whose pages changed, plus an
+``ALL_USERS`` (0) row that changes with every user or movie write. Each
+row has a counter and the Unix time of the last change; triggers bump
+them on every write to ``users``, ``movies`` and ``fetch_jobs`` (jobs only
+affect their owner's page), so a page rendered at one version stays
+valid until its row moves on, whichever process made the change.
+
+Rows are never deleted, so a user ID reused after a delete keeps
+counting up and cannot repeat an old version.
+"""
+
+from data_manager.user_stats import ALL_USERS
+
+NOW = "CAST(strftime('%s', 'now') AS INTEGER)"
+
+
+def _bump(*scopes):
+    """Trigger statement bumping the given scopes (SQL expressions)."""
+    values = ', '.join(f"({scope}, 1, {NOW})" for scope in scopes)
+    return f"""
+        INSERT INTO content_versions (user_id, version, updated_at) VALUES {values}
+        ON CONFLICT (user_id) DO UPDATE SET version = version + 1, updated_at = excluded.updated_at;
+    """
+
+
+def _trigger(name, event, table, *scopes):
+    return f"CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON {table} BEGIN {_bump(*scopes)} END"
+
+
+# DDL applied by schema migration 12.
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS content_versions (
+        user_id INTEGER PRIMARY KEY,
+        version INTEGER NOT NULL,
+        updated_at INTEGER NOT NULL
+    )
+    """,
+    _trigger('content_versions_users_ai', 'INSERT', 'users', 'new.id', ALL_USERS),
+    _trigger('content_versions_users_au', 'UPDATE', 'users', 'old.id', 'new.id', ALL_USERS),
+    _trigger('content_versions_users_ad', 'DELETE', 'users', 'old.id', ALL_USERS),
+    _trigger('content_versions_movies_ai', 'INSERT', 'movies', 'new.user_id', ALL_USERS),
+    _trigger('content_versions_movies_au', 'UPDATE', 'movies', 'old.user_id', 'new.user_id', ALL_USERS),
+    _trigger('content_versions_movies_ad', 'DELETE', 'movies', 'old.user_id', ALL_USERS),
+    _trigger('content_versions_fetch_jobs_ai', 'INSERT', 'fetch_jobs', 'new.user_id'),
+    _trigger('content_versions_fetch_jobs_au', 'UPDATE', 'fetch_jobs', 'old.user_id', 'new.user_id'),
+)
+
+
+def bump_all(conn):
+    """Invalidates every page, e.g. after summaries they show were rebuilt."""
+    conn.execute(f"INSERT OR IGNORE INTO content_versions (user_id, version, updated_at) VALUES ({ALL_USERS}, 0, 0)")
+    conn.execute(f"UPDATE content_versions SET version = version + 1, updated_at = {NOW}")
+
+
+def read_version(conn, user_id):
+    """
+    Returns ``(version, updated_at)`` for ``user_id`` (ALL_USERS for pages
+    showing every user), or ``(0, 0)`` if it never changed.
+    """
+    row = conn.execute("SELECT version, updated_at FROM content_versions WHERE user_id = ?", (user_id,)).fetchone()
+    return tuple(row) if row else (0, 0)
@@ -1,51 +1,161 @@
 from abc import ABC, abstractmethod
 
 class DataManagerInterface(ABC):
+    """
+    Operations the MovieWeb app needs from a storage backend.
+
+    Implemented by ``SQLiteDataManager`` and ``InMemoryDataManager``; the
+    read cache and instrumentation wrappers delegate to either. Records are
+    the tuple types from ``data_manager.records``. Failures are reported the
+    way ``SQLiteDataManager`` does (False/None/empty results, logged), not
+    raised. Implementations also expose ``omdb_api_key``, ``omdb_base_url``,
+    ``omdb_cache`` and ``omdb_client``.
+    """
+
+    # --- Users ---
     @abstractmethod
-    def get_all_users(self):
-        pass
+    def get_all_users(self, limit=None, after=None):
+        """Users ordered by username; ``after`` is a username keyset cursor."""
 
     @abstractmethod
-    def get_user_movies(self, user_id):
-        pass
+    def get_user_by_id(self, user_id):
+        """A User, or None."""
 
+    @abstractmethod
+    def add_user(self, username):
+        """True on success, False if the username is taken, None on error."""
 
-class InMemoryDataManager(DataManagerInterface):
-    """
-    A simple in-memory data_manager manager using a dictionary.
-    """
+    @abstractmethod
+    def delete_user(self, user_id):
+        """Deletes a user with their movies and fetch jobs; True if it existed."""
 
-    def __init__(self, data):
-        """
-        Initializes the InMemoryDataManager with the given data_manager.
-
-        Args:
-            data (dict): A dictionary where keys are user IDs and values
-                         are lists of movie IDs.  Example:
-                         {
-                             1: [101, 102],
-                             2: [201, 202, 203]
-                         }
-        """
-        self.data = data
-
-    def get_all_users(self):
-        """
-        Returns a list of all user IDs.
-        """
-        return list(self.data.keys())
+    # --- Movies ---
+    @abstractmethod
+    def get_movies_for_user(self, user_id, limit=None, after=None, sort='title', descending=False):
+        """Movies ordered by ``sort`` then ID; ``after`` is a ``(value, id)`` keyset cursor."""
 
-    def get_user_movies(self, user_id):
-        """
-        Returns a list of movie IDs for a given user ID.
+    @abstractmethod
+    def get_movie_summaries_for_user(self, user_id, limit=None, after=None, sort='title', descending=False):
+        """Like get_movies_for_user, returning MovieSummary records."""
+
+    @abstractmethod
+    def iter_movies_for_user(self, user_id, fetch_size=1000):
+        """Streams a user's movies ordered by title, then ID."""
+
+    @abstractmethod
+    def get_movie_by_id(self, movie_id):
+        """A Movie, or None."""
+
+    @abstractmethod
+    def get_movie_with_user(self, movie_id):
+        """``(Movie, User)``; ``(None, None)`` if the movie does not exist."""
 
-        Args:
-            user_id (int): The ID of the user.
+    @abstractmethod
+    def add_movie(self, user_id, title, director, year, plot, poster, rating, imdb_id=None):
+        """True on success, False on error."""
 
-        Returns:
-            list: A list of movie IDs, or an empty list if the user is not found.
-        """
-        return self.data.get(user_id, [])
+    @abstractmethod
+    def add_movies_bulk(self, user_id, rows):
+        """Inserts (title, director, year, plot, poster, rating[, imdb_id]) rows; returns the count or None."""
 
+    @abstractmethod
+    def update_movie(self, movie_id, title, director, year, plot, poster, rating):
+        """True if the movie existed and was updated."""
 
+    @abstractmethod
+    def delete_movie(self, movie_id):
+        """True if the movie existed and was deleted."""
+
+    @abstractmethod
+    def delete_movies(self, user_id, movie_ids):
+        """Deletes the listed movies owned by ``user_id``; returns the count or None."""
+
+    @abstractmethod
+    def update_movies(self, user_id, movie_ids, fields):
+        """Sets BATCH_UPDATE_FIELDS on the listed movies; returns the count or None."""
+
+    @abstractmethod
+    def move_movies(self, user_id, movie_ids, target_user_id):
+        """Reassigns the listed movies; returns the count, or None if the target does not exist."""
+
+    @abstractmethod
+    def get_movie_titles(self):
+        """Every movie title, duplicates included, in case-insensitive order."""
+
+    @abstractmethod
+    def search_movies(self, query, user_id=None, limit=20, offset=0):
+        """SearchHit records matching every word of ``query`` (the last as a prefix), best first."""
+
+    # --- Statistics, content versions and catalog ---
+    @abstractmethod
+    def get_user_stats(self, user_id, top_directors=5):
+        """Movie count, rated count, average rating, decades and top directors."""
 
+    @abstractmethod
+    def get_global_stats(self, top_directors=5):
+        """get_user_stats across all users."""
+
+    @abstractmethod
+    def get_user_stat_totals(self, user_ids):
+        """user ID -> ``{'movie_count', 'average_rating'}`` for users that own movies."""
+
+    @abstractmethod
+    def check_stats_consistency(self, repair=False):
+        """Differences between the maintained statistics and a recomputation."""
+
+    @abstractmethod
+    def get_content_version(self, user_id):
+        """``(version, updated_at)`` of a user's pages (ALL_USERS: every user's), or None on error."""
+
+    @abstractmethod
+    def backfill_catalog(self, parse_movie_data=None, batch_size=500, pause=0.0):
+        """Links movies that predate the catalog; returns ``{'scanned', 'linked'}`` or None."""
+
+    @abstractmethod
+    def prune_catalog(self):
+        """Drops catalog entries no movie uses; returns the count or None."""
+
+    @abstractmethod
+    def get_catalog_links(self, user_id):
+        """movie ID -> ``(imdb_id, plot, poster)`` of the catalog entry each linked movie uses, or None on error."""
+
+    # --- Background OMDb fetch jobs ---
+    @abstractmethod
+    def fetch_movie_details_from_omdb(self, title, budget=None):
+        """The OMDb response dict for ``title`` within ``budget`` seconds; raises OMDbException."""
+
+    @abstractmethod
+    def create_fetch_job(self, user_id, title):
+        """Adds a placeholder movie and a pending job; returns ``{'movie_id', 'job_id'}`` or None."""
+
+    @abstractmethod
+    def get_fetch_job(self, job_id):
+        """The job as a dict, or None."""
+
+    @abstractmethod
+    def get_fetch_jobs_for_user(self, user_id):
+        """A user's jobs that are not done, keyed by movie ID."""
+
+    @abstractmethod
+    def get_unfinished_fetch_jobs(self):
+        """Pending and running jobs, oldest first."""
+
+    @abstractmethod
+    def claim_fetch_job(self, job_id, lease=300):
+        """Atomically marks a pending (or stale running) job as running; True if claimed."""
+
+    @abstractmethod
+    def set_fetch_job_status(self, job_id, status, error=None):
+        """True if the job exists."""
+
+    @abstractmethod
+    def complete_fetch_job(self, job_id, movie_id, fields):
+        """Fills in the placeholder movie and marks the job done; False on error."""
+
+    @abstractmethod
+    def close(self):
+        """Releases resources; intended as a shutdown hook."""
+
+    def get_user_movies(self, user_id):
+        """All of a user's movies ordered by title (kept for older callers)."""
+        return self.get_movies_for_user(user_id)
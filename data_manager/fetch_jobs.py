@@ -0,0 +1,86 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from data_manager.sqlite_data_manager import OMDbException
+
+
+class OMDbFetchWorker:
+    """
+    Background pool that fills in placeholder movies from OMDb.
+
+    Jobs are persisted in the ``fetch_jobs`` table by
+    ``SQLiteDataManager.create_fetch_job``; this class only executes them.
+    A job is claimed atomically before it runs, so when several processes
+    start workers each job still runs once. ``start()`` offers every
+    unfinished job: pending ones are claimed by the first worker to get
+    there, running ones only once their ``lease`` ran out (their process
+    died mid-job).
+    """
+
+    def __init__(self, data_manager, parse_movie_data, workers=2, on_complete=None, lease=300):
+        """
+        Args:
+            data_manager (SQLiteDataManager): Used for OMDb lookups and job bookkeeping.
+            parse_movie_data: Callable ``(movie_data, title)`` returning a dict with
+                              title, director, year, plot, poster and rating.
+            workers (int): Number of worker threads.
+            on_complete: Optional callable receiving the fields of each completed job
+                         (e.g. to mirror the poster).
+            lease (float): Seconds after which a job still marked running is
+                           considered abandoned; well above the OMDb latency budget.
+        """
+        self.data_manager = data_manager
+        self.parse_movie_data = parse_movie_data
+        self.workers = workers
+        self.on_complete = on_complete
+        self.lease = lease
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Starts the worker threads and resumes unfinished jobs."""
+        with self._lock:
+            if self._executor is not None:
+                return
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="omdb-fetch")
+        resumed = self.data_manager.get_unfinished_fetch_jobs()
+        for job in resumed:
+            self.submit(job['id'])
+        if resumed:
+            logging.info(f"Resumed {len(resumed)} unfinished OMDb fetch job(s).")
+
+    def submit(self, job_id):
+        """Schedules a persisted job for execution."""
+        if self._executor is None:
+            self.start()
+        return self._executor.submit(self._run_job, job_id)
+
+    def _run_job(self, job_id):
+        """Executes one job: look up OMDb and update the placeholder movie."""
+        if not self.data_manager.claim_fetch_job(job_id, self.lease):
+            return # Finished, or being run by another worker
+        job = self.data_manager.get_fetch_job(job_id)
+        if not job:
+            return
+        try:
+            movie_data = self.data_manager.fetch_movie_details_from_omdb(job['title'])
+            fields = self.parse_movie_data(movie_data, job['title'])
+        except OMDbException as e:
+            self.data_manager.set_fetch_job_status(job_id, 'failed', str(e))
+            return
+        except Exception as e:
+            logging.exception(f"Unexpected error in OMDb fetch job {job_id}: {e}")
+            self.data_manager.set_fetch_job_status(job_id, 'failed', f"Unexpected error: {e}")
+            return
+
+        if not self.data_manager.complete_fetch_job(job_id, job['movie_id'], fields):
+            self.data_manager.set_fetch_job_status(job_id, 'failed', "Database error saving fetched movie data.")
+        elif self.on_complete is not None:
+            self.on_complete(fields)
+
+    def shutdown(self, wait=True):
+        """Stops accepting jobs; unfinished ones are resumed on next start."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
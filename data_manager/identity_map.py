@@ -0,0 +1,70 @@
+class IdentityMap:
+    """
+    Per-request cache of users and movies already loaded from the database.
+
+    Holds at most one copy of each entity for the lifetime of a request, so
+    repeated lookups of the same ID do not go back to SQLite. Writes must
+    invalidate the entities they touch.
+    """
+
+    _MISSING = object()
+
+    def __init__(self):
+        self.users = {}
+        self.movies = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, store, key, loader):
+        """Returns the cached entity for ``key`` or loads and remembers it."""
+        value = store.get(key, self._MISSING)
+        if value is not self._MISSING:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = loader(key)
+        store[key] = value
+        return value
+
+    def get_user(self, user_id, loader):
+        """Returns a user dict (or None), loading it with ``loader(user_id)`` on a miss."""
+        return self._get(self.users, user_id, loader)
+
+    def get_movie(self, movie_id, loader):
+        """Returns a movie dict (or None), loading it with ``loader(movie_id)`` on a miss."""
+        return self._get(self.movies, movie_id, loader)
+
+    def get_movie_with_user(self, movie_id, loader):
+        """
+        Returns ``(movie, user)``, loading both in one call to ``loader(movie_id)``
+        unless the movie and its owner are already mapped.
+        """
+        movie = self.movies.get(movie_id, self._MISSING)
+        if movie is not self._MISSING:
+            if movie is None:
+                self.hits += 1
+                return None, None
+            user = self.users.get(movie['user_id'], self._MISSING)
+            if user is not self._MISSING:
+                self.hits += 1
+                return movie, user
+        self.misses += 1
+        movie, user = loader(movie_id)
+        self.movies[movie_id] = movie
+        if movie is not None:
+            self.users[movie['user_id']] = user
+        return movie, user
+
+    def invalidate_user(self, user_id):
+        """Forgets a user (and, since deletes cascade, all movies)."""
+        self.users.pop(user_id, None)
+        self.movies.clear()
+
+    def invalidate_movie(self, movie_id):
+        """Forgets a movie."""
+        self.movies.pop(movie_id, None)
+
+    def clear(self):
+        """Forgets everything."""
+        self.users.clear()
+        self.movies.clear()
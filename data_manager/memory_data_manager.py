@@ -0,0 +1,674 @@
+import os
+import re
+import json
+import time
+import heapq
+import logging
+import tempfile
+import threading
+import unicodedata
+from itertools import count, islice
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from data_manager.data_manager_interface import DataManagerInterface
+from data_manager.omdb_cache import OMDbCache
+from data_manager.omdb_client import DEFAULT_OMDB_URL, OMDbClient
+from data_manager.omdb_lookup import OMDbLookupMixin
+from data_manager.pagination import MOVIE_SORT_KEYS
+from data_manager.records import Movie, MovieSummary, SearchHit, User
+from data_manager.sorted_index import SortedIndex
+from data_manager.sqlite_data_manager import BATCH_UPDATE_FIELDS
+from data_manager.user_stats import ALL_USERS, RATING_TOLERANCE
+
+SNAPSHOT_VERSION = 1
+# Same column weights as the bm25() ranking of SQLiteDataManager.search_movies.
+SEARCH_WEIGHTS = (('title', 10.0), ('director', 5.0), ('plot', 1.0))
+_TOKEN = re.compile(r'[^\W_]+')
+
+
+def _tokens(text):
+    """Splits text like FTS5's unicode61 tokenizer: case-folded, diacritics removed."""
+    if not text:
+        return []
+    decomposed = unicodedata.normalize('NFKD', str(text))
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _TOKEN.findall(stripped.casefold())
+
+
+def _sort_key(value, movie_id):
+    """Index key ordering NULLs first, like SQLite's ``ORDER BY column, id``."""
+    return (value is not None, 0 if value is None else value, movie_id)
+
+
+def _decade(year):
+    if year is None:
+        return None
+    try:
+        return int(year) // 10 * 10
+    except (TypeError, ValueError):
+        return None
+
+
+def _director(director):
+    director = director.strip(' ') if isinstance(director, str) else None
+    return director if director not in (None, '', 'N/A') else None
+
+
+def _now():
+    """A timestamp in SQLite's CURRENT_TIMESTAMP format."""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class InMemoryDataManager(OMDbLookupMixin, DataManagerInterface):
+    """
+    A storage engine in process memory with the SQLiteDataManager API.
+
+    Users, movies and fetch jobs live in hash maps keyed by ID. Each user
+    has one SortedIndex per sort key (``MOVIE_SORT_KEYS``) holding
+    ``(not null, value, id)`` keys, so keyset pages, inserts and deletes
+    are O(log n) and rows come back in SQLite's order. Search uses an
+    inverted index plus a sorted vocabulary for prefix terms; statistics
+    are kept up to date on every write like the SQLite triggers do.
+    Movies added with an IMDb ID share their plot and poster strings.
+
+    All state sits behind one lock. With ``snapshot_path`` the data is
+    loaded from that file on start (if it exists) and written back
+    atomically by ``save_snapshot()`` and ``close()``.
+    """
+
+    def __init__(self, snapshot_path=None, omdb_cache_size=1024, omdb_cache_ttl=7 * 24 * 3600,
+                 omdb_negative_ttl=24 * 3600, omdb_budget=5.0, instrumentation=None):
+        self.snapshot_path = snapshot_path
+        self.instrumentation = instrumentation
+        self.omdb_client = OMDbClient(os.environ.get('OMDB_API_KEY'),
+                                      os.environ.get('OMDB_BASE_URL', DEFAULT_OMDB_URL),
+                                      budget=omdb_budget, instrumentation=instrumentation)
+        if not self.omdb_api_key:
+             logging.warning("OMDB_API_KEY environment variable not set. Movie fetching via API will fail.")
+        self.omdb_cache = OMDbCache(None, None, max_entries=omdb_cache_size, ttl=omdb_cache_ttl,
+                                    negative_ttl=omdb_negative_ttl)
+        self._lock = threading.RLock()
+        self._reset()
+        if snapshot_path and os.path.exists(snapshot_path):
+            self.load_snapshot(snapshot_path)
+
+    def _reset(self):
+        self._users = {}          # id -> User
+        self._user_ids = {}       # username -> id
+        self._usernames = SortedIndex()
+        self._movies = {}         # id -> Movie
+        self._by_user = {}        # user id -> {sort key: SortedIndex}
+        self._movie_imdb = {}     # movie id -> IMDb ID of catalog-linked movies
+        self._catalog = {}        # IMDb ID -> (plot, poster) shared by linked movies
+        self._jobs = {}           # id -> fetch job dict
+        self._jobs_by_movie = {}  # movie id -> set of job ids
+        self._open_jobs = set()   # ids of jobs that are not done
+        self._postings = {}       # search token -> {movie id: weighted term count}
+        self._vocabulary = SortedIndex()
+        self._stats = {}          # user id (ALL_USERS for totals) -> [count, rated, rating sum, decades, directors]
+        self._versions = {}       # user id (ALL_USERS for every user) -> (content version, Unix time of change)
+        # Versions are drawn from one sequence seeded with the clock, so a
+        # restarted process (which re-versions everything it loads) never
+        # reissues a version an earlier one served.
+        self._version_seq = count(time.time_ns())
+        self._next_ids = {'users': 1, 'movies': 1, 'fetch_jobs': 1}
+
+    def _touch(self, user_id, everyone=True):
+        """Bumps the content version of a user's pages (and, with ``everyone``, of the user list)."""
+        now = int(time.time())
+        for scope in (user_id, ALL_USERS) if everyone else (user_id,):
+            self._versions[scope] = (next(self._version_seq), now)
+
+    def _next_id(self, table):
+        value = self._next_ids[table]
+        self._next_ids[table] = value + 1
+        return value
+
+    def close(self):
+        """Writes the snapshot, if configured. Intended as a shutdown hook."""
+        if self.snapshot_path:
+            self.save_snapshot()
+        self.omdb_client.close()
+
+    # --- Indexing ---
+    def _index_movie(self, movie):
+        indexes = self._by_user.get(movie.user_id)
+        if indexes is None:
+            indexes = self._by_user[movie.user_id] = {key: SortedIndex() for key in MOVIE_SORT_KEYS}
+        for key in MOVIE_SORT_KEYS:
+            indexes[key].add(_sort_key(getattr(movie, key), movie.id))
+        for token, weight in self._search_terms(movie).items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                self._vocabulary.add(token)
+            postings[movie.id] = weight
+        self._count_movie(movie, 1)
+        self._touch(movie.user_id)
+
+    def _unindex_movie(self, movie):
+        indexes = self._by_user[movie.user_id]
+        for key in MOVIE_SORT_KEYS:
+            indexes[key].discard(_sort_key(getattr(movie, key), movie.id))
+        for token in self._search_terms(movie):
+            postings = self._postings[token]
+            del postings[movie.id]
+            if not postings:
+                del self._postings[token]
+                self._vocabulary.discard(token)
+        self._count_movie(movie, -1)
+        self._touch(movie.user_id)
+
+    @staticmethod
+    def _search_terms(movie):
+        terms = Counter()
+        for column, weight in SEARCH_WEIGHTS:
+            for token in _tokens(getattr(movie, column)):
+                terms[token] += weight
+        return terms
+
+    def _count_movie(self, movie, sign):
+        """Adds (sign=1) or removes (sign=-1) a movie from its owner's and the global statistics."""
+        decade, director = _decade(movie.year), _director(movie.director)
+        for key in (movie.user_id, ALL_USERS):
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = [0, 0, 0.0, Counter(), Counter()]
+            stats[0] += sign
+            if movie.rating is not None:
+                stats[1] += sign
+                stats[2] += sign * movie.rating
+            for counter, value in ((stats[3], decade), (stats[4], director)):
+                if value is not None:
+                    counter[value] += sign
+                    if counter[value] <= 0:
+                        del counter[value]
+
+    def _shared(self, imdb_id, plot, poster):
+        """Registers a catalog entry and returns (plot, poster), reusing its strings when equal."""
+        if not imdb_id:
+            return plot, poster
+        entry = self._catalog.setdefault(imdb_id, (plot, poster))
+        return (entry[0] if plot == entry[0] else plot), (entry[1] if poster == entry[1] else poster)
+
+    def _store_movie(self, movie, imdb_id=None):
+        """Inserts or replaces a movie record, keeping every index in step."""
+        old = self._movies.get(movie.id)
+        if old is not None:
+            self._unindex_movie(old)
+        imdb_id = imdb_id or self._movie_imdb.get(movie.id)
+        plot, poster = self._shared(imdb_id, movie.plot, movie.poster)
+        movie = movie._replace(plot=plot, poster=poster)
+        if imdb_id:
+            self._movie_imdb[movie.id] = imdb_id
+        self._movies[movie.id] = movie
+        self._index_movie(movie)
+        return movie
+
+    def _drop_movie(self, movie_id):
+        """Deletes a movie and, like ON DELETE CASCADE, its fetch jobs."""
+        movie = self._movies.pop(movie_id)
+        self._unindex_movie(movie)
+        self._movie_imdb.pop(movie_id, None)
+        for job_id in self._jobs_by_movie.pop(movie_id, ()):
+            del self._jobs[job_id]
+            self._open_jobs.discard(job_id)
+
+    def _new_movie(self, user_id, title, director, year, plot, poster, rating, imdb_id=None):
+        movie = Movie(self._next_id('movies'), user_id, title, director, year, plot, poster, rating)
+        return self._store_movie(movie, imdb_id)
+
+    # --- Users ---
+    def get_all_users(self, limit=None, after=None):
+        """Users ordered by username; ``after`` is a username keyset cursor."""
+        with self._lock:
+            if after is None:
+                names = iter(self._usernames)
+            else:
+                names = self._usernames.irange(lower=after, inclusive=(False, True))
+            return [self._users[self._user_ids[name]] for name in islice(names, limit)]
+
+    def get_user_by_id(self, user_id):
+        return self._users.get(user_id)
+
+    def add_user(self, username):
+        with self._lock:
+            if username is None or username in self._user_ids:
+                logging.warning(f"Attempted to add duplicate username: {username}")
+                return False
+            user = User(self._next_id('users'), username)
+            self._users[user.id] = user
+            self._user_ids[username] = user.id
+            self._usernames.add(username)
+            self._touch(user.id)
+        logging.info(f"Added user: {username} (ID: {user.id})")
+        return True
+
+    def delete_user(self, user_id):
+        with self._lock:
+            user = self._users.pop(user_id, None)
+            if user is None:
+                logging.warning(f"Attempted to delete user ID {user_id}, but no matching record found.")
+                return False
+            indexes = self._by_user.get(user_id)
+            for key in list(indexes['title']) if indexes else ():
+                self._drop_movie(key[-1])
+            self._by_user.pop(user_id, None)
+            self._stats.pop(user_id, None)
+            self._touch(user_id)
+            del self._user_ids[user.username]
+            self._usernames.discard(user.username)
+        logging.info(f"Deleted user ID: {user_id} with their movies")
+        return True
+
+    # --- Movies ---
+    def _movie_page(self, user_id, limit, after, sort, descending):
+        if sort not in MOVIE_SORT_KEYS:
+            raise ValueError(f"Unsupported sort key: {sort}")
+        indexes = self._by_user.get(user_id)
+        if not indexes:
+            return []
+        index = indexes[sort]
+        if after is None:
+            keys = index.irange(reverse=descending)
+        elif descending:
+            keys = index.irange(upper=_sort_key(*after), inclusive=(True, False), reverse=True)
+        else:
+            keys = index.irange(lower=_sort_key(*after), inclusive=(False, True))
+        try:
+            return [self._movies[key[-1]] for key in islice(keys, limit)]
+        except TypeError as e: # A cursor value of another type than the column's
+            logging.warning(f"Invalid cursor {after!r} for sort '{sort}': {e}")
+            return []
+
+    def get_movies_for_user(self, user_id, limit=None, after=None, sort='title', descending=False):
+        """Movies ordered by ``sort`` then ID; ``after`` is a ``(value, id)`` keyset cursor."""
+        with self._lock:
+            return self._movie_page(user_id, limit, after, sort, descending)
+
+    def get_movie_summaries_for_user(self, user_id, limit=None, after=None, sort='title', descending=False):
+        with self._lock:
+            movies = self._movie_page(user_id, limit, after, sort, descending)
+        return [MovieSummary(m.id, m.user_id, m.title, m.director, m.year, m.rating, m.poster) for m in movies]
+
+    def iter_movies_for_user(self, user_id, fetch_size=1000):
+        """Streams a user's movies by title, taking the lock once per ``fetch_size`` rows."""
+        after = None
+        while True:
+            page = self.get_movies_for_user(user_id, limit=fetch_size, after=after)
+            yield from page
+            if len(page) < fetch_size:
+                return
+            after = (page[-1].title, page[-1].id)
+
+    def get_movie_by_id(self, movie_id):
+        return self._movies.get(movie_id)
+
+    def get_movie_with_user(self, movie_id):
+        with self._lock:
+            movie = self._movies.get(movie_id)
+            if movie is None:
+                return None, None
+            return movie, self._users.get(movie.user_id)
+
+    def add_movie(self, user_id, title, director, year, plot, poster, rating, imdb_id=None):
+        with self._lock:
+            if user_id not in self._users:
+                logging.error(f"Cannot add movie '{title}': user ID {user_id} does not exist.")
+                return False
+            movie = self._new_movie(user_id, title, director, year, plot, poster, rating, imdb_id)
+        logging.info(f"Added movie '{title}' (ID: {movie.id}) for user ID {user_id}")
+        return True
+
+    def add_movies_bulk(self, user_id, rows):
+        rows = list(rows)
+        if not rows:
+            return 0
+        with self._lock:
+            if user_id not in self._users:
+                logging.error(f"Cannot bulk-add movies: user ID {user_id} does not exist.")
+                return None
+            for row in rows:
+                self._new_movie(user_id, *row[:6], imdb_id=row[6] if len(row) > 6 else None)
+        logging.info(f"Bulk-added {len(rows)} movies for user ID {user_id}")
+        return len(rows)
+
+    def update_movie(self, movie_id, title, director, year, plot, poster, rating):
+        with self._lock:
+            movie = self._movies.get(movie_id)
+            if movie is None:
+                logging.warning(f"Attempted to update movie ID {movie_id}, but no matching record found.")
+                return False
+            self._store_movie(movie._replace(title=title, director=director, year=year, plot=plot,
+                                             poster=poster, rating=rating))
+        logging.info(f"Updated movie ID {movie_id} with title: {title}")
+        return True
+
+    def delete_movie(self, movie_id):
+        with self._lock:
+            if movie_id not in self._movies:
+                logging.warning(f"Attempted to delete movie ID {movie_id}, but no matching record found.")
+                return False
+            self._drop_movie(movie_id)
+        logging.info(f"Deleted movie ID: {movie_id}")
+        return True
+
+    def _owned(self, user_id, movie_id):
+        movie = self._movies.get(movie_id)
+        return movie if movie is not None and movie.user_id == user_id else None
+
+    def delete_movies(self, user_id, movie_ids):
+        deleted = 0
+        with self._lock:
+            for movie_id in movie_ids:
+                if self._owned(user_id, movie_id):
+                    self._drop_movie(movie_id)
+                    deleted += 1
+        return deleted
+
+    def update_movies(self, user_id, movie_ids, fields):
+        unknown = set(fields) - set(BATCH_UPDATE_FIELDS)
+        if unknown:
+            raise ValueError(f"Fields not allowed in batch updates: {sorted(unknown)}")
+        if not fields:
+            return 0
+        updated = 0
+        with self._lock:
+            for movie_id in movie_ids:
+                movie = self._owned(user_id, movie_id)
+                if movie:
+                    self._store_movie(movie._replace(**fields))
+                    updated += 1
+        return updated
+
+    def move_movies(self, user_id, movie_ids, target_user_id):
+        with self._lock:
+            owned = [movie_id for movie_id in dict.fromkeys(movie_ids) if self._owned(user_id, movie_id)]
+            if not owned:
+                return 0
+            if target_user_id not in self._users:
+                logging.error(f"Cannot move movies to user ID {target_user_id}: user does not exist.")
+                return None
+            for movie_id in owned:
+                self._store_movie(self._movies[movie_id]._replace(user_id=target_user_id))
+                for job_id in self._jobs_by_movie.get(movie_id, ()):
+                    self._jobs[job_id]['user_id'] = target_user_id
+        logging.info(f"Moved {len(owned)} movies from user ID {user_id} to user ID {target_user_id}")
+        return len(owned)
+
+    def get_movie_titles(self):
+        with self._lock:
+            titles = [movie.title for movie in self._movies.values()]
+        return sorted(titles, key=str.lower)
+
+    def search_movies(self, query, user_id=None, limit=20, offset=0):
+        """
+        Matches every query word (the last as a prefix) in title, director or plot.
+
+        Ranked by term counts weighted like the SQLite bm25 columns (10/5/1),
+        then ID; an approximation of bm25 that ignores document length.
+        """
+        terms = [token for word in re.findall(r'\w+', query or '') for token in _tokens(word)]
+        if not terms:
+            return []
+        with self._lock:
+            candidates = [self._postings.get(term, {}) for term in terms[:-1]]
+            prefix = terms[-1]
+            matches = {}
+            for token in self._vocabulary.irange(lower=prefix):
+                if not token.startswith(prefix):
+                    break
+                for movie_id, weight in self._postings[token].items():
+                    matches[movie_id] = matches.get(movie_id, 0.0) + weight
+            candidates.append(matches)
+            candidates.sort(key=len)
+            scores = {}
+            for movie_id in candidates[0]:
+                if all(movie_id in postings for postings in candidates[1:]):
+                    movie = self._movies[movie_id]
+                    if user_id is None or movie.user_id == user_id:
+                        scores[movie_id] = sum(postings[movie_id] for postings in candidates)
+            ranked = sorted(scores, key=lambda movie_id: (-scores[movie_id], movie_id))[offset:offset + limit]
+            return [SearchHit(*self._movies[movie_id], self._users[self._movies[movie_id].user_id].username)
+                    for movie_id in ranked]
+
+    # --- Statistics and catalog ---
+    def _read_stats(self, key, top_directors):
+        stats = self._stats.get(key)
+        if stats is None:
+            return {'movie_count': 0, 'rated_count': 0, 'average_rating': None, 'decades': [], 'top_directors': []}
+        movie_count, rated_count, rating_sum, decades, directors = stats
+        return {
+            'movie_count': movie_count,
+            'rated_count': rated_count,
+            'average_rating': round(rating_sum / rated_count, 2) if rated_count else None,
+            'decades': sorted(decades.items()),
+            'top_directors': heapq.nsmallest(top_directors, directors.items(), key=lambda item: (-item[1], item[0])),
+        }
+
+    def get_user_stats(self, user_id, top_directors=5):
+        with self._lock:
+            return self._read_stats(user_id, top_directors)
+
+    def get_global_stats(self, top_directors=5):
+        return self.get_user_stats(ALL_USERS, top_directors)
+
+    def get_user_stat_totals(self, user_ids):
+        totals = {}
+        with self._lock:
+            for user_id in user_ids:
+                stats = self._stats.get(user_id)
+                if stats and stats[0] > 0:
+                    totals[user_id] = {'movie_count': stats[0],
+                                       'average_rating': round(stats[2] / stats[1], 2) if stats[1] else None}
+        return totals
+
+    def check_stats_consistency(self, repair=False):
+        """Recomputes the statistics from the movies and diffs them; ``repair`` adopts the recomputation."""
+        with self._lock:
+            stored = self._stats
+            self._stats = {ALL_USERS: [0, 0, 0.0, Counter(), Counter()]}
+            for movie in self._movies.values():
+                self._count_movie(movie, 1)
+            expected = self._stats
+            if not repair:
+                self._stats = stored
+            else:
+                for scope in list(self._versions):
+                    self._touch(scope, everyone=False)
+        differences = []
+        for key in sorted(expected.keys() | stored.keys()):
+            want = expected.get(key, [0, 0, 0.0, Counter(), Counter()])
+            have = stored.get(key, [0, 0, 0.0, Counter(), Counter()])
+            if want[:2] != have[:2] or abs(want[2] - have[2]) > RATING_TOLERANCE:
+                differences.append(f"user_stats(user_id={key}): stored {tuple(have[:3])}, expected {tuple(want[:3])}")
+            for table, index in (('user_decade_stats', 3), ('user_director_stats', 4)):
+                for value in sorted(want[index].keys() | have[index].keys(), key=repr):
+                    if want[index].get(value) != have[index].get(value):
+                        differences.append(f"{table}(user_id={key}, {value!r}): stored {have[index].get(value)}, "
+                                           f"expected {want[index].get(value)}")
+        if differences:
+            action = "rebuilt" if repair else "not repaired"
+            logging.warning(f"Statistics summaries had {len(differences)} inconsistent rows ({action}).")
+        return differences
+
+    def get_content_version(self, user_id):
+        return self._versions.get(user_id, (0, 0))
+
+    def backfill_catalog(self, parse_movie_data=None, batch_size=500, pause=0.0):
+        """Nothing to backfill: movies are linked to the catalog when they are added."""
+        return {'scanned': 0, 'linked': 0}
+
+    def prune_catalog(self):
+        with self._lock:
+            used = set(self._movie_imdb.values())
+            unused = [imdb_id for imdb_id in self._catalog if imdb_id not in used]
+            for imdb_id in unused:
+                del self._catalog[imdb_id]
+        return len(unused)
+
+    def get_catalog_links(self, user_id):
+        with self._lock:
+            return {movie_id: (imdb_id,) + self._catalog[imdb_id] for movie_id, imdb_id in self._movie_imdb.items()
+                    if self._movies[movie_id].user_id == user_id}
+
+    # --- Background OMDb fetch jobs ---
+    def create_fetch_job(self, user_id, title):
+        with self._lock:
+            if user_id not in self._users:
+                logging.error(f"Cannot queue fetch job for '{title}': user ID {user_id} does not exist.")
+                return None
+            movie = self._new_movie(user_id, title, None, None, None, None, None)
+            now = _now()
+            job = {'id': self._next_id('fetch_jobs'), 'movie_id': movie.id, 'user_id': user_id, 'title': title,
+                   'status': 'pending', 'error': None, 'created_at': now, 'updated_at': now}
+            self._jobs[job['id']] = job
+            self._jobs_by_movie.setdefault(movie.id, set()).add(job['id'])
+            self._open_jobs.add(job['id'])
+        logging.info(f"Queued OMDb fetch job {job['id']} for '{title}' (movie ID {movie.id})")
+        return {'movie_id': movie.id, 'job_id': job['id']}
+
+    def get_fetch_job(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def get_fetch_jobs_for_user(self, user_id):
+        with self._lock:
+            jobs = sorted(job_id for job_id in self._open_jobs if self._jobs[job_id]['user_id'] == user_id)
+            return {self._jobs[job_id]['movie_id']: dict(self._jobs[job_id]) for job_id in jobs}
+
+    def get_unfinished_fetch_jobs(self):
+        with self._lock:
+            return [dict(self._jobs[job_id]) for job_id in sorted(self._open_jobs)
+                    if self._jobs[job_id]['status'] in ('pending', 'running')]
+
+    def claim_fetch_job(self, job_id, lease=300):
+        stale = (datetime.now(timezone.utc) - timedelta(seconds=lease)).strftime('%Y-%m-%d %H:%M:%S')
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or not (job['status'] == 'pending'
+                                   or (job['status'] == 'running' and job['updated_at'] <= stale)):
+                return False
+            return self._set_job_status(job_id, 'running', job['error'])
+
+    def _set_job_status(self, job_id, status, error):
+        job = self._jobs.get(job_id)
+        if job is None:
+            return False
+        job.update(status=status, error=error, updated_at=_now())
+        self._touch(job['user_id'], everyone=False)
+        if status == 'done':
+            self._open_jobs.discard(job_id)
+        else:
+            self._open_jobs.add(job_id)
+        return True
+
+    def set_fetch_job_status(self, job_id, status, error=None):
+        with self._lock:
+            found = self._set_job_status(job_id, status, error)
+        if status == 'failed':
+            logging.warning(f"Fetch job {job_id} failed: {error}")
+        return found
+
+    def complete_fetch_job(self, job_id, movie_id, fields):
+        with self._lock:
+            movie = self._movies.get(movie_id)
+            if movie is not None:
+                self._store_movie(movie._replace(title=fields['title'], director=fields['director'],
+                                                 year=fields['year'], plot=fields['plot'],
+                                                 poster=fields['poster'], rating=fields['rating']),
+                                  fields.get('imdb_id'))
+            self._set_job_status(job_id, 'done', None)
+        if movie is None:
+            logging.warning(f"Fetch job {job_id} finished, but movie ID {movie_id} was deleted meanwhile.")
+        return True
+
+    # --- Snapshots ---
+    def save_snapshot(self, path=None):
+        """
+        Writes every user, movie, catalog entry and fetch job to ``path``
+        (default ``snapshot_path``) as JSON, atomically via a rename.
+
+        Returns:
+            str: The path written, or None on error.
+        """
+        path = path or self.snapshot_path
+        with self._lock:
+            data = {
+                'version': SNAPSHOT_VERSION,
+                'next_ids': dict(self._next_ids),
+                'users': list(self._users.values()),
+                'movies': [list(movie) + [self._movie_imdb.get(movie.id)] for movie in self._movies.values()],
+                'catalog': dict(self._catalog),
+                'fetch_jobs': [dict(job) for job in self._jobs.values()],
+            }
+        tmp = None
+        try:
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix='.snapshot-')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(tmp, path)
+        except (OSError, TypeError, ValueError) as e:
+            logging.exception(f"Error writing in-memory snapshot to {path}: {e}")
+            if tmp and os.path.exists(tmp):
+                os.unlink(tmp)
+            return None
+        logging.info(f"Wrote snapshot of {len(data['users'])} users and {len(data['movies'])} movies to {path}")
+        return path
+
+    def load_snapshot(self, path):
+        """
+        Replaces all data with the snapshot at ``path``.
+
+        Raises:
+            ValueError: If the file is not a snapshot this version can read.
+        """
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or data.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"{path} is not a version {SNAPSHOT_VERSION} MovieWeb snapshot.")
+        with self._lock:
+            self._reset()
+            self._next_ids.update(data['next_ids'])
+            for user_id, username in data['users']:
+                self._users[user_id] = User(user_id, username)
+                self._user_ids[username] = user_id
+                self._touch(user_id)
+            self._usernames = SortedIndex(self._user_ids)
+            self._catalog = {imdb_id: tuple(entry) for imdb_id, entry in data['catalog'].items()}
+            for row in data['movies']:
+                self._store_movie(Movie(*row[:8]), row[8])
+            for job in data['fetch_jobs']:
+                self._jobs[job['id']] = job
+                self._jobs_by_movie.setdefault(job['movie_id'], set()).add(job['id'])
+                if job['status'] != 'done':
+                    self._open_jobs.add(job['id'])
+        logging.info(f"Loaded snapshot of {len(self._users)} users and {len(self._movies)} movies from {path}")
+
+    @classmethod
+    def from_data_manager(cls, source, **kwargs):
+        """
+        Builds an in-memory copy of another backend (e.g. to serve as a hot
+        read tier or to write a snapshot), keeping all IDs and catalog links.
+        """
+        target = cls(**kwargs)
+        with target._lock:
+            for user in source.get_all_users():
+                target._users[user['id']] = User(user['id'], user['username'])
+                target._user_ids[user['username']] = user['id']
+                target._usernames.add(user['username'])
+                target._touch(user['id'])
+                links = source.get_catalog_links(user['id']) or {}
+                for imdb_id, plot, poster in links.values():
+                    target._catalog.setdefault(imdb_id, (plot, poster))
+                for movie in source.iter_movies_for_user(user['id']):
+                    target._store_movie(Movie(*movie), links.get(movie.id, (None,))[0])
+                for job in source.get_fetch_jobs_for_user(user['id']).values():
+                    target._jobs[job['id']] = dict(job)
+                    target._jobs_by_movie.setdefault(job['movie_id'], set()).add(job['id'])
+                    target._open_jobs.add(job['id'])
+            for table, records in (('users', target._users), ('movies', target._movies), ('fetch_jobs', target._jobs)):
+                target._next_ids[table] = max(records, default=0) + 1
+        return target
@@ -0,0 +1,291 @@
+import re
+import time
+import sqlite3
+import logging
+import threading
+from bisect import bisect_left
+from collections import deque
+
+# Upper bounds (seconds) for latency histograms; +Inf is implied.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_STATEMENT_TABLE = re.compile(r'\b(?:FROM|INTO|UPDATE|JOIN)\s+["\[]?(\w+)', re.IGNORECASE)
+
+
+def statement_label(sql):
+    """
+    Reduces a SQL statement to a low-cardinality label such as ``SELECT movies``.
+
+    Statements are grouped by leading keyword and first table, so literal
+    values and column lists never end up in metric labels.
+    """
+    words = sql.lstrip().split(None, 1)
+    if not words:
+        return 'EMPTY'
+    verb = words[0].upper()
+    match = _STATEMENT_TABLE.search(sql)
+    return f"{verb} {match.group(1)}" if match else verb
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """A monotonically increasing counter keyed by label values."""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues):
+        return self._values.get(labelvalues, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labelvalues, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """
+    A cumulative histogram keyed by label values.
+
+    Each observation costs one bisect and one locked list update, so it is
+    cheap enough to record every request and every SQL statement.
+    """
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labelvalues -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, *labelvalues):
+        series = self._series.get(labelvalues)
+        return sum(series[:-1]) if series else 0
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labelvalues, list(series)) for labelvalues, series in self._series.items())
+        for labelvalues, series in items:
+            cumulative = 0
+            for bound, hits in zip(self.buckets + (float('inf'),), series[:-1]):
+                cumulative += hits
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labelvalues, ('le', le))} {cumulative}")
+            labels = _format_labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metrics and renders them in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_gauge_collector(self, name, documentation, collect):
+        """
+        Registers a gauge computed at scrape time.
+
+        ``collect()`` returns a dict mapping a label value (or None for an
+        unlabelled gauge) to a number; labelled values use a ``stat`` label.
+        """
+        self._collectors.append((name, documentation, collect))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for name, documentation, collect in self._collectors:
+            try:
+                values = collect()
+            except Exception as e:
+                logging.warning(f"Metrics collector '{name}' failed: {e}")
+                continue
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} gauge")
+            for stat, value in sorted(values.items(), key=lambda item: str(item[0])):
+                labels = '' if stat is None else _format_labels(('stat',), (stat,))
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+class Instrumentation:
+    """
+    Latency instrumentation for requests, data-manager calls, SQL and OMDb.
+
+    Pass ``connection_factory`` to the connection pool and write queue to
+    time every statement; statements slower than ``slow_query_threshold``
+    seconds are logged with their ``EXPLAIN QUERY PLAN`` and kept in a
+    short in-memory log (see ``slow_queries``).
+    """
+
+    def __init__(self, registry=None, slow_query_threshold=0.1, slow_log_size=50):
+        self.registry = registry or MetricsRegistry()
+        self.slow_query_threshold = slow_query_threshold
+        self._slow_log = deque(maxlen=slow_log_size)
+        self.request_seconds = self.registry.histogram(
+            'movieweb_request_duration_seconds', 'HTTP request latency by endpoint.',
+            ('endpoint', 'method', 'status'))
+        self.call_seconds = self.registry.histogram(
+            'movieweb_data_manager_call_duration_seconds', 'Data manager method latency.', ('method',))
+        self.call_errors = self.registry.counter(
+            'movieweb_data_manager_call_errors_total', 'Data manager calls that raised.', ('method',))
+        self.statement_seconds = self.registry.histogram(
+            'movieweb_sql_statement_duration_seconds', 'SQL statement execution latency.', ('statement',))
+        self.slow_statements = self.registry.counter(
+            'movieweb_sql_slow_statements_total', 'SQL statements over the slow-query threshold.', ('statement',))
+        self.omdb_seconds = self.registry.histogram(
+            'movieweb_omdb_request_duration_seconds', 'Upstream OMDb request latency.', ('outcome',))
+        self.connection_factory = _timed_connection_class(self.observe_statement)
+
+    def observe_request(self, endpoint, method, status, seconds):
+        self.request_seconds.observe(seconds, endpoint, method, str(status))
+
+    def observe_call(self, method, seconds, failed=False):
+        self.call_seconds.observe(seconds, method)
+        if failed:
+            self.call_errors.inc(method)
+
+    def observe_omdb(self, outcome, seconds):
+        """Records one upstream OMDb request; outcome is e.g. 'ok', 'not_found' or 'error'."""
+        self.omdb_seconds.observe(seconds, outcome)
+
+    def observe_statement(self, conn, sql, params, seconds):
+        label = statement_label(sql)
+        self.statement_seconds.observe(seconds, label)
+        if seconds >= self.slow_query_threshold and not label.startswith(('EXPLAIN', 'COMMIT', 'BEGIN')):
+            self.slow_statements.inc(label)
+            self._record_slow_query(conn, sql, params, seconds)
+
+    def _record_slow_query(self, conn, sql, params, seconds):
+        """Captures the plan of a slow statement on the connection that ran it."""
+        plan = None
+        try:
+            rows = sqlite3.Connection.execute(conn, f"EXPLAIN QUERY PLAN {sql}", params or ()).fetchall()
+            plan = [row[3] for row in rows]
+        except (sqlite3.Error, ValueError) as e:
+            plan = [f"(plan unavailable: {e})"]
+        entry = {'sql': ' '.join(sql.split()), 'seconds': round(seconds, 6), 'plan': plan, 'at': time.time()}
+        self._slow_log.append(entry)
+        logging.warning(f"Slow query ({seconds * 1000:.1f} ms): {entry['sql']} | plan: {'; '.join(plan)}")
+
+    def slow_queries(self):
+        """Returns the most recent slow statements, newest last."""
+        return list(self._slow_log)
+
+    def render(self):
+        return self.registry.render()
+
+
+def _timed_connection_class(observe):
+    """Builds an sqlite3.Connection subclass whose cursors report statement timings to ``observe``."""
+
+    class TimedCursor(sqlite3.Cursor):
+        def execute(self, sql, parameters=()):
+            start = time.perf_counter()
+            try:
+                return super().execute(sql, parameters)
+            finally:
+                observe(self.connection, sql, parameters, time.perf_counter() - start)
+
+        def executemany(self, sql, seq_of_parameters):
+            if not isinstance(seq_of_parameters, (list, tuple)):
+                seq_of_parameters = list(seq_of_parameters)
+            start = time.perf_counter()
+            try:
+                return super().executemany(sql, seq_of_parameters)
+            finally:
+                first = seq_of_parameters[0] if seq_of_parameters else ()
+                observe(self.connection, sql, first, time.perf_counter() - start)
+
+    class TimedConnection(sqlite3.Connection):
+        def cursor(self, factory=TimedCursor):
+            return super().cursor(factory)
+
+        def execute(self, sql, parameters=()):
+            return self.cursor().execute(sql, parameters)
+
+        def executemany(self, sql, seq_of_parameters):
+            return self.cursor().executemany(sql, seq_of_parameters)
+
+    return TimedConnection
+
+
+class InstrumentedDataManager:
+    """
+    Times every public method call on a data manager.
+
+    Wraps ``SQLiteDataManager`` (or ``CachingDataManager``) and delegates
+    everything; for generator methods only the call that creates the
+    generator is timed.
+    """
+
+    def __init__(self, data_manager, instrumentation):
+        self.data_manager = data_manager
+        self.instrumentation = instrumentation
+
+    def __getattr__(self, name):
+        attr = getattr(self.data_manager, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+        observe = self.instrumentation.observe_call
+
+        def timed_call(*args, **kwargs):
+            start = time.perf_counter()
+            failed = True
+            try:
+                result = attr(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                observe(name, time.perf_counter() - start, failed)
+        timed_call.__name__ = name
+        timed_call.__doc__ = attr.__doc__
+        return timed_call
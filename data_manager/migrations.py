@@ -0,0 +1,361 @@
+"""
+Versioned schema migrations for the MovieWeb SQLite database.
+
+Each migration is a (version, description, steps) entry. ``steps`` is a
+sequence of SQL statements and/or callables taking the connection. The
+applied version is stored in the ``schema_version`` table, so a database
+that is already up to date costs a single query at startup.
+
+Usage:
+    python -m data_manager.migrations [DB_FILE] [--status]
+"""
+import sys
+import sqlite3
+import logging
+import argparse
+from datetime import datetime, timezone
+
+from data_manager import content_versions, user_stats
+
+
+MIGRATIONS = [
+    (1, "Create users and movies tables", (
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL UNIQUE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS movies (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            director TEXT,
+            year INTEGER,
+            plot TEXT,
+            poster TEXT,
+            rating REAL,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+        """,
+    )),
+    # Serves get_movies_for_user (WHERE user_id = ? ORDER BY title) without a
+    # sort, and the ON DELETE CASCADE lookup from users via its user_id prefix.
+    (2, "Index movies by (user_id, title)", (
+        "CREATE INDEX IF NOT EXISTS idx_movies_user_title ON movies (user_id, title)",
+    )),
+    (3, "Case-insensitive title index", (
+        "CREATE INDEX IF NOT EXISTS idx_movies_title_nocase ON movies (title COLLATE NOCASE)",
+    )),
+    # On-disk tier of the OMDb response cache; payload is NULL for "not found".
+    (4, "OMDb response cache table", (
+        """
+        CREATE TABLE IF NOT EXISTS omdb_cache (
+            title_key TEXT PRIMARY KEY,
+            payload TEXT,
+            expires_at REAL NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_omdb_cache_expires ON omdb_cache (expires_at)",
+    )),
+    # Persistent queue of background OMDb lookups for placeholder movies.
+    (5, "Background OMDb fetch jobs", (
+        """
+        CREATE TABLE IF NOT EXISTS fetch_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            movie_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            error TEXT,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (movie_id) REFERENCES movies(id) ON DELETE CASCADE
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_fetch_jobs_movie ON fetch_jobs (movie_id)",
+        "CREATE INDEX IF NOT EXISTS idx_fetch_jobs_user_status ON fetch_jobs (user_id, status)",
+        "CREATE INDEX IF NOT EXISTS idx_fetch_jobs_status ON fetch_jobs (status)",
+    )),
+    # Keyset pagination of a user's movies by year and by rating.
+    (6, "Index movies by (user_id, year) and (user_id, rating)", (
+        "CREATE INDEX IF NOT EXISTS idx_movies_user_year ON movies (user_id, year)",
+        "CREATE INDEX IF NOT EXISTS idx_movies_user_rating ON movies (user_id, rating)",
+    )),
+    # Full-text search over title/director/plot. External-content FTS5 table
+    # kept in sync by triggers; the update trigger only fires for indexed columns.
+    (7, "FTS5 search index over movies", (
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS movies_fts USING fts5(
+            title, director, plot,
+            content='movies', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS movies_fts_ai AFTER INSERT ON movies BEGIN
+            INSERT INTO movies_fts (rowid, title, director, plot)
+            VALUES (new.id, new.title, new.director, new.plot);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS movies_fts_ad AFTER DELETE ON movies BEGIN
+            INSERT INTO movies_fts (movies_fts, rowid, title, director, plot)
+            VALUES ('delete', old.id, old.title, old.director, old.plot);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS movies_fts_au AFTER UPDATE OF title, director, plot ON movies BEGIN
+            INSERT INTO movies_fts (movies_fts, rowid, title, director, plot)
+            VALUES ('delete', old.id, old.title, old.director, old.plot);
+            INSERT INTO movies_fts (rowid, title, director, plot)
+            VALUES (new.id, new.title, new.director, new.plot);
+        END
+        """,
+        "INSERT INTO movies_fts (movies_fts) VALUES ('rebuild')",
+    )),
+    # Per-table change counters bumped by triggers on every write, so any
+    # process can detect changes with one single-row read.
+    (8, "Change counters for read-cache invalidation", (
+        """
+        CREATE TABLE IF NOT EXISTS change_counter (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            users_version INTEGER NOT NULL DEFAULT 0,
+            movies_version INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        "INSERT OR IGNORE INTO change_counter (id) VALUES (1)",
+        """
+        CREATE TRIGGER IF NOT EXISTS change_counter_users_ai AFTER INSERT ON users BEGIN
+            UPDATE change_counter SET users_version = users_version + 1 WHERE id = 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS change_counter_users_au AFTER UPDATE ON users BEGIN
+            UPDATE change_counter SET users_version = users_version + 1 WHERE id = 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS change_counter_users_ad AFTER DELETE ON users BEGIN
+            UPDATE change_counter SET users_version = users_version + 1, movies_version = movies_version + 1 WHERE id = 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS change_counter_movies_ai AFTER INSERT ON movies BEGIN
+            UPDATE change_counter SET movies_version = movies_version + 1 WHERE id = 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS change_counter_movies_au AFTER UPDATE ON movies BEGIN
+            UPDATE change_counter SET movies_version = movies_version + 1 WHERE id = 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS change_counter_movies_ad AFTER DELETE ON movies BEGIN
+            UPDATE change_counter SET movies_version = movies_version + 1 WHERE id = 1;
+        END
+        """,
+    )),
+    # Covering index for the poster grid: get_movie_summaries_for_user is served
+    # from the index alone. It has the same (user_id, title) prefix, so the
+    # older index becomes redundant.
+    (9, "Covering index for movie summaries", (
+        """
+        CREATE INDEX IF NOT EXISTS idx_movies_user_summary
+        ON movies (user_id, title, id, director, year, rating, poster)
+        """,
+        "DROP INDEX IF EXISTS idx_movies_user_title",
+    )),
+    # Per-user and global statistics maintained by triggers (see user_stats),
+    # backfilled from the existing movies.
+    (10, "Materialized per-user statistics", user_stats.SCHEMA + (user_stats.rebuild,)),
+    # Shared catalog of OMDb films keyed by IMDb ID. A movies row linked to a
+    # catalog entry stores plot/poster only when the user changed them (NULL
+    # inherits); reads go through the movie_details view, which is also the
+    # FTS content source. Existing rows are linked online by
+    # SQLiteDataManager.backfill_catalog in small batches.
+    (11, "Shared movie catalog", (
+        """
+        CREATE TABLE IF NOT EXISTS catalog (
+            id INTEGER PRIMARY KEY,
+            imdb_id TEXT NOT NULL UNIQUE,
+            title TEXT NOT NULL,
+            director TEXT,
+            year INTEGER,
+            plot TEXT,
+            poster TEXT
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_catalog_title ON catalog (title COLLATE NOCASE, year)",
+        lambda conn: _add_column(conn, 'movies', 'catalog_id', 'INTEGER REFERENCES catalog(id)'),
+        "CREATE INDEX IF NOT EXISTS idx_movies_catalog ON movies (catalog_id) WHERE catalog_id IS NOT NULL",
+        # The grid query needs catalog_id to stay index-only on the movies side.
+        "DROP INDEX IF EXISTS idx_movies_user_summary",
+        """
+        CREATE INDEX IF NOT EXISTS idx_movies_user_summary
+        ON movies (user_id, title, id, director, year, rating, poster, catalog_id)
+        """,
+        """
+        CREATE VIEW IF NOT EXISTS movie_details AS
+        SELECT m.id, m.user_id, m.title, m.director, m.year,
+               COALESCE(m.plot, c.plot) AS plot, COALESCE(m.poster, c.poster) AS poster, m.rating
+        FROM movies m LEFT JOIN catalog c ON c.id = m.catalog_id
+        """,
+        "DROP TRIGGER IF EXISTS movies_fts_ai",
+        "DROP TRIGGER IF EXISTS movies_fts_ad",
+        "DROP TRIGGER IF EXISTS movies_fts_au",
+        "DROP TABLE IF EXISTS movies_fts",
+        """
+        CREATE VIRTUAL TABLE movies_fts USING fts5(
+            title, director, plot,
+            content='movie_details', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )
+        """,
+        # Catalog rows are never updated, so the plot indexed on insert is
+        # still the one looked up when the entry is deleted.
+        """
+        CREATE TRIGGER movies_fts_ai AFTER INSERT ON movies BEGIN
+            INSERT INTO movies_fts (rowid, title, director, plot)
+            VALUES (new.id, new.title, new.director,
+                    COALESCE(new.plot, (SELECT plot FROM catalog WHERE id = new.catalog_id)));
+        END
+        """,
+        """
+        CREATE TRIGGER movies_fts_ad AFTER DELETE ON movies BEGIN
+            INSERT INTO movies_fts (movies_fts, rowid, title, director, plot)
+            VALUES ('delete', old.id, old.title, old.director,
+                    COALESCE(old.plot, (SELECT plot FROM catalog WHERE id = old.catalog_id)));
+        END
+        """,
+        """
+        CREATE TRIGGER movies_fts_au AFTER UPDATE OF title, director, plot, catalog_id ON movies BEGIN
+            INSERT INTO movies_fts (movies_fts, rowid, title, director, plot)
+            VALUES ('delete', old.id, old.title, old.director,
+                    COALESCE(old.plot, (SELECT plot FROM catalog WHERE id = old.catalog_id)));
+            INSERT INTO movies_fts (rowid, title, director, plot)
+            VALUES (new.id, new.title, new.director,
+                    COALESCE(new.plot, (SELECT plot FROM catalog WHERE id = new.catalog_id)));
+        END
+        """,
+        "INSERT INTO movies_fts (movies_fts) VALUES ('rebuild')",
+    )),
+    # Per-user page versions behind the rendered-page cache and its ETags
+    # (see content_versions).
+    (12, "Per-user content versions", content_versions.SCHEMA),
+    # Unfinished fetch jobs in ID order, for resuming them at startup without
+    # sorting; done and failed jobs (nearly all rows) stay out of the index.
+    (13, "Partial index over unfinished fetch jobs", (
+        """
+        CREATE INDEX IF NOT EXISTS idx_fetch_jobs_unfinished
+        ON fetch_jobs (id) WHERE status IN ('pending', 'running')
+        """,
+    )),
+]
+
+
+def _add_column(conn, table, column, definition):
+    """ALTER TABLE ADD COLUMN that is a no-op when the column already exists."""
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+    if column not in columns:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def _ensure_version_table(conn):
+    """Creates the schema_version bookkeeping table if needed."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    """)
+    conn.commit()
+
+
+def current_version(conn):
+    """Returns the highest applied migration version (0 for a fresh database)."""
+    _ensure_version_table(conn)
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def latest_version():
+    """Returns the version the code expects the schema to be at."""
+    return MIGRATIONS[-1][0]
+
+
+def pending_migrations(conn):
+    """Returns the migrations not yet applied, in order."""
+    version = current_version(conn)
+    return [m for m in MIGRATIONS if m[0] > version]
+
+
+def apply_migrations(conn, target=None):
+    """
+    Applies all pending migrations up to ``target`` (default: latest).
+
+    Every migration runs in its own IMMEDIATE transaction and re-checks the
+    stored version first, so concurrent processes never apply a step twice.
+
+    Returns:
+        list: Versions applied by this call.
+    """
+    applied = []
+    for version, description, steps in pending_migrations(conn):
+        if target is not None and version > target:
+            break
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT 1 FROM schema_version WHERE version = ?", (version,)).fetchone()
+            if row:
+                conn.rollback()
+                continue
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(
+                "INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                (version, description, datetime.now(timezone.utc).isoformat()),
+            )
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            logging.exception(f"Migration {version} ('{description}') failed; rolled back.")
+            raise
+        logging.info(f"Applied migration {version}: {description}")
+        applied.append(version)
+    return applied
+
+
+def main(argv=None):
+    """CLI entry point: apply pending migrations or print their status."""
+    parser = argparse.ArgumentParser(description="Apply MovieWeb database migrations.")
+    parser.add_argument('db_file', nargs='?', default='movies.db', help="SQLite database file (default: movies.db)")
+    parser.add_argument('--status', action='store_true', help="Only show the current and pending versions.")
+    parser.add_argument('--target', type=int, default=None, help="Stop after this version.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    conn = sqlite3.connect(args.db_file)
+    conn.execute("PRAGMA foreign_keys = ON")
+    try:
+        if args.status:
+            print(f"Current version: {current_version(conn)} (latest: {latest_version()})")
+            for version, description, _ in pending_migrations(conn):
+                print(f"  pending {version}: {description}")
+            return 0
+        applied = apply_migrations(conn, target=args.target)
+        print(f"Applied {len(applied)} migration(s); schema at version {current_version(conn)}.")
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,191 @@
+import re
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+
+
+def normalize_title(title):
+    """Normalizes a title into a cache key (case-folded, single-spaced)."""
+    return re.sub(r'\s+', ' ', (title or '').strip()).casefold()
+
+
+class OMDbCache:
+    """
+    Two-tier cache for OMDb lookups keyed on the normalized title.
+
+    An in-process LRU sits in front of the ``omdb_cache`` table so that
+    repeated lookups are answered from memory and survive restarts via
+    SQLite. "Movie not found" answers are cached too, with their own TTL.
+    Without a ``connection_factory`` only the in-memory tier is used.
+    """
+
+    def __init__(self, connection_factory, execute_write, max_entries=1024,
+                 ttl=7 * 24 * 3600, negative_ttl=24 * 3600, clock=time.time):
+        """
+        Args:
+            connection_factory: Callable returning a connection context manager
+                                (None for a memory-only cache).
+            execute_write: Callable ``(sql, params)`` that commits a write.
+            max_entries (int): Capacity of the in-memory LRU tier.
+            ttl (float): Seconds a successful lookup stays valid.
+            negative_ttl (float): Seconds a "not found" answer stays valid.
+            clock: Time source, injectable for tests.
+        """
+        self._connection = connection_factory
+        self._execute_write = execute_write
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._clock = clock
+        self._memory = OrderedDict()  # key -> (payload or None, expires_at)
+        self._lock = threading.Lock()
+        self._puts_since_purge = 0
+        self.counters = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'negative_hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expired': 0,
+        }
+
+    def _remember(self, key, payload, expires_at):
+        """Stores an entry in the LRU tier, evicting the oldest if full."""
+        with self._lock:
+            self._memory[key] = (payload, expires_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self.counters['evictions'] += 1
+
+    def get(self, title):
+        """
+        Looks up a title.
+
+        Returns:
+            tuple: ``(hit, payload)``. ``payload`` is the OMDb dict for a
+            positive hit and None for a cached "not found". ``(False, None)``
+            means the caller must ask OMDb.
+        """
+        key = normalize_title(title)
+        now = self._clock()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                payload, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.counters['memory_hits'] += 1
+                    if payload is None:
+                        self.counters['negative_hits'] += 1
+                    return True, (dict(payload) if payload is not None else None)
+                del self._memory[key]
+                self.counters['expired'] += 1
+
+        row = None
+        if self._connection is not None:
+            try:
+                with self._connection() as conn:
+                    row = conn.execute(
+                        "SELECT payload, expires_at FROM omdb_cache WHERE title_key = ?", (key,)
+                    ).fetchone()
+            except sqlite3.Error as e:
+                logging.warning(f"OMDb cache read failed for '{key}': {e}")
+
+        if row is not None and row['expires_at'] > now:
+            payload = json.loads(row['payload']) if row['payload'] is not None else None
+            self._remember(key, payload, row['expires_at'])
+            with self._lock:
+                self.counters['disk_hits'] += 1
+                if payload is None:
+                    self.counters['negative_hits'] += 1
+            return True, (dict(payload) if payload is not None else None)
+
+        with self._lock:
+            if row is not None:
+                self.counters['expired'] += 1
+            self.counters['misses'] += 1
+        return False, None
+
+    def _store(self, title, payload, ttl):
+        """Writes an entry to both tiers."""
+        key = normalize_title(title)
+        expires_at = self._clock() + ttl
+        self._remember(key, payload, expires_at)
+        if self._execute_write is None:
+            return
+        try:
+            self._execute_write(
+                "INSERT OR REPLACE INTO omdb_cache (title_key, payload, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(payload) if payload is not None else None, expires_at),
+            )
+        except sqlite3.Error as e:
+            logging.warning(f"OMDb cache write failed for '{key}': {e}")
+            return
+        self._puts_since_purge += 1
+        if self._puts_since_purge >= 100:
+            self.purge_expired()
+
+    def put(self, title, payload):
+        """Caches a successful OMDb response."""
+        self._store(title, payload, self.ttl)
+
+    def put_not_found(self, title):
+        """Caches a "Movie not found!" answer."""
+        self._store(title, None, self.negative_ttl)
+
+    def purge_expired(self):
+        """Deletes expired rows from the on-disk tier; returns how many."""
+        self._puts_since_purge = 0
+        if self._execute_write is None:
+            return 0
+        try:
+            rowcount, _ = self._execute_write("DELETE FROM omdb_cache WHERE expires_at <= ?", (self._clock(),))
+        except sqlite3.Error as e:
+            logging.warning(f"OMDb cache purge failed: {e}")
+            return 0
+        with self._lock:
+            self.counters['expired'] += rowcount
+        return rowcount
+
+    def titles(self):
+        """
+        Returns the titles of the cached (unexpired) OMDb results, from the
+        disk tier when there is one, else from memory.
+        """
+        now = self._clock()
+        if self._connection is None:
+            with self._lock:
+                payloads = [payload for payload, expires_at in self._memory.values()
+                            if payload is not None and expires_at > now]
+        else:
+            try:
+                with self._connection() as conn:
+                    rows = conn.execute(
+                        "SELECT payload FROM omdb_cache WHERE payload IS NOT NULL AND expires_at > ?", (now,)
+                    ).fetchall()
+            except sqlite3.Error as e:
+                logging.warning(f"OMDb cache title scan failed: {e}")
+                return []
+            payloads = [json.loads(row['payload']) for row in rows]
+        return [payload['Title'] for payload in payloads if payload.get('Title')]
+
+    def clear(self):
+        """Empties both tiers."""
+        with self._lock:
+            self._memory.clear()
+        if self._execute_write is not None:
+            self._execute_write("DELETE FROM omdb_cache")
+
+    def stats(self):
+        """Returns hit/miss counters plus the current LRU size."""
+        with self._lock:
+            stats = dict(self.counters)
+            stats['memory_entries'] = len(self._memory)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        return stats
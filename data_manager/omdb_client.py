@@ -0,0 +1,268 @@
+import json
+import time
+import logging
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from requests.adapters import HTTPAdapter
+
+from data_manager.omdb_cache import normalize_title
+
+DEFAULT_OMDB_URL = "http://www.omdbapi.com/"
+
+
+# Custom Exception for OMDb Errors
+class OMDbException(Exception):
+    """Custom exception for OMDb API related errors."""
+    pass
+
+
+class OMDbUnavailable(OMDbException):
+    """OMDb is failing or too slow."""
+    pass
+
+
+class OMDbCircuitOpen(OMDbUnavailable):
+    """Raised without a request while the circuit breaker is open."""
+    pass
+
+
+class CircuitBreaker:
+    """
+    Stops calling an upstream that keeps failing.
+
+    Closed: calls go through; ``failure_threshold`` consecutive failures
+    open the circuit. Open: calls are refused until ``reset_after``
+    seconds passed. Half-open: a single probe call is let through; its
+    success closes the circuit, its failure opens it again.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_after=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self._clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+        self.counters = {'opened': 0, 'rejected': 0}
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_after:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self):
+        """Whether a call may go upstream now; refused calls are counted."""
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_after:
+                self._state, self._probing = self.HALF_OPEN, False
+            if self._state == self.CLOSED or (self._state == self.HALF_OPEN and not self._probing):
+                self._probing = self._state == self.HALF_OPEN
+                return True
+            self.counters['rejected'] += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state, self._failures, self._probing = self.CLOSED, 0, False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.counters['opened'] += 1
+                    logging.warning(f"OMDb circuit opened after {self._failures} failure(s); "
+                                    f"retrying in {self.reset_after:.0f}s.")
+                self._state, self._opened_at, self._probing = self.OPEN, self._clock(), False
+
+
+class _Call:
+    """One upstream lookup shared by every caller asking for the same title meanwhile."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class OMDbClient:
+    """
+    Title lookups against the OMDb API.
+
+    Requests reuse connections from a pooled ``requests.Session`` and must
+    answer within a latency budget: they run on a small thread pool that
+    the caller waits on for at most the budget, and the body is read
+    against the same deadline so a trickling server does not keep a
+    thread busy. Concurrent lookups of one title share a single upstream
+    request. Timeouts, connection errors, 429 and 5xx
+    answers count against a ``CircuitBreaker``; while it is open lookups
+    fail at once with ``OMDbUnavailable`` instead of queueing on a dead
+    upstream.
+    """
+
+    def __init__(self, api_key, base_url=DEFAULT_OMDB_URL, budget=5.0, connect_timeout=3.05, pool_size=10,
+                 session=None, breaker=None, instrumentation=None):
+        """
+        Args:
+            api_key (str): OMDb API key (None disables lookups).
+            base_url (str): OMDb endpoint (overridable for a local stand-in server).
+            budget (float): Seconds a lookup may take, unless given per call.
+            connect_timeout (float): Seconds to wait for a connection (capped by the budget).
+            pool_size (int): Keep-alive connections kept to OMDb, and concurrent requests.
+            session (requests.Session): Optional session to reuse.
+            breaker (CircuitBreaker): Optional breaker; defaults to 5 failures / 30 seconds.
+            instrumentation (Instrumentation): Optional OMDb latency recorder.
+        """
+        self.api_key = api_key
+        self.base_url = base_url
+        self.budget = budget
+        self.connect_timeout = connect_timeout
+        self.breaker = breaker or CircuitBreaker()
+        self.instrumentation = instrumentation
+        self.pool_size = pool_size
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._inflight = {}  # normalized title -> _Call
+        self._executor = None
+        self._lock = threading.Lock()
+        self.counters = {'requests': 0, 'coalesced': 0}
+
+    def lookup(self, title, budget=None):
+        """
+        Fetches the OMDb answer for ``title``.
+
+        Returns:
+            dict: The decoded response, including ``{'Response': 'False', ...}``
+            answers such as "Movie not found!".
+
+        Raises:
+            OMDbCircuitOpen: The circuit is open; no request was made.
+            OMDbUnavailable: The request timed out or failed.
+            OMDbException: OMDb answered with another HTTP error or invalid JSON.
+        """
+        budget = self.budget if budget is None else budget
+        key = normalize_title(title)
+        with self._lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call()
+            else:
+                self.counters['coalesced'] += 1
+        if not leader:
+            if not call.done.wait(budget):
+                raise OMDbUnavailable("Request to OMDb API timed out.")
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = self._request(title, budget)
+            return call.result
+        except Exception as e:
+            call.error = e if isinstance(e, OMDbException) else OMDbException(f"OMDb lookup failed: {e}")
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            call.done.set()
+
+    def _request(self, title, budget):
+        if not self.breaker.allow():
+            raise OMDbCircuitOpen("OMDb API is unavailable; not retrying yet.")
+        with self._lock:
+            self.counters['requests'] += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="omdb-request")
+            executor = self._executor
+        logging.info(f"Fetching data from OMDb for title: {title}")
+        started = time.perf_counter()
+        deadline = time.monotonic() + budget
+        try:
+            future = executor.submit(self._get, title, budget, deadline)
+            try:
+                movie_data = future.result(budget)
+            except FutureTimeoutError:
+                future.cancel() # Still queued: never sent. Running: ends at its deadline.
+                raise requests.exceptions.Timeout(f"no answer within {budget}s")
+        except requests.exceptions.Timeout:
+            self._failed('timeout', started)
+            logging.error(f"Timeout connecting to OMDb API for title '{title}'.")
+            raise OMDbUnavailable("Request to OMDb API timed out.")
+        except requests.exceptions.HTTPError as e:
+            status = e.response.status_code if e.response is not None else None
+            if status == 429 or (status or 0) >= 500:
+                self._failed('error', started)
+                logging.error(f"OMDb API unavailable for title '{title}': {e}")
+                raise OMDbUnavailable(f"OMDb API unavailable: HTTP {status}")
+            self.breaker.record_success() # OMDb is up; the request itself was refused
+            self._observe('api_error', started)
+            logging.error(f"OMDb API HTTP error for title '{title}': {e}")
+            raise OMDbException(f"OMDb API Error: {e}")
+        except requests.exceptions.RequestException as e:
+            self._failed('error', started)
+            logging.error(f"Network or HTTP error fetching OMDb data: {e}")
+            raise OMDbUnavailable(f"Failed to connect to OMDb API: {e}")
+        except ValueError as e:
+            self._failed('error', started)
+            logging.error(f"Invalid JSON from OMDb API for title '{title}': {e}")
+            raise OMDbException(f"Invalid response from OMDb API: {e}")
+        except Exception as e:
+            self._failed('error', started) # Also ends a half-open probe, which would otherwise block the breaker
+            logging.exception(f"Unexpected error fetching OMDb data for title '{title}': {e}")
+            raise
+        self.breaker.record_success()
+        if movie_data.get('Response') == 'True':
+            self._observe('ok', started)
+        elif movie_data.get('Error') == 'Movie not found!':
+            self._observe('not_found', started)
+        else:
+            self._observe('api_error', started)
+        return movie_data
+
+    def _get(self, title, budget, deadline):
+        """Performs the HTTP request, reading the body until ``deadline`` (monotonic) at the latest."""
+        with self.session.get(self.base_url, params={'t': title, 'apikey': self.api_key}, stream=True,
+                              timeout=(min(self.connect_timeout, budget), budget)) as response:
+            response.raise_for_status()
+            body = bytearray()
+            for chunk in response.iter_content(8192):
+                body += chunk
+                if time.monotonic() > deadline:
+                    raise requests.exceptions.ReadTimeout(f"answer not read within {budget}s")
+        movie_data = json.loads(bytes(body))
+        if not isinstance(movie_data, dict):
+            raise ValueError("expected a JSON object")
+        return movie_data
+
+    def _failed(self, outcome, started):
+        self.breaker.record_failure()
+        self._observe(outcome, started)
+
+    def _observe(self, outcome, started):
+        """Reports one upstream OMDb request to the instrumentation, if enabled."""
+        if self.instrumentation:
+            self.instrumentation.observe_omdb(outcome, time.perf_counter() - started)
+
+    def stats(self):
+        """Returns request, coalescing and circuit breaker counters (circuit_open is 0 or 1)."""
+        with self._lock:
+            stats = dict(self.counters)
+        stats.update(self.breaker.counters) # Plain ints, read without the breaker's lock
+        stats['circuit_open'] = int(self.breaker.state == CircuitBreaker.OPEN)
+        return stats
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
@@ -0,0 +1,69 @@
+import logging
+
+from data_manager.omdb_client import OMDbException
+
+
+class OMDbLookupMixin:
+    """
+    OMDb title lookups shared by the data managers.
+
+    Expects ``omdb_client`` (an ``OMDbClient``) and ``omdb_cache`` (an
+    ``OMDbCache``) on the instance.
+    """
+
+    # The client's settings, kept as data manager attributes for callers and tests.
+    @property
+    def omdb_api_key(self):
+        return self.omdb_client.api_key
+
+    @omdb_api_key.setter
+    def omdb_api_key(self, value):
+        self.omdb_client.api_key = value
+
+    @property
+    def omdb_base_url(self):
+        return self.omdb_client.base_url
+
+    @omdb_base_url.setter
+    def omdb_base_url(self, value):
+        self.omdb_client.base_url = value
+
+    def fetch_movie_details_from_omdb(self, title, budget=None):
+        """
+        Fetches movie details from OMDb API using the movie title.
+
+        ``budget`` overrides the client's latency budget (seconds).
+        """
+        if not self.omdb_api_key:
+             raise OMDbException("OMDb API key is not configured.")
+        if not title:
+             raise ValueError("Movie title cannot be empty for OMDb lookup.")
+
+        cached, cached_data = self.omdb_cache.get(title)
+        if cached:
+            if cached_data is None:
+                logging.info(f"OMDb cache: known miss for title: {title}")
+                raise OMDbException(f"Movie '{title}' not found in OMDb.")
+            logging.info(f"OMDb cache hit for title: {title}")
+            return cached_data
+
+        try:
+            movie_data = self.omdb_client.lookup(title, budget=budget)
+        except OMDbException:
+            raise
+        except Exception as e:
+             logging.exception(f"Unexpected error during OMDb fetch for title '{title}': {e}")
+             raise OMDbException(f"An unexpected error occurred fetching movie data: {e}")
+
+        if movie_data.get('Response') == 'True':
+            logging.info(f"Successfully fetched data for: {movie_data.get('Title')}")
+            self.omdb_cache.put(title, movie_data)
+            return movie_data
+        elif movie_data.get('Error') == 'Movie not found!':
+            logging.warning(f"Movie not found in OMDb for title: {title}")
+            self.omdb_cache.put_not_found(title)
+            raise OMDbException(f"Movie '{title}' not found in OMDb.")
+        else:
+            error_message = movie_data.get('Error', 'Unknown OMDb API error')
+            logging.error(f"OMDb API Error for title '{title}': {error_message}")
+            raise OMDbException(f"OMDb API Error: {error_message}")
@@ -0,0 +1,129 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Rendered into cached pages where the flash messages go (see flash_messages.html);
+# each response fills it with that session's messages, if any.
+FLASH_SLOT = '<!--flash-messages-->'
+
+
+class PageCache:
+    """
+    Rendered pages tagged with the content version they show.
+
+    Pages are stored split at ``FLASH_SLOT``, so a cached page can be
+    served with or without a session's flash messages. Memory is bounded
+    by an LRU over the UTF-8 size of the stored pages (``max_bytes``).
+
+    Content versions (see ``content_versions``) are remembered for
+    ``check_interval`` seconds; with the default of 0 every request reads
+    its version, a single primary-key lookup. ``forget_versions()`` drops
+    them, e.g. after this process wrote something.
+    """
+
+    def __init__(self, max_bytes=8 * 1024 * 1024, check_interval=0.0, clock=time.monotonic):
+        """
+        Args:
+            max_bytes (int): Upper bound on the size of the stored pages (0 disables the cache).
+            check_interval (float): Seconds a version read may be reused.
+            clock: Time source, injectable for tests.
+        """
+        self.max_bytes = max_bytes
+        self.check_interval = check_interval
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (version, etag, head, tail, size)
+        self._versions = {}            # scope -> (version, updated_at, read at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'not_modified': 0, 'evictions': 0, 'invalidations': 0}
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def version(self, scope, load):
+        """
+        Returns ``(version, updated_at)`` for ``scope``, calling ``load(scope)``
+        unless a read from the last ``check_interval`` seconds can be reused.
+        None (a failed load) is passed through and not remembered.
+        """
+        now = self._clock()
+        if self.check_interval > 0:
+            remembered = self._versions.get(scope)
+            if remembered is not None and now - remembered[2] < self.check_interval:
+                return remembered[:2]
+        state = load(scope)
+        if state is not None and self.check_interval > 0:
+            self._versions[scope] = (state[0], state[1], now)
+        return state
+
+    def forget_versions(self):
+        """Makes the next version() call for every scope load a fresh version."""
+        self._versions.clear()
+
+    @staticmethod
+    def etag(key, version, salt=''):
+        """A strong entity tag for the page ``key`` at ``version`` (``salt``: e.g. a template hash)."""
+        return hashlib.sha1(f"{key}\0{version}\0{salt}".encode('utf-8')).hexdigest()[:20]
+
+    def count_not_modified(self):
+        with self._lock:
+            self.counters['not_modified'] += 1
+
+    def get(self, key, version):
+        """Returns the cached ``(etag, head, tail)`` for ``key`` at ``version``, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] == version:
+                    self._entries.move_to_end(key)
+                    self.counters['hits'] += 1
+                    return entry[1:4]
+                self._remove(key)
+                self.counters['invalidations'] += 1
+            self.counters['misses'] += 1
+            return None
+
+    def put(self, key, version, etag, page):
+        """Stores a rendered ``page`` and returns it as ``(etag, head, tail)``."""
+        head, _, tail = page.partition(FLASH_SLOT)
+        size = len(head.encode('utf-8')) + len(tail.encode('utf-8'))
+        entry = (version, etag, head, tail, size)
+        if size > self.max_bytes:
+            return entry[1:4]
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.counters['evictions'] += 1
+        return entry[1:4]
+
+    def _remove(self, key):
+        self._bytes -= self._entries.pop(key)[4]
+
+    def clear(self):
+        """Drops every cached page and remembered version."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        self._versions.clear()
+
+    def stats(self):
+        """
+        Returns the counters, the entry count, stored and maximum bytes, and
+        the hit rate: the share of requests answered without rendering
+        (cache hits and 304 responses).
+        """
+        with self._lock:
+            stats = dict(self.counters)
+            stats['entries'] = len(self._entries)
+            stats['bytes'] = self._bytes
+            stats['max_bytes'] = self.max_bytes
+        served = stats['hits'] + stats['not_modified']
+        lookups = served + stats['misses']
+        stats['hit_rate'] = served / lookups if lookups else 0.0
+        return stats
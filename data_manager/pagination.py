@@ -0,0 +1,78 @@
+import json
+import math
+import base64
+
+# Sortable movie columns for keyset pagination. Every key is paired with
+# the row id as a tie-breaker so the (value, id) cursor is unique.
+MOVIE_SORT_KEYS = ('title', 'year', 'rating')
+
+# Range of SQLite INTEGER; larger ints cannot be bound as parameters.
+_MIN_INT, _MAX_INT = -2 ** 63, 2 ** 63 - 1
+
+
+def _is_cursor_value(value):
+    """Whether a decoded value can be bound as a SQL parameter (and hashed as a cache key)."""
+    if value is None or isinstance(value, str):
+        return True
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, int):
+        return _MIN_INT <= value <= _MAX_INT
+    return isinstance(value, float) and math.isfinite(value)
+
+
+def encode_cursor(values):
+    """Encodes a keyset position (e.g. ``['Heat', 12]``) as a URL-safe token."""
+    raw = json.dumps(list(values), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, length):
+    """
+    Decodes a token made by ``encode_cursor``.
+
+    Returns:
+        tuple: The decoded values, or None if the token is missing, malformed
+        or holds anything but strings, finite floats, 64-bit ints and nulls.
+    """
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != length:
+        return None
+    if not all(_is_cursor_value(value) for value in values):
+        return None
+    return tuple(values)
+
+
+def keyset_segments(column, after, descending=False, nullable=True):
+    """
+    Builds the WHERE fragments selecting rows after ``after``, in order.
+
+    ``after`` is a ``(value, id)`` pair for ``ORDER BY column, id`` (both
+    ASC or both DESC). SQLite sorts NULLs first ascending and last
+    descending, and row-value comparisons never match NULL, so the rows
+    after a cursor may span a NULL segment and a non-NULL segment. Each
+    fragment returned is a single index range; callers run them in order
+    until their page is full.
+
+    Returns:
+        list: ``(sql_fragment, params)`` tuples.
+    """
+    if after is None:
+        return [("", ())]
+    value, row_id = after
+    op = '<' if descending else '>'
+    if value is None:
+        segments = [(f" AND {column} IS NULL AND id {op} ?", (row_id,))]
+        if not descending:
+            segments.append((f" AND {column} IS NOT NULL", ()))
+        return segments
+    segments = [(f" AND ({column}, id) {op} (?, ?)", (value, row_id))]
+    if descending and nullable:
+        segments.append((f" AND {column} IS NULL", ()))
+    return segments
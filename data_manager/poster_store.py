@@ -0,0 +1,327 @@
+"""
+Local mirror of poster images.
+
+Posters are downloaded once and stored content-addressed under ``root``:
+
+* ``objects/ab/<sha256>``: the image as downloaded, named by the SHA-256
+  of its bytes, so identical posters (shared by many users' movies, or
+  served under several URLs) are stored once.
+* ``thumbs/<width>/ab/<sha256>``: a grid-sized JPEG. Thumbnails need the
+  optional Pillow package; without it the original doubles as thumbnail.
+* ``urls/cd/<sha256 of the URL>``: a small JSON record mapping a poster
+  URL to its object, or remembering a failed download until it may be
+  retried.
+
+Every file is written atomically and never changes afterwards (URL
+records aside), so several processes can share one directory.
+"""
+import io
+import os
+import json
+import time
+import socket
+import hashlib
+import logging
+import tempfile
+import threading
+import ipaddress
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse
+
+import requests
+
+try:
+    from PIL import Image
+except ImportError: # Optional: without Pillow, thumbnails are the original images
+    Image = None
+
+# Leading bytes -> content type; anything else is not accepted as a poster.
+IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+)
+
+
+def sniff_image_type(data):
+    """Returns the content type of image bytes, or None if they are not a supported image."""
+    for signature, content_type in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return content_type
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+
+def _sharded(*parts):
+    """``('objects', 'abcd...')`` -> ``objects/ab/abcd...`` (keeps directories small)."""
+    *dirs, name = parts
+    return os.path.join(*dirs, name[:2], name)
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.poster-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def check_public_url(url, allowed_hosts=()):
+    """
+    Rejects poster URLs the server must not fetch on a user's behalf.
+
+    Only http(s) URLs are accepted. Hosts in ``allowed_hosts`` are trusted
+    as they are; any other host must resolve exclusively to public
+    addresses, so loopback, private (RFC 1918), link-local (e.g. cloud
+    metadata endpoints) and other reserved ranges cannot be reached.
+
+    Raises:
+        ValueError: The URL may not be fetched.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+        raise ValueError("only http(s) poster URLs are mirrored")
+    host = parsed.hostname
+    if host in allowed_hosts:
+        return
+    try:
+        infos = socket.getaddrinfo(host, parsed.port or (443 if parsed.scheme == 'https' else 80),
+                                   proto=socket.IPPROTO_TCP)
+    except (socket.gaierror, UnicodeError) as e:
+        raise ValueError(f"cannot resolve {host}: {e}")
+    for info in infos:
+        address = ipaddress.ip_address(info[4][0].split('%')[0])
+        if not address.is_global or address.is_multicast:
+            raise ValueError(f"{host} resolves to non-public address {address}")
+
+
+class PosterStore:
+    """
+    Downloads posters into a content-addressed directory and serves them.
+
+    ``fetch(url)`` downloads synchronously; concurrent calls for one URL
+    share a single download. ``prefetch(urls)`` does the same on a small
+    background pool. Failed downloads are remembered for ``retry_after``
+    seconds so a broken URL is not requested on every page view.
+
+    Poster URLs are typed in by users, so every URL (and redirect target)
+    is checked with ``check_public_url`` before it is requested. The check
+    resolves the host separately from the download, which leaves a small
+    DNS rebinding window; ``allowed_hosts`` alone closes it.
+    """
+
+    MAX_REDIRECTS = 3
+
+    def __init__(self, root, thumb_width=200, timeout=5.0, max_bytes=5 * 1024 * 1024, retry_after=24 * 3600,
+                 workers=2, session=None, memo_size=100000, clock=time.time, allowed_hosts=()):
+        """
+        Args:
+            root (str): Directory holding the mirror (created on demand).
+            thumb_width (int): Width of grid thumbnails in pixels.
+            timeout (float): Seconds to wait for the image host.
+            max_bytes (int): Larger downloads are rejected.
+            retry_after (float): Seconds before a failed URL is tried again.
+            workers (int): Threads used by prefetch().
+            session: requests-compatible session (for connection reuse and tests).
+            memo_size (int): URL -> object mappings remembered in memory.
+            clock: Time source, injectable for tests.
+            allowed_hosts: Hosts trusted without the public address check
+                           (e.g. an internal image proxy).
+        """
+        self.root = root
+        self.thumb_width = thumb_width
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.retry_after = retry_after
+        self.workers = workers
+        self.session = session or requests.Session()
+        self.memo_size = memo_size
+        self._clock = clock
+        self.allowed_hosts = frozenset(allowed_hosts)
+        self._memo = OrderedDict()  # URL -> digest, for mirrored URLs only (those never change)
+        self._inflight = {}         # URL -> Event set when its download finished
+        self._lock = threading.Lock()
+        self._executor = None
+        self.counters = {'downloads': 0, 'failures': 0, 'deduplicated': 0, 'thumbnails': 0}
+
+    # --- Lookups ---
+    def _url_record_path(self, url):
+        return os.path.join(self.root, _sharded('urls', hashlib.sha256(url.encode('utf-8')).hexdigest()))
+
+    def object_path(self, digest, thumbnail=False):
+        """Path of a stored poster (or its thumbnail, if one was made), or None."""
+        if thumbnail:
+            path = os.path.join(self.root, _sharded('thumbs', str(self.thumb_width), digest))
+            if os.path.isfile(path):
+                return path
+        path = os.path.join(self.root, _sharded('objects', digest))
+        return path if os.path.isfile(path) else None
+
+    def _read_record(self, url):
+        try:
+            with open(self._url_record_path(url), encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable poster record for {url}: {e}")
+            return None
+
+    def digest_for(self, url):
+        """The object digest of a mirrored poster URL, or None if it is not mirrored (yet)."""
+        with self._lock:
+            digest = self._memo.get(url)
+            if digest is not None:
+                self._memo.move_to_end(url)
+                return digest
+        record = self._read_record(url)
+        digest = record.get('digest') if record else None
+        if digest is not None:
+            self._remember(url, digest)
+        return digest
+
+    def _remember(self, url, digest):
+        with self._lock:
+            self._memo[url] = digest
+            self._memo.move_to_end(url)
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+
+    def _may_retry(self, url):
+        record = self._read_record(url)
+        return record is None or record.get('digest') is not None or record.get('retry_at', 0) <= self._clock()
+
+    # --- Downloads ---
+    def fetch(self, url):
+        """
+        Mirrors ``url`` unless it already is (or recently failed).
+
+        Returns:
+            str: The object digest, or None if the poster is unavailable.
+        """
+        digest = self.digest_for(url)
+        if digest is not None or not self._may_retry(url):
+            return digest
+        with self._lock:
+            done = self._inflight.get(url)
+            leader = done is None
+            if leader:
+                done = self._inflight[url] = threading.Event()
+        if not leader:
+            done.wait(self.timeout * 2)
+            return self.digest_for(url)
+        try:
+            return self._download(url)
+        finally:
+            with self._lock:
+                del self._inflight[url]
+            done.set()
+
+    def _get(self, url):
+        """Downloads ``url``, checking it and every redirect target first; returns the body."""
+        for _ in range(self.MAX_REDIRECTS + 1):
+            check_public_url(url, self.allowed_hosts)
+            with self.session.get(url, timeout=self.timeout, stream=True, allow_redirects=False) as response:
+                if response.is_redirect:
+                    url = urljoin(url, response.headers['Location'])
+                    continue
+                response.raise_for_status()
+                data = bytearray()
+                for chunk in response.iter_content(64 * 1024):
+                    data += chunk
+                    if len(data) > self.max_bytes:
+                        raise ValueError(f"poster larger than {self.max_bytes} bytes")
+                return bytes(data)
+        raise ValueError(f"more than {self.MAX_REDIRECTS} redirects")
+
+    def _download(self, url):
+        try:
+            data = self._get(url)
+            if sniff_image_type(data) is None:
+                raise ValueError("response is not a JPEG, PNG, GIF or WebP image")
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logging.warning(f"Could not mirror poster {url}: {e}")
+            with self._lock:
+                self.counters['failures'] += 1
+            record = {'error': str(e), 'retry_at': self._clock() + self.retry_after}
+            try:
+                _write_atomic(self._url_record_path(url), json.dumps(record).encode('utf-8'))
+            except OSError as write_error:
+                logging.error(f"Could not record poster failure for {url}: {write_error}")
+            return None
+
+        digest = hashlib.sha256(data).hexdigest()
+        try:
+            if self.object_path(digest) is None:
+                _write_atomic(os.path.join(self.root, _sharded('objects', digest)), data)
+                self._make_thumbnail(digest, data)
+                counter = 'downloads'
+            else:
+                counter = 'deduplicated'
+            _write_atomic(self._url_record_path(url), json.dumps({'digest': digest}).encode('utf-8'))
+        except OSError as e:
+            logging.error(f"Could not store poster {url}: {e}")
+            with self._lock:
+                self.counters['failures'] += 1
+            return None
+        with self._lock:
+            self.counters[counter] += 1
+        self._remember(url, digest)
+        return digest
+
+    def _make_thumbnail(self, digest, data):
+        if Image is None:
+            return
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                if image.width <= self.thumb_width:
+                    return # The original is small enough
+                image.thumbnail((self.thumb_width, self.thumb_width * 4))
+                out = io.BytesIO()
+                image.convert('RGB').save(out, 'JPEG', quality=85, optimize=True)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Could not make a thumbnail of poster {digest}: {e}")
+            return
+        try:
+            _write_atomic(os.path.join(self.root, _sharded('thumbs', str(self.thumb_width), digest)), out.getvalue())
+        except OSError as e:
+            logging.warning(f"Could not store the thumbnail of poster {digest}: {e}")
+            return
+        with self._lock:
+            self.counters['thumbnails'] += 1
+
+    def prefetch(self, urls):
+        """Mirrors the given URLs in the background; already mirrored ones are skipped."""
+        pending = [url for url in dict.fromkeys(urls) if url and self.digest_for(url) is None]
+        if not pending:
+            return
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="poster-fetch")
+            executor = self._executor
+        for url in pending:
+            executor.submit(self.fetch, url)
+
+    def shutdown(self, wait=True):
+        """Stops the background pool; queued downloads are dropped."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def stats(self):
+        """Returns the download, failure, deduplication and thumbnail counters."""
+        with self._lock:
+            stats = dict(self.counters)
+            stats['memoized_urls'] = len(self._memo)
+        return stats
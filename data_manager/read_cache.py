@@ -0,0 +1,153 @@
+import time
+import inspect
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+
+
+class CachingDataManager:
+    """
+    Read-through cache in front of a SQLiteDataManager.
+
+    Cached reads are tagged with the ``change_counter`` version of the
+    table they depend on. Every write (from any process) bumps that
+    counter through triggers, so a single-row read tells each worker
+    whether its cached results are still valid. Memory is bounded by an
+    LRU over ``max_entries`` results.
+
+    Cached values are shared between callers and must not be mutated.
+    Every attribute other than the cached reads is delegated unchanged.
+    Reads that cannot be bounded or keyed go straight to the data manager:
+    paged reads without a ``limit`` (whole collections would make the
+    entry-count bound meaningless) and calls with unhashable arguments.
+    """
+
+    # Method name -> change_counter column it depends on.
+    CACHED_READS = {
+        'get_all_users': 'users_version',
+        'get_user_by_id': 'users_version',
+        'get_movies_for_user': 'movies_version',
+        'get_movie_summaries_for_user': 'movies_version',
+        'get_movie_by_id': 'movies_version',
+        'get_user_stats': 'movies_version',
+        'get_global_stats': 'movies_version',
+        'get_user_stat_totals': 'movies_version',
+    }
+    # Cached reads taking a ``limit`` (None = every row).
+    PAGED_READS = ('get_all_users', 'get_movies_for_user', 'get_movie_summaries_for_user')
+
+    def __init__(self, data_manager, max_entries=1024, check_interval=0.0, clock=time.monotonic):
+        """
+        Args:
+            data_manager (SQLiteDataManager): The wrapped data manager.
+            max_entries (int): Maximum number of cached results.
+            check_interval (float): Seconds a version read may be reused before
+                                    re-checking (0 checks on every read).
+            clock: Time source, injectable for tests.
+        """
+        self.data_manager = data_manager
+        self.max_entries = max_entries
+        self.check_interval = check_interval
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (version, value)
+        self._lock = threading.Lock()
+        self._versions = None
+        self._versions_read_at = None
+        self._signatures = {}  # method name -> inspect.Signature, for PAGED_READS
+        self.counters = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0, 'bypassed': 0}
+
+    def __getattr__(self, name):
+        attr = getattr(self.data_manager, name)
+        column = self.CACHED_READS.get(name)
+        if column is None:
+            return attr
+
+        def cached_read(*args, **kwargs):
+            return self._read(name, column, attr, args, kwargs)
+        cached_read.__name__ = name
+        cached_read.__doc__ = attr.__doc__
+        return cached_read
+
+    def _current_versions(self):
+        """Returns the change_counter row, or None if it cannot be read."""
+        now = self._clock()
+        if (self._versions is not None and self.check_interval > 0
+                and now - self._versions_read_at < self.check_interval):
+            return self._versions
+        try:
+            with self.data_manager._get_connection() as conn:
+                row = conn.execute(
+                    "SELECT users_version, movies_version FROM change_counter WHERE id = 1"
+                ).fetchone()
+        except sqlite3.Error as e:
+            logging.warning(f"Read cache could not check change counters: {e}")
+            return None
+        if row is None:
+            return None
+        self._versions = {'users_version': row[0], 'movies_version': row[1]}
+        self._versions_read_at = now
+        return self._versions
+
+    def _is_unbounded(self, name, method, args, kwargs):
+        """Whether a paged read asks for every row."""
+        if name not in self.PAGED_READS:
+            return False
+        signature = self._signatures.get(name)
+        if signature is None:
+            signature = self._signatures[name] = inspect.signature(method)
+        try:
+            return signature.bind(*args, **kwargs).arguments.get('limit') is None
+        except TypeError:
+            return True # Let the call itself report the bad arguments
+
+    def _read(self, name, column, method, args, kwargs):
+        """Serves a read from the cache when its table has not changed."""
+        key = (name, args, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            key = None
+        if key is None or self._is_unbounded(name, method, args, kwargs):
+            with self._lock:
+                self.counters['bypassed'] += 1
+            return method(*args, **kwargs)
+        versions = self._current_versions()
+        if versions is None:
+            return method(*args, **kwargs)
+        version = versions[column]
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] == version:
+                    self._entries.move_to_end(key)
+                    self.counters['hits'] += 1
+                    return entry[1]
+                del self._entries[key]
+                self.counters['invalidations'] += 1
+            self.counters['misses'] += 1
+
+        value = method(*args, **kwargs)
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters['evictions'] += 1
+        return value
+
+    def clear_cache(self):
+        """Drops every cached result."""
+        with self._lock:
+            self._entries.clear()
+
+    def cache_stats(self):
+        """Returns hit/miss/eviction counters, the entry count and the hit rate."""
+        with self._lock:
+            stats = dict(self.counters)
+            stats['entries'] = len(self._entries)
+            stats['max_entries'] = self.max_entries
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
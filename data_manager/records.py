@@ -0,0 +1,71 @@
+from collections import namedtuple
+
+USER_COLUMNS = ('id', 'username')
+MOVIE_COLUMNS = ('id', 'user_id', 'title', 'director', 'year', 'plot', 'poster', 'rating')
+# Columns shown in the poster grid (user_movies.html); deliberately omits plot.
+MOVIE_SUMMARY_COLUMNS = ('id', 'user_id', 'title', 'director', 'year', 'rating', 'poster')
+SEARCH_HIT_COLUMNS = MOVIE_COLUMNS + ('username',)
+
+
+class RecordMixin:
+    """
+    Mapping-style access for tuple-backed records.
+
+    Records are plain tuples (no per-row hash table) but still support
+    ``row['title']``, ``row.get('title')``, ``row.keys()`` and ``dict(row)``,
+    so code written against the old ``dict(sqlite3.Row)`` results and
+    Jinja's ``row.title`` both keep working.
+    """
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        return tuple.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in self._fields else default
+
+    def keys(self):
+        return self._fields
+
+    def __contains__(self, key):
+        return key in self._fields
+
+    def as_dict(self):
+        return dict(zip(self._fields, self))
+
+
+def _record_type(name, columns, doc):
+    """Builds a namedtuple-based record class with RecordMixin access."""
+    cls = type(name, (RecordMixin, namedtuple(f'_{name}', columns)), {'__slots__': (), '__doc__': doc})
+    return cls
+
+
+User = _record_type('User', USER_COLUMNS, "A row of the users table.")
+Movie = _record_type('Movie', MOVIE_COLUMNS, "A full row of the movies table.")
+MovieSummary = _record_type('MovieSummary', MOVIE_SUMMARY_COLUMNS,
+                            "Lightweight, read-only movie row for list/grid pages (no plot text).")
+SearchHit = _record_type('SearchHit', SEARCH_HIT_COLUMNS, "A movie row plus its owner's username.")
+
+
+def row_factory(record_type):
+    """Returns an sqlite3 row_factory that builds ``record_type`` tuples directly."""
+    def factory(cursor, row):
+        return tuple.__new__(record_type, row)
+    return factory
+
+
+user_factory = row_factory(User)
+movie_factory = row_factory(Movie)
+movie_summary_factory = row_factory(MovieSummary)
+search_hit_factory = row_factory(SearchHit)
+
+
+def columns_sql(columns, alias=None):
+    """Renders a column list for SELECT, optionally qualified with a table alias."""
+    prefix = f"{alias}." if alias else ""
+    return ', '.join(prefix + column for column in columns)
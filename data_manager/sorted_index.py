@@ -0,0 +1,116 @@
+from bisect import bisect_left, bisect_right
+
+
+class SortedIndex:
+    """
+    An ordered set of comparable keys for the in-memory data manager.
+
+    Keys live in a list of sorted buckets of at most ``2 * load`` keys plus
+    a list of each bucket's last key. Lookups bisect twice (O(log n));
+    inserts and deletes bisect to a bucket and shift at most one bucket,
+    so they stay cheap at millions of keys where a single sorted list
+    would move the whole tail on every change.
+    """
+
+    def __init__(self, keys=(), load=256):
+        self.load = load
+        self._buckets = []
+        self._maxes = []
+        self._len = 0
+        keys = sorted(set(keys))
+        for start in range(0, len(keys), load):
+            self._buckets.append(keys[start:start + load])
+            self._maxes.append(keys[min(start + load, len(keys)) - 1])
+        self._len = len(keys)
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        for bucket in self._buckets:
+            yield from bucket
+
+    def __contains__(self, key):
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            return False
+        bucket = self._buckets[i]
+        j = bisect_left(bucket, key)
+        return j < len(bucket) and bucket[j] == key
+
+    def add(self, key):
+        """Inserts ``key``; adding a key that is already present is a no-op."""
+        if not self._buckets:
+            self._buckets.append([key])
+            self._maxes.append(key)
+            self._len = 1
+            return
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            i -= 1
+        bucket = self._buckets[i]
+        j = bisect_left(bucket, key)
+        if j < len(bucket) and bucket[j] == key:
+            return
+        bucket.insert(j, key)
+        self._maxes[i] = bucket[-1]
+        self._len += 1
+        if len(bucket) > 2 * self.load:
+            self._buckets[i:i + 1] = [bucket[:self.load], bucket[self.load:]]
+            self._maxes[i:i + 1] = [bucket[self.load - 1], bucket[-1]]
+
+    def discard(self, key):
+        """Removes ``key`` if present; returns whether it was."""
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            return False
+        bucket = self._buckets[i]
+        j = bisect_left(bucket, key)
+        if j == len(bucket) or bucket[j] != key:
+            return False
+        del bucket[j]
+        self._len -= 1
+        if bucket:
+            self._maxes[i] = bucket[-1]
+        else:
+            del self._buckets[i]
+            del self._maxes[i]
+        return True
+
+    def irange(self, lower=None, upper=None, inclusive=(True, True), reverse=False):
+        """
+        Yields keys between ``lower`` and ``upper`` (None = unbounded) in order.
+
+        The index must not be modified while the generator is being consumed.
+        """
+        if not self._buckets:
+            return
+        if lower is None:
+            start = (0, 0)
+        else:
+            find = bisect_left if inclusive[0] else bisect_right
+            i = find(self._maxes, lower)
+            start = (i, find(self._buckets[i], lower)) if i < len(self._buckets) else (i, 0)
+        if upper is None:
+            stop = (len(self._buckets) - 1, len(self._buckets[-1]))
+        else:
+            find = bisect_right if inclusive[1] else bisect_left
+            i = find(self._maxes, upper)
+            if i < len(self._buckets):
+                stop = (i, find(self._buckets[i], upper))
+            else:
+                stop = (len(self._buckets) - 1, len(self._buckets[-1]))
+        if start >= stop:
+            return
+        if reverse:
+            for i in range(stop[0], start[0] - 1, -1):
+                bucket = self._buckets[i]
+                lo = start[1] if i == start[0] else 0
+                hi = stop[1] if i == stop[0] else len(bucket)
+                yield from reversed(bucket[lo:hi])
+        else:
+            for i in range(start[0], stop[0] + 1):
+                bucket = self._buckets[i]
+                lo = start[1] if i == start[0] else 0
+                hi = stop[1] if i == stop[0] else len(bucket)
+                yield from bucket[lo:hi]
@@ -1,154 +1,167 @@
 import sqlite3
 import logging
-import requests
+import json
 import os
+import re
+import time
+from data_manager import content_versions, migrations, user_stats
+from data_manager.omdb_cache import OMDbCache, normalize_title
+from data_manager.omdb_client import DEFAULT_OMDB_URL, OMDbClient
+from data_manager.omdb_lookup import OMDbException, OMDbLookupMixin
+from data_manager.data_manager_interface import DataManagerInterface
+from data_manager.records import (MOVIE_COLUMNS, MOVIE_SUMMARY_COLUMNS, Movie, User, columns_sql,
+                                  user_factory, movie_factory, movie_summary_factory, search_hit_factory)
+from data_manager.pagination import MOVIE_SORT_KEYS, keyset_segments
+from data_manager.connection_pool import SQLiteConnectionPool
+from data_manager.write_queue import SQLiteWriteQueue, apply_wal_pragmas
 
-# Custom Exception for OMDb Errors
-class OMDbException(Exception):
-    """Custom exception for OMDb API related errors."""
-    pass
+# Columns that may be set across many movies at once (see update_movies).
+BATCH_UPDATE_FIELDS = ('year', 'rating')
 
-class SQLiteDataManager:
-    def __init__(self, db_file):
-        """Initializes the data manager, sets up API key, and ensures tables exist."""
+# Catalog entries are immutable once created (the FTS triggers rely on it).
+CATALOG_INSERT_SQL = """
+    INSERT INTO catalog (imdb_id, title, director, year, plot, poster) VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT (imdb_id) DO NOTHING
+"""
+# Links the movie to the catalog entry for the trailing IMDb ID parameter (if
+# any) and keeps plot/poster only where they differ from the catalog's.
+MOVIE_INSERT_SQL = """
+    INSERT INTO movies (user_id, title, director, year, plot, poster, rating, catalog_id)
+    SELECT ?, ?, ?, ?, NULLIF(?, c.plot), NULLIF(?, c.poster), ?, c.id
+    FROM (SELECT ? AS imdb_id) k LEFT JOIN catalog c ON c.imdb_id = k.imdb_id
+"""
+
+class SQLiteDataManager(OMDbLookupMixin, DataManagerInterface):
+    def __init__(self, db_file, pool_size=5, high_concurrency=False, write_batch_size=64,
+                 omdb_cache_size=1024, omdb_cache_ttl=7 * 24 * 3600, omdb_negative_ttl=24 * 3600,
+                 omdb_budget=5.0, instrumentation=None, migrate=True):
+        """
+        Initializes the data manager, sets up API key, and ensures tables exist.
+
+        With ``high_concurrency=True`` the database is switched to WAL
+        journaling and every write is funnelled through a single writer
+        thread that group-commits up to ``write_batch_size`` operations.
+        OMDb lookups are cached in memory (``omdb_cache_size`` entries) and
+        on disk; successful and "not found" answers expire after
+        ``omdb_cache_ttl`` and ``omdb_negative_ttl`` seconds respectively;
+        upstream requests go through an ``OMDbClient`` that gives up after
+        ``omdb_budget`` seconds.
+        An ``Instrumentation`` object, if given, times every SQL statement
+        and upstream OMDb request. With ``migrate=False`` the schema is
+        assumed to be current (see ``python -m data_manager.migrations``).
+        """
         self.db_file = db_file
-        self.omdb_api_key = os.environ.get('OMDB_API_KEY')
+        self.instrumentation = instrumentation
+        connection_factory = instrumentation.connection_factory if instrumentation else sqlite3.Connection
+        self.pool = SQLiteConnectionPool(db_file, pool_size=pool_size, timeout=10,
+                                         connection_factory=connection_factory)
+        self.write_queue = None
+        if high_concurrency:
+            self.pool.add_configure_hook(apply_wal_pragmas)
+        self.omdb_client = OMDbClient(os.environ.get('OMDB_API_KEY'),
+                                      os.environ.get('OMDB_BASE_URL', DEFAULT_OMDB_URL),
+                                      budget=omdb_budget, instrumentation=instrumentation)
         if not self.omdb_api_key:
              logging.warning("OMDB_API_KEY environment variable not set. Movie fetching via API will fail.")
-        self.create_tables()
+        if migrate:
+            self.create_tables()
+        if high_concurrency:
+            self.write_queue = SQLiteWriteQueue(db_file, batch_size=write_batch_size,
+                                                connection_factory=connection_factory)
+        self.omdb_cache = OMDbCache(self._get_connection, self._execute_write, max_entries=omdb_cache_size,
+                                    ttl=omdb_cache_ttl, negative_ttl=omdb_negative_ttl)
 
     def _get_connection(self):
-        """Helper method to establish a database connection."""
-        try:
-            conn = sqlite3.connect(self.db_file, timeout=10)
-            conn.row_factory = sqlite3.Row
-            conn.execute("PRAGMA foreign_keys = ON")
-            return conn
-        except sqlite3.Error as e:
-            logging.exception(f"Database connection error to {self.db_file}: {e}")
-            raise
+        """Helper method to check out a pooled database connection (use as a context manager)."""
+        return self.pool.connection()
 
-    def create_tables(self):
-        """Creates the 'users' and 'movies' tables if they do not already exist."""
-        conn = None
-        try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT NOT NULL UNIQUE
-                )
-            """)
-            logging.info("Checked/Created 'users' table.")
-
-            # --- ADDED year COLUMN ---
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS movies (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER NOT NULL,
-                    title TEXT NOT NULL,
-                    director TEXT,
-                    year INTEGER,      -- ADDED: Store the release year as an integer
-                    plot TEXT,
-                    poster TEXT,
-                    rating REAL,
-                    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-                )
-            """)
-            logging.info("Checked/Created 'movies' table with 'year' column.")
+    def _run_write(self, operation):
+        """
+        Runs ``operation(conn)`` as a committed write and returns its result.
 
+        In high-concurrency mode the operation is executed by the writer
+        thread; otherwise it runs on a pooled connection and is committed
+        immediately. The operation must not commit by itself.
+        """
+        if self.write_queue:
+            return self.write_queue.execute(operation)
+        with self._get_connection() as conn:
+            result = operation(conn)
             conn.commit()
+            return result
 
-        except sqlite3.Error as e:
-            logging.exception(f"Database error during table creation: {e}")
-        finally:
-            if conn:
-                conn.close()
+    def _execute_write(self, sql, params=()):
+        """Executes a single write statement, returning (rowcount, lastrowid)."""
+        def operation(conn):
+            cursor = conn.execute(sql, params)
+            return cursor.rowcount, cursor.lastrowid
+        return self._run_write(operation)
 
-    def fetch_movie_details_from_omdb(self, title):
-        """Fetches movie details from OMDb API using the movie title."""
-        # ... (rest of fetch logic remains the same) ...
-        if not self.omdb_api_key:
-             raise OMDbException("OMDb API key is not configured.")
-        if not title:
-             raise ValueError("Movie title cannot be empty for OMDb lookup.")
-
-        url = f"http://www.omdbapi.com/?t={title}&apikey={self.omdb_api_key}"
-        logging.info(f"Fetching data from OMDb for title: {title}")
+    def close(self):
+        """Flushes pending writes and closes all connections. Intended as a shutdown hook."""
+        if self.write_queue:
+            self.write_queue.close()
+        self.pool.close()
+        self.omdb_client.close()
 
+    def create_tables(self):
+        """Brings the schema up to date by applying any pending migrations."""
         try:
-            response = requests.get(url, timeout=15)
-            response.raise_for_status()
-            movie_data = response.json()
+            with self._get_connection() as conn:
+                applied = migrations.apply_migrations(conn)
+                if applied:
+                    logging.info(f"Applied schema migrations: {applied}")
+                else:
+                    logging.info("Database schema is up to date.")
+        except sqlite3.Error as e:
+            logging.exception(f"Database error during schema migration: {e}")
 
-            if movie_data.get('Response') == 'True':
-                logging.info(f"Successfully fetched data for: {movie_data.get('Title')}")
-                return movie_data
-            elif movie_data.get('Error') == 'Movie not found!':
-                logging.warning(f"Movie not found in OMDb for title: {title}")
-                raise OMDbException(f"Movie '{title}' not found in OMDb.")
-            else:
-                error_message = movie_data.get('Error', 'Unknown OMDb API error')
-                logging.error(f"OMDb API Error for title '{title}': {error_message}")
-                raise OMDbException(f"OMDb API Error: {error_message}")
-
-        except requests.exceptions.Timeout:
-            logging.error(f"Timeout connecting to OMDb API for title '{title}'.")
-            raise OMDbException("Request to OMDb API timed out.")
-        except requests.exceptions.RequestException as e:
-             logging.error(f"Network or HTTP error fetching OMDb data: {e}")
-             raise OMDbException(f"Failed to connect to OMDb API: {e}")
-        except Exception as e:
-             logging.exception(f"Unexpected error during OMDb fetch for title '{title}': {e}")
-             raise OMDbException(f"An unexpected error occurred fetching movie data: {e}")
-
-
-    def get_all_users(self):
-        """Fetches all users from the database, ordered by username."""
-        # ... (no changes needed) ...
-        conn = None
+    def get_all_users(self, limit=None, after=None):
+        """
+        Fetches users ordered by username.
+
+        Args:
+            limit (int): Maximum number of users to return (None for all).
+            after (str): Keyset cursor; only usernames sorting after it are returned.
+        """
+        sql = "SELECT id, username FROM users"
+        params = []
+        if after is not None:
+            sql += " WHERE username > ?"
+            params.append(after)
+        sql += " ORDER BY username"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, username FROM users ORDER BY username")
-            users = cursor.fetchall()
-            return [dict(user) for user in users]
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = user_factory
+                cursor.execute(sql, params)
+                return cursor.fetchall()
         except sqlite3.Error as e:
             logging.exception(f"Database error fetching all users: {e}")
             return []
-        finally:
-            if conn:
-                conn.close()
 
     def get_user_by_id(self, user_id):
         """Fetches a single user by their ID."""
         # ... (no changes needed) ...
-        conn = None
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, username FROM users WHERE id = ?", (user_id,))
-            user = cursor.fetchone()
-            return dict(user) if user else None
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = user_factory
+                cursor.execute("SELECT id, username FROM users WHERE id = ?", (user_id,))
+                return cursor.fetchone()
         except sqlite3.Error as e:
             logging.exception(f"Database error fetching user ID {user_id}: {e}")
             return None
-        finally:
-            if conn:
-                conn.close()
 
     def add_user(self, username):
         """Adds a new user to the database."""
         # ... (no changes needed) ...
-        conn = None
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            cursor.execute("INSERT INTO users (username) VALUES (?)", (username,))
-            conn.commit()
-            logging.info(f"Added user: {username} (ID: {cursor.lastrowid})")
+            _, user_id = self._execute_write("INSERT INTO users (username) VALUES (?)", (username,))
+            logging.info(f"Added user: {username} (ID: {user_id})")
             return True
         except sqlite3.IntegrityError:
             logging.warning(f"Attempted to add duplicate username: {username}")
@@ -156,83 +169,203 @@ class SQLiteDataManager:
         except sqlite3.Error as e:
             logging.exception(f"Database error adding user '{username}': {e}")
             return None
-        finally:
-            if conn:
-                conn.close()
 
-    def get_movies_for_user(self, user_id):
-        """Fetches all movies for a specific user, ordered by title."""
-        # ... (no changes needed to the query itself) ...
-        conn = None
-        try:
-            conn = self._get_connection()
+    def _select_movie_page(self, columns, row_factory, user_id, limit, after, sort, descending):
+        """
+        Runs the keyset-paginated movie_details query shared by the movie
+        listings: rows of ``user_id`` ordered by ``sort`` then ID, after the
+        cursor ``after``, built with ``row_factory``. Nullable sort keys take
+        one query per keyset segment until ``limit`` rows are found.
+        """
+        if sort not in MOVIE_SORT_KEYS:
+            raise ValueError(f"Unsupported sort key: {sort}")
+        direction = "DESC" if descending else "ASC"
+        columns = columns_sql(columns)
+        segments = keyset_segments(sort, after, descending, nullable=(sort != 'title'))
+        with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM movies WHERE user_id = ? ORDER BY title", (user_id,))
-            movies = cursor.fetchall()
-            return [dict(movie) for movie in movies]
+            cursor.row_factory = row_factory
+            movies = []
+            for where, params in segments:
+                sql = f"SELECT {columns} FROM movie_details WHERE user_id = ?{where} ORDER BY {sort} {direction}, id {direction}"
+                params = (user_id,) + params
+                if limit is not None:
+                    sql += " LIMIT ?"
+                    params += (limit - len(movies),)
+                movies.extend(cursor.execute(sql, params))
+                if limit is not None and len(movies) >= limit:
+                    break
+            return movies
+
+    def get_movies_for_user(self, user_id, limit=None, after=None, sort='title', descending=False):
+        """
+        Fetches movies for a specific user, ordered by ``sort`` then ID.
+
+        Args:
+            user_id (int): The owner.
+            limit (int): Maximum number of movies to return (None for all).
+            after (tuple): Keyset cursor ``(sort_value, id)`` of the last row already seen.
+            sort (str): One of ``pagination.MOVIE_SORT_KEYS``.
+            descending (bool): Reverse the order.
+        """
+        try:
+            return self._select_movie_page(MOVIE_COLUMNS, movie_factory, user_id, limit, after, sort, descending)
         except sqlite3.Error as e:
             logging.exception(f"Database error fetching movies for user ID {user_id}: {e}")
             return []
-        finally:
-            if conn:
-                conn.close()
+
+    def get_movie_summaries_for_user(self, user_id, limit=None, after=None, sort='title', descending=False):
+        """
+        Like get_movies_for_user, but returns MovieSummary tuples without the plot.
+
+        Intended for list/grid pages. With the default title sort the movies
+        side is answered from the covering index ``idx_movies_user_summary``;
+        inherited posters cost one catalog lookup per returned row.
+        """
+        try:
+            return self._select_movie_page(MOVIE_SUMMARY_COLUMNS, movie_summary_factory, user_id, limit, after,
+                                           sort, descending)
+        except sqlite3.Error as e:
+            logging.exception(f"Database error fetching movie summaries for user ID {user_id}: {e}")
+            return []
 
     # --- MODIFIED add_movie to include year ---
-    def add_movie(self, user_id, title, director, year, plot, poster, rating): # Added 'year' parameter
-        """Adds a new movie record to the database."""
-        conn = None
-        sql = """
-            INSERT INTO movies (user_id, title, director, year, plot, poster, rating)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """ # Added 'year' column and '?' placeholder
-        params = (user_id, title, director, year, plot, poster, rating) # Added 'year' to params tuple
+    def add_movie(self, user_id, title, director, year, plot, poster, rating, imdb_id=None): # Added 'year' parameter
+        """
+        Adds a new movie record to the database.
+
+        With an ``imdb_id`` (movies fetched from OMDb) the movie is linked to
+        the shared catalog entry, which is created from these fields if needed.
+        """
+        imdb_id = imdb_id or None
+        params = (user_id, title, director, year, plot, poster, rating, imdb_id) # Added 'year' to params tuple
+        def operation(conn):
+            if imdb_id:
+                conn.execute(CATALOG_INSERT_SQL, (imdb_id, title, director, year, plot, poster))
+            return conn.execute(MOVIE_INSERT_SQL, params).lastrowid
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            cursor.execute(sql, params)
-            conn.commit()
-            logging.info(f"Added movie '{title}' (ID: {cursor.lastrowid}) for user ID {user_id}")
+            movie_id = self._run_write(operation)
+            logging.info(f"Added movie '{title}' (ID: {movie_id}) for user ID {user_id}")
             return True
         except sqlite3.Error as e:
             logging.exception(f"Database error adding movie '{title}' for user ID {user_id}: {e}")
             return False
-        finally:
-            if conn:
-                conn.close()
+
+    def iter_movies_for_user(self, user_id, fetch_size=1000):
+        """
+        Streams a user's movies (ordered by title) from one open cursor.
+
+        Rows are fetched ``fetch_size`` at a time, so memory stays constant
+        regardless of collection size. The pooled connection is held until
+        the generator is exhausted or closed.
+        """
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = movie_factory
+                cursor.execute(
+                    f"SELECT {columns_sql(MOVIE_COLUMNS)} FROM movie_details WHERE user_id = ? ORDER BY title, id",
+                    (user_id,),
+                )
+                while True:
+                    rows = cursor.fetchmany(fetch_size)
+                    if not rows:
+                        break
+                    yield from rows
+        except sqlite3.Error as e:
+            logging.exception(f"Database error streaming movies for user ID {user_id}: {e}")
+
+    def add_movies_bulk(self, user_id, rows):
+        """
+        Inserts many movies for one user in a single transaction.
+
+        Args:
+            user_id (int): Owner of the movies.
+            rows (list): Tuples of (title, director, year, plot, poster, rating),
+                         optionally followed by an IMDb ID (see add_movie).
+
+        Returns:
+            int: Number of rows inserted, or None on database error.
+        """
+        params = []
+        catalog_params = []
+        for row in rows:
+            imdb_id = (row[6] if len(row) > 6 else None) or None
+            params.append((user_id,) + tuple(row[:6]) + (imdb_id,))
+            if imdb_id:
+                catalog_params.append((imdb_id,) + tuple(row[:5]))
+        if not params:
+            return 0
+        def operation(conn):
+            if catalog_params:
+                conn.executemany(CATALOG_INSERT_SQL, catalog_params)
+            return conn.executemany(MOVIE_INSERT_SQL, params).rowcount
+        try:
+            inserted = self._run_write(operation)
+            logging.info(f"Bulk-added {inserted} movies for user ID {user_id}")
+            return inserted
+        except sqlite3.Error as e:
+            logging.exception(f"Database error bulk-adding {len(params)} movies for user ID {user_id}: {e}")
+            return None
 
     def get_movie_by_id(self, movie_id):
         """Fetches a single movie by its ID."""
          # ... (no changes needed to the query itself) ...
-        conn = None
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM movies WHERE id = ?", (movie_id,))
-            movie = cursor.fetchone()
-            return dict(movie) if movie else None
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = movie_factory
+                cursor.execute(f"SELECT {columns_sql(MOVIE_COLUMNS)} FROM movie_details WHERE id = ?", (movie_id,))
+                return cursor.fetchone()
         except sqlite3.Error as e:
             logging.exception(f"Database error fetching movie ID {movie_id}: {e}")
             return None
-        finally:
-            if conn:
-                conn.close()
+
+    def get_movie_with_user(self, movie_id):
+        """
+        Fetches a movie together with its owner in a single JOIN.
+
+        Returns:
+            tuple: ``(Movie, User)``; ``(None, None)`` if the movie does not
+            exist and ``(Movie, None)`` if its owner is missing.
+        """
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = None
+                row = cursor.execute(
+                    f"""
+                    SELECT {columns_sql(MOVIE_COLUMNS, 'm')}, u.id, u.username
+                    FROM movie_details m LEFT JOIN users u ON u.id = m.user_id
+                    WHERE m.id = ?
+                    """,
+                    (movie_id,),
+                ).fetchone()
+        except sqlite3.Error as e:
+            logging.exception(f"Database error fetching movie ID {movie_id} with owner: {e}")
+            return None, None
+        if row is None:
+            return None, None
+        split = len(MOVIE_COLUMNS)
+        movie = Movie._make(row[:split])
+        user = User._make(row[split:]) if row[split] is not None else None
+        return movie, user
 
     # --- MODIFIED update_movie to include year ---
     def update_movie(self, movie_id, title, director, year, plot, poster, rating): # Added 'year' parameter
-        """Updates details of a specific movie."""
-        conn = None
+        """Updates details of a specific movie; plot/poster equal to its catalog entry's are stored as NULL."""
         sql = """
             UPDATE movies
-            SET title = ?, director = ?, year = ?, plot = ?, poster = ?, rating = ?
+            SET title = ?, director = ?, year = ?,
+                plot = NULLIF(?, (SELECT plot FROM catalog WHERE id = movies.catalog_id)),
+                poster = NULLIF(?, (SELECT poster FROM catalog WHERE id = movies.catalog_id)),
+                rating = ?
             WHERE id = ?
         """ # Added 'year = ?'
         params = (title, director, year, plot, poster, rating, movie_id) # Added 'year' to params tuple
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            cursor.execute(sql, params)
-            conn.commit()
-            if cursor.rowcount > 0:
+            rowcount, _ = self._execute_write(sql, params)
+            if rowcount > 0:
                 logging.info(f"Updated movie ID {movie_id} with title: {title}")
                 return True
             else:
@@ -241,20 +374,13 @@ class SQLiteDataManager:
         except sqlite3.Error as e:
             logging.exception(f"Database error updating movie ID {movie_id}: {e}")
             return False
-        finally:
-            if conn:
-                conn.close()
 
     def delete_movie(self, movie_id):
         """Deletes a specific movie from the database."""
         # ... (no changes needed) ...
-        conn = None
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM movies WHERE id = ?", (movie_id,))
-            conn.commit()
-            if cursor.rowcount > 0:
+            rowcount, _ = self._execute_write("DELETE FROM movies WHERE id = ?", (movie_id,))
+            if rowcount > 0:
                 logging.info(f"Deleted movie ID: {movie_id}")
                 return True
             else:
@@ -263,20 +389,13 @@ class SQLiteDataManager:
         except sqlite3.Error as e:
             logging.exception(f"Database error deleting movie ID {movie_id}: {e}")
             return False
-        finally:
-            if conn:
-                conn.close()
 
     def delete_user(self, user_id):
         """Deletes a specific user and relies on ON DELETE CASCADE for associated movies."""
         # ... (no changes needed) ...
-        conn = None
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM users WHERE id = ?", (user_id,))
-            conn.commit()
-            if cursor.rowcount > 0:
+            rowcount, _ = self._execute_write("DELETE FROM users WHERE id = ?", (user_id,))
+            if rowcount > 0:
                 logging.info(f"Deleted user ID: {user_id} (associated movies should cascade if constraint is active)")
                 return True
             else:
@@ -285,6 +404,492 @@ class SQLiteDataManager:
         except sqlite3.Error as e:
             logging.exception(f"Database error deleting user ID {user_id}: {e}")
             return False
-        finally:
-            if conn:
-                conn.close()
\ No newline at end of file
+
+    # --- Batch movie operations ---
+    # Each method runs one executemany in a single transaction and only
+    # touches rows owned by ``user_id``; other IDs are silently skipped.
+
+    def delete_movies(self, user_id, movie_ids):
+        """
+        Deletes many of a user's movies in one transaction.
+
+        Returns:
+            int: Number of rows deleted, or None on database error.
+        """
+        params = [(movie_id, user_id) for movie_id in movie_ids]
+        if not params:
+            return 0
+        sql = "DELETE FROM movies WHERE id = ? AND user_id = ?"
+        try:
+            deleted = self._run_write(lambda conn: conn.executemany(sql, params).rowcount)
+            logging.info(f"Batch-deleted {deleted} of {len(params)} movies for user ID {user_id}")
+            return deleted
+        except sqlite3.Error as e:
+            logging.exception(f"Database error batch-deleting movies for user ID {user_id}: {e}")
+            return None
+
+    def update_movies(self, user_id, movie_ids, fields):
+        """
+        Sets the same field values on many of a user's movies in one transaction.
+
+        Args:
+            user_id (int): Owner of the movies.
+            movie_ids (list): IDs to update.
+            fields (dict): New values keyed by column; only the keys in
+                           BATCH_UPDATE_FIELDS are allowed.
+
+        Returns:
+            int: Number of rows updated, or None on database error.
+        """
+        unknown = set(fields) - set(BATCH_UPDATE_FIELDS)
+        if unknown:
+            raise ValueError(f"Fields not allowed in batch updates: {sorted(unknown)}")
+        columns = [column for column in BATCH_UPDATE_FIELDS if column in fields]
+        params = [tuple(fields[column] for column in columns) + (movie_id, user_id) for movie_id in movie_ids]
+        if not params or not columns:
+            return 0
+        assignments = ', '.join(f"{column} = ?" for column in columns)
+        sql = f"UPDATE movies SET {assignments} WHERE id = ? AND user_id = ?"
+        try:
+            updated = self._run_write(lambda conn: conn.executemany(sql, params).rowcount)
+            logging.info(f"Batch-updated {', '.join(columns)} on {updated} of {len(params)} movies for user ID {user_id}")
+            return updated
+        except sqlite3.Error as e:
+            logging.exception(f"Database error batch-updating movies for user ID {user_id}: {e}")
+            return None
+
+    def move_movies(self, user_id, movie_ids, target_user_id):
+        """
+        Moves many of a user's movies to another user in one transaction.
+
+        Pending OMDb fetch jobs follow their movies.
+
+        Returns:
+            int: Number of movies moved, or None on database error (including
+            a missing target user, which violates the foreign key).
+        """
+        params = [(target_user_id, movie_id, user_id) for movie_id in movie_ids]
+        if not params:
+            return 0
+
+        def operation(conn):
+            moved = conn.executemany("UPDATE movies SET user_id = ? WHERE id = ? AND user_id = ?", params).rowcount
+            conn.executemany("UPDATE fetch_jobs SET user_id = ? WHERE movie_id = ? AND user_id = ?", params)
+            return moved
+
+        try:
+            moved = self._run_write(operation)
+            logging.info(f"Moved {moved} of {len(params)} movies from user ID {user_id} to user ID {target_user_id}")
+            return moved
+        except sqlite3.Error as e:
+            logging.exception(f"Database error moving movies from user ID {user_id} to {target_user_id}: {e}")
+            return None
+
+    # --- Collection statistics ---
+    # Served from summary tables kept current by triggers (see user_stats).
+
+    def get_user_stats(self, user_id, top_directors=5):
+        """
+        Returns a user's movie count, average rating, movies per decade and top directors.
+
+        Returns:
+            dict: See ``user_stats.read_stats``, or None on database error.
+        """
+        try:
+            with self._get_connection() as conn:
+                return user_stats.read_stats(conn, user_id, top_directors)
+        except sqlite3.Error as e:
+            logging.exception(f"Database error reading statistics for user ID {user_id}: {e}")
+            return None
+
+    def get_global_stats(self, top_directors=5):
+        """Returns the same statistics as get_user_stats across all users' movies."""
+        return self.get_user_stats(user_stats.ALL_USERS, top_directors)
+
+    def get_user_stat_totals(self, user_ids):
+        """
+        Returns movie counts and average ratings for many users in one query.
+
+        Returns:
+            dict: user ID -> ``{'movie_count', 'average_rating'}``; users without
+                  movies are omitted. Empty on database error.
+        """
+        user_ids = list(user_ids)
+        if not user_ids:
+            return {}
+        placeholders = ', '.join('?' * len(user_ids))
+        try:
+            with self._get_connection() as conn:
+                rows = conn.execute(
+                    f"SELECT user_id, movie_count, rated_count, rating_sum FROM user_stats "
+                    f"WHERE user_id IN ({placeholders}) AND movie_count > 0", user_ids
+                ).fetchall()
+        except sqlite3.Error as e:
+            logging.exception(f"Database error reading statistics for {len(user_ids)} users: {e}")
+            return {}
+        return {
+            row[0]: {'movie_count': row[1], 'average_rating': round(row[3] / row[2], 2) if row[2] else None}
+            for row in rows
+        }
+
+    def check_stats_consistency(self, repair=False):
+        """
+        Recomputes the statistics from scratch and diffs them against the stored summaries.
+
+        With ``repair=True`` the summaries are rebuilt when they differ; the
+        check and rebuild then run in one write transaction.
+
+        Returns:
+            list: Differences found (empty when consistent), or None on database error.
+        """
+        def operation(conn):
+            differences = user_stats.check_consistency(conn)
+            if differences and repair:
+                user_stats.rebuild(conn)
+                # Invalidate cached statistics and rendered pages in every process
+                conn.execute("UPDATE change_counter SET movies_version = movies_version + 1 WHERE id = 1")
+                content_versions.bump_all(conn)
+            return differences
+        try:
+            if repair:
+                differences = self._run_write(operation)
+            else:
+                with self._get_connection() as conn:
+                    conn.execute("BEGIN")  # one snapshot for both sides of the diff
+                    try:
+                        differences = operation(conn)
+                    finally:
+                        conn.rollback()
+        except sqlite3.Error as e:
+            logging.exception(f"Database error checking statistics consistency: {e}")
+            return None
+        if differences:
+            action = "rebuilt" if repair else "not repaired"
+            logging.warning(f"Statistics summaries had {len(differences)} inconsistent rows ({action}).")
+        return differences
+
+    def get_movie_titles(self):
+        """
+        Returns every movie title (duplicates included), case-insensitively
+        ordered: a covering scan of idx_movies_title_nocase, for building
+        the title autocomplete index.
+
+        Returns:
+            list: Title strings; empty on database error.
+        """
+        try:
+            with self._get_connection() as conn:
+                return [row[0] for row in conn.execute("SELECT title FROM movies ORDER BY title COLLATE NOCASE")]
+        except sqlite3.Error as e:
+            logging.exception(f"Database error reading movie titles: {e}")
+            return []
+
+    # --- Content versions ---
+
+    def get_content_version(self, user_id):
+        """
+        Returns the version of a user's pages (ALL_USERS for pages listing
+        every user) and when it last changed; see ``content_versions``.
+
+        Returns:
+            tuple: ``(version, updated_at)`` with ``updated_at`` in Unix
+            seconds, or None on database error.
+        """
+        try:
+            with self._get_connection() as conn:
+                return content_versions.read_version(conn, user_id)
+        except sqlite3.Error as e:
+            logging.exception(f"Database error reading the content version of user ID {user_id}: {e}")
+            return None
+
+    # --- Shared catalog ---
+
+    def _find_catalog_entry(self, conn, movie, parse_movie_data):
+        """
+        Returns the catalog row (id, plot, poster) describing ``movie``, or None.
+
+        An existing entry with the same title, year and director wins;
+        otherwise the movie's cached OMDb response becomes a new entry if it
+        describes the same film.
+        """
+        title, director, year = movie[1], movie[2], movie[3]
+        entry = conn.execute(
+            "SELECT id, plot, poster FROM catalog WHERE title = ? COLLATE NOCASE AND year IS ? AND director IS ?",
+            (title, year, director),
+        ).fetchone()
+        if entry or parse_movie_data is None:
+            return entry
+        cached = conn.execute(
+            "SELECT payload FROM omdb_cache WHERE title_key = ? AND payload IS NOT NULL", (normalize_title(title),)
+        ).fetchone()
+        if not cached:
+            return None
+        fields = parse_movie_data(json.loads(cached[0]), title)
+        if not fields.get('imdb_id') or (normalize_title(fields['title']), fields['year'], fields['director']) \
+                != (normalize_title(title), year, director):
+            return None
+        conn.execute(CATALOG_INSERT_SQL, (fields['imdb_id'], fields['title'], fields['director'], fields['year'],
+                                          fields['plot'], fields['poster']))
+        return conn.execute("SELECT id, plot, poster FROM catalog WHERE imdb_id = ?", (fields['imdb_id'],)).fetchone()
+
+    def backfill_catalog(self, parse_movie_data=None, batch_size=500, pause=0.0):
+        """
+        Links movies that predate the catalog to catalog entries, online.
+
+        Rows are visited in ID order, ``batch_size`` per short write
+        transaction (with ``pause`` seconds between batches), so the app
+        keeps serving while it runs and an interrupted backfill simply
+        resumes. ``parse_movie_data`` maps a cached OMDb response onto movie
+        fields including ``imdb_id``; without it only existing entries are used.
+
+        Returns:
+            dict: ``{'scanned': n, 'linked': n}``, or None on database error.
+        """
+        totals = {'scanned': 0, 'linked': 0}
+        last_id = 0
+
+        def operation(conn):
+            movies = conn.execute(
+                "SELECT id, title, director, year FROM movies WHERE id > ? AND catalog_id IS NULL ORDER BY id LIMIT ?",
+                (last_id, batch_size),
+            ).fetchall()
+            linked = 0
+            for movie in movies:
+                entry = self._find_catalog_entry(conn, movie, parse_movie_data)
+                if entry:
+                    linked += conn.execute(
+                        """
+                        UPDATE movies SET catalog_id = ?, plot = NULLIF(plot, ?), poster = NULLIF(poster, ?)
+                        WHERE id = ? AND catalog_id IS NULL
+                        """,
+                        (entry[0], entry[1], entry[2], movie[0]),
+                    ).rowcount
+            return (movies[-1][0] if movies else None), len(movies), linked
+        try:
+            while True:
+                last_id, scanned, linked = self._run_write(operation)
+                if last_id is None:
+                    break
+                totals['scanned'] += scanned
+                totals['linked'] += linked
+                if pause:
+                    time.sleep(pause)
+        except sqlite3.Error as e:
+            logging.exception(f"Database error backfilling the catalog after movie ID {last_id}: {e}")
+            return None
+        logging.info(f"Catalog backfill linked {totals['linked']} of {totals['scanned']} unlinked movies.")
+        return totals
+
+    def prune_catalog(self):
+        """Deletes catalog entries no movie links to. Returns the number deleted, or None on error."""
+        try:
+            deleted, _ = self._execute_write(
+                "DELETE FROM catalog WHERE NOT EXISTS (SELECT 1 FROM movies WHERE catalog_id = catalog.id)"
+            )
+            logging.info(f"Pruned {deleted} unreferenced catalog entries.")
+            return deleted
+        except sqlite3.Error as e:
+            logging.exception(f"Database error pruning the catalog: {e}")
+            return None
+
+    def get_catalog_links(self, user_id):
+        """Maps a user's catalog-linked movies to ``(imdb_id, plot, poster)`` of their entry, or None on error."""
+        try:
+            with self._get_connection() as conn:
+                rows = conn.execute(
+                    "SELECT m.id, c.imdb_id, c.plot, c.poster FROM movies m JOIN catalog c ON c.id = m.catalog_id "
+                    "WHERE m.user_id = ?",
+                    (user_id,),
+                ).fetchall()
+            return {row[0]: (row[1], row[2], row[3]) for row in rows}
+        except sqlite3.Error as e:
+            logging.exception(f"Database error reading catalog links for user ID {user_id}: {e}")
+            return None
+
+    # --- Full-text search ---
+    @staticmethod
+    def _fts_query(query):
+        """Turns free text into a safe FTS5 query: every word must match, the last as a prefix."""
+        words = re.findall(r'\w+', query or '')
+        if not words:
+            return None
+        terms = [f'"{word}"' for word in words]
+        terms[-1] += '*'
+        return ' '.join(terms)
+
+    def search_movies(self, query, user_id=None, limit=20, offset=0):
+        """
+        Full-text searches titles, directors and plots, best matches first.
+
+        Title matches weigh more than director matches, which weigh more
+        than plot matches (bm25 column weights 10/5/1).
+
+        Args:
+            query (str): Free-text query.
+            user_id (int): Restrict results to one user's movies (None for all).
+            limit (int): Page size.
+            offset (int): Rows to skip.
+
+        Returns:
+            list: SearchHit rows (movie columns plus ``username``), or [] for an empty query or on error.
+        """
+        fts_query = self._fts_query(query)
+        if fts_query is None:
+            return []
+        sql = f"""
+            SELECT {columns_sql(MOVIE_COLUMNS, 'm')}, u.username
+            FROM movies_fts
+            JOIN movie_details m ON m.id = movies_fts.rowid
+            JOIN users u ON u.id = m.user_id
+            WHERE movies_fts MATCH ?
+        """
+        params = [fts_query]
+        if user_id is not None:
+            sql += " AND m.user_id = ?"
+            params.append(user_id)
+        sql += " ORDER BY bm25(movies_fts, 10.0, 5.0, 1.0), m.id LIMIT ? OFFSET ?"
+        params += [limit, offset]
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = search_hit_factory
+                return cursor.execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            logging.exception(f"Database error searching movies for '{query}': {e}")
+            return []
+
+    # --- Background OMDb fetch jobs ---
+    def create_fetch_job(self, user_id, title):
+        """
+        Inserts a placeholder movie and a pending fetch job in one transaction.
+
+        Returns:
+            dict: ``{'movie_id': ..., 'job_id': ...}``, or None on database error.
+        """
+        def operation(conn):
+            movie_id = conn.execute(
+                "INSERT INTO movies (user_id, title) VALUES (?, ?)", (user_id, title)
+            ).lastrowid
+            job_id = conn.execute(
+                "INSERT INTO fetch_jobs (movie_id, user_id, title) VALUES (?, ?, ?)", (movie_id, user_id, title)
+            ).lastrowid
+            return {'movie_id': movie_id, 'job_id': job_id}
+        try:
+            ids = self._run_write(operation)
+            logging.info(f"Queued OMDb fetch job {ids['job_id']} for '{title}' (movie ID {ids['movie_id']})")
+            return ids
+        except sqlite3.Error as e:
+            logging.exception(f"Database error queueing fetch job for '{title}' (user ID {user_id}): {e}")
+            return None
+
+    def get_fetch_job(self, job_id):
+        """Fetches a single fetch job by its ID."""
+        try:
+            with self._get_connection() as conn:
+                job = conn.execute("SELECT * FROM fetch_jobs WHERE id = ?", (job_id,)).fetchone()
+                return dict(job) if job else None
+        except sqlite3.Error as e:
+            logging.exception(f"Database error fetching job ID {job_id}: {e}")
+            return None
+
+    def get_fetch_jobs_for_user(self, user_id):
+        """Returns a user's fetch jobs that are not done, keyed by movie ID."""
+        try:
+            with self._get_connection() as conn:
+                jobs = conn.execute(
+                    "SELECT * FROM fetch_jobs WHERE user_id = ? AND status != 'done'", (user_id,)
+                ).fetchall()
+                return {job['movie_id']: dict(job) for job in jobs}
+        except sqlite3.Error as e:
+            logging.exception(f"Database error fetching jobs for user ID {user_id}: {e}")
+            return {}
+
+    def get_unfinished_fetch_jobs(self):
+        """Returns jobs left pending or running, oldest first."""
+        try:
+            with self._get_connection() as conn:
+                # Without the hint the planner picks idx_fetch_jobs_status and sorts the result
+                jobs = conn.execute(
+                    "SELECT * FROM fetch_jobs INDEXED BY idx_fetch_jobs_unfinished "
+                    "WHERE status IN ('pending', 'running') ORDER BY id"
+                ).fetchall()
+                return [dict(job) for job in jobs]
+        except sqlite3.Error as e:
+            logging.exception(f"Database error fetching unfinished jobs: {e}")
+            return []
+
+    def claim_fetch_job(self, job_id, lease=300):
+        """
+        Atomically marks a job as running, so that only one worker (in any
+        process) executes it. Pending jobs can always be claimed; running
+        ones only once they were not updated for ``lease`` seconds, i.e.
+        their worker died.
+
+        Returns:
+            bool: True if this caller now owns the job.
+        """
+        try:
+            rowcount, _ = self._execute_write(
+                """
+                UPDATE fetch_jobs SET status = 'running', updated_at = CURRENT_TIMESTAMP
+                WHERE id = ? AND (status = 'pending'
+                                  OR (status = 'running' AND updated_at <= datetime('now', ?)))
+                """,
+                (job_id, f'-{int(lease)} seconds'),
+            )
+            return rowcount > 0
+        except sqlite3.Error as e:
+            logging.exception(f"Database error claiming job ID {job_id}: {e}")
+            return False
+
+    def set_fetch_job_status(self, job_id, status, error=None):
+        """Updates a job's status (and error message)."""
+        try:
+            rowcount, _ = self._execute_write(
+                "UPDATE fetch_jobs SET status = ?, error = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                (status, error, job_id),
+            )
+            if status == 'failed':
+                logging.warning(f"Fetch job {job_id} failed: {error}")
+            return rowcount > 0
+        except sqlite3.Error as e:
+            logging.exception(f"Database error updating job ID {job_id}: {e}")
+            return False
+
+    def complete_fetch_job(self, job_id, movie_id, fields):
+        """
+        Fills in the placeholder movie and marks the job done in one transaction.
+
+        When ``fields`` carries an ``imdb_id`` the movie is linked to the catalog.
+        """
+        imdb_id = fields.get('imdb_id') or None
+        def operation(conn):
+            if imdb_id:
+                conn.execute(CATALOG_INSERT_SQL, (imdb_id, fields['title'], fields['director'], fields['year'],
+                                                  fields['plot'], fields['poster']))
+            updated = conn.execute(
+                """
+                UPDATE movies
+                SET title = ?, director = ?, year = ?,
+                    plot = NULLIF(?, (SELECT plot FROM catalog WHERE imdb_id = ?)),
+                    poster = NULLIF(?, (SELECT poster FROM catalog WHERE imdb_id = ?)),
+                    rating = ?, catalog_id = (SELECT id FROM catalog WHERE imdb_id = ?)
+                WHERE id = ?
+                """,
+                (fields['title'], fields['director'], fields['year'], fields['plot'], imdb_id,
+                 fields['poster'], imdb_id, fields['rating'], imdb_id, movie_id),
+            ).rowcount
+            conn.execute(
+                "UPDATE fetch_jobs SET status = 'done', error = NULL, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                (job_id,),
+            )
+            return updated
+        try:
+            if self._run_write(operation):
+                logging.info(f"Fetch job {job_id} completed for movie ID {movie_id}")
+            else:
+                logging.warning(f"Fetch job {job_id} finished, but movie ID {movie_id} was deleted meanwhile.")
+            return True
+        except sqlite3.Error as e:
+            logging.exception(f"Database error completing job ID {job_id}: {e}")
+            return False
@@ -0,0 +1,141 @@
+"""
+Fingerprinted, precompressed static assets.
+
+``build_assets`` copies every file under the static folder into a build
+folder as ``<name>.<content hash><ext>``. Text assets also get a ``.gz``
+(and, if the optional ``brotli`` module is installed, a ``.br``)
+variant, kept only when it is smaller. A ``manifest.json`` maps the
+original names to the hashed ones. A hashed name changes whenever the
+content does, so the files can be cached for a year as immutable. Files
+from earlier builds are kept, so pages rendered before a deployment can
+still load them.
+
+``StaticAssets`` reads the manifest at runtime. It maps names to hashed
+URLs and picks the best variant a client accepts.
+"""
+import os
+import gzip
+import json
+import hashlib
+import logging
+import tempfile
+
+try:
+    import brotli
+except ImportError: # Optional: without it only gzip variants are built
+    brotli = None
+
+MANIFEST = 'manifest.json'
+# Formats that are not compressed already (PNG, JPEG, fonts, ... are).
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json', '.txt', '.html', '.map')
+# Content-Encoding -> file suffix, in order of preference.
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def hashed_name(name, data):
+    """``css/site.css`` -> ``css/site.<12 hex digits of SHA-256>.css``."""
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+
+
+def _variants(data):
+    """Yields (suffix, bytes) for each precompressed encoding that saves space."""
+    compressed = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)} # mtime=0: reproducible builds
+    if brotli is not None:
+        compressed['.br'] = brotli.compress(data, quality=11)
+    for suffix, body in compressed.items():
+        if len(body) < len(data):
+            yield suffix, body
+
+
+def _write(path, data):
+    """Writes ``path`` atomically, so the app never serves a partly written file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.asset-')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def build_assets(static_folder, build_folder):
+    """
+    Fingerprints and precompresses every file under ``static_folder``
+    (except ``build_folder`` itself) into ``build_folder``.
+
+    Returns:
+        dict: The manifest, original name -> hashed name (``/``-separated).
+    """
+    build_folder = os.path.abspath(build_folder)
+    manifest = {}
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = sorted(d for d in dirs if os.path.abspath(os.path.join(root, d)) != build_folder)
+        for file in sorted(files):
+            source = os.path.join(root, file)
+            name = os.path.relpath(source, static_folder).replace(os.sep, '/')
+            with open(source, 'rb') as f:
+                data = f.read()
+            target = manifest[name] = hashed_name(name, data)
+            path = os.path.join(build_folder, *target.split('/'))
+            _write(path, data)
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE:
+                for suffix, body in _variants(data):
+                    _write(path + suffix, body)
+    os.makedirs(build_folder, exist_ok=True)
+    _write(os.path.join(build_folder, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    logging.info(f"Built {len(manifest)} static assets into {build_folder}")
+    return manifest
+
+
+class StaticAssets:
+    """
+    Runtime view of a build folder written by ``build_assets``.
+
+    The manifest is read on first use and kept for the life of the
+    process (a new build takes effect on restart). Without a build, no
+    name has a hashed version and callers fall back to the plain files.
+    """
+
+    def __init__(self, build_folder):
+        self.build_folder = build_folder
+        self._manifest = None
+
+    @property
+    def manifest(self):
+        if self._manifest is None:
+            try:
+                with open(os.path.join(self.build_folder, MANIFEST), encoding='utf-8') as f:
+                    self._manifest = json.load(f)
+            except FileNotFoundError:
+                self._manifest = {}
+            except (OSError, ValueError) as e:
+                logging.warning(f"Ignoring unreadable asset manifest in {self.build_folder}: {e}")
+                self._manifest = {}
+        return self._manifest
+
+    def hashed(self, name):
+        """The fingerprinted name of static file ``name``, or None if it was not built."""
+        return self.manifest.get(name)
+
+    def resolve(self, filename, accept_encodings):
+        """
+        Picks the file to send for the hashed asset ``filename``.
+
+        Args:
+            accept_encodings: The request's parsed Accept-Encoding header;
+                              ``accept_encodings[name]`` is the quality of ``name``.
+
+        Returns:
+            tuple: ``(path, content_encoding, has_variants)``; path is None
+            if the asset does not exist. content_encoding is None for the
+            uncompressed file.
+        """
+        path = os.path.realpath(os.path.join(self.build_folder, *filename.split('/')))
+        root = os.path.realpath(self.build_folder)
+        if not path.startswith(root + os.sep) or not os.path.isfile(path) or filename == MANIFEST:
+            return None, None, False
+        available = [(encoding, path + suffix) for encoding, suffix in ENCODINGS if os.path.isfile(path + suffix)]
+        for encoding, variant in available:
+            if accept_encodings[encoding] > 0:
+                return variant, encoding, True
+        return path, None, bool(available)
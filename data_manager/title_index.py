@@ -0,0 +1,111 @@
+import re
+import time
+import threading
+import unicodedata
+
+from data_manager.sorted_index import SortedIndex
+
+# Titles are also found without a leading article ("dark kn" -> "The Dark Knight").
+_ARTICLE = re.compile(r'^(?:the|a|an)\s+')
+
+
+def fold_title(title):
+    """Case- and accent-insensitive, single-spaced form of a title for prefix matching."""
+    decomposed = unicodedata.normalize('NFKD', title)
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return ' '.join(stripped.casefold().split())
+
+
+def _keys(title):
+    folded = fold_title(title)
+    keys = [(folded, title)]
+    without_article = _ARTICLE.sub('', folded)
+    if without_article and without_article != folded:
+        keys.append((without_article, title))
+    return keys
+
+
+class TitleIndex:
+    """
+    In-memory prefix index over movie titles, for autocomplete.
+
+    Keys are ``(folded title, title)`` pairs in a SortedIndex, so a lookup
+    bisects to the prefix and reads the next few keys: O(log n + limit).
+    Each title is reference-counted, since many movies (and cached OMDb
+    results) share titles; a title is suggested while any reference is
+    left. ``rebuild`` swaps in a new index built from a full scan, so
+    lookups never see a half-built one.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._keys = SortedIndex()
+        self._refs = {}  # title -> number of movies/cached results with it
+        self._lock = threading.Lock()
+        self.version = None     # Content version the last rebuild started from
+        self.checked_at = None  # When that version was last known to be current
+
+    def __len__(self):
+        return len(self._refs)
+
+    def rebuild(self, titles, version=None):
+        """Replaces the contents with ``titles`` (an iterable, duplicates counted)."""
+        refs = {}
+        for title in titles:
+            if title:
+                refs[title] = refs.get(title, 0) + 1
+        keys = SortedIndex(key for title in refs for key in _keys(title))
+        with self._lock:
+            self._keys, self._refs = keys, refs
+            self.version, self.checked_at = version, self._clock()
+
+    def is_stale(self, max_age):
+        """Whether the contents were last built or confirmed over ``max_age`` seconds ago."""
+        return self.checked_at is None or self._clock() - self.checked_at > max_age
+
+    def mark_current(self):
+        """Records that the contents were found to be up to date."""
+        self.checked_at = self._clock()
+
+    def add(self, title):
+        if not title:
+            return
+        with self._lock:
+            count = self._refs.get(title, 0)
+            self._refs[title] = count + 1
+            if count == 0:
+                for key in _keys(title):
+                    self._keys.add(key)
+
+    def discard(self, title):
+        """Drops one reference to ``title``; unknown titles are ignored."""
+        with self._lock:
+            count = self._refs.get(title)
+            if count is None:
+                return
+            if count > 1:
+                self._refs[title] = count - 1
+                return
+            del self._refs[title]
+            for key in _keys(title):
+                self._keys.discard(key)
+
+    def suggest(self, prefix, limit=10):
+        """
+        Returns up to ``limit`` distinct titles with a word-start match for
+        ``prefix`` at the start of the title (leading articles optional),
+        in case-insensitive alphabetical order.
+        """
+        folded = fold_title(prefix or '')
+        if not folded:
+            return []
+        suggestions = []
+        with self._lock:
+            for key, title in self._keys.irange(lower=(folded,)):
+                if not key.startswith(folded):
+                    break
+                if title not in suggestions:
+                    suggestions.append(title)
+                    if len(suggestions) == limit:
+                        break
+        return suggestions
@@ -0,0 +1,207 @@
+"""
+Materialized per-user collection statistics.
+
+Three summary tables are kept current by triggers on ``movies``:
+
+* ``user_stats``: movie count, rated-movie count and rating sum per user.
+* ``user_decade_stats``: movies per release decade per user.
+* ``user_director_stats``: movies per director per user.
+
+Rows with ``user_id = ALL_USERS`` (0) hold the totals across all users, so
+global statistics are single-key lookups as well. Every trigger adjusts
+the owner's row and the ALL_USERS row by one movie; the update trigger
+only fires for the columns the summaries depend on.
+
+``check_consistency`` recomputes the summaries from ``movies`` and diffs
+them against the stored rows; ``rebuild`` replaces the stored rows.
+"""
+
+ALL_USERS = 0
+RATING_TOLERANCE = 1e-6
+
+# Movies with an unknown year or director are counted in user_stats only.
+DECADE_EXPR = "CAST({row}year AS INTEGER) / 10 * 10"
+DECADE_FILTER = "{row}year IS NOT NULL"
+DIRECTOR_EXPR = "TRIM({row}director)"
+DIRECTOR_FILTER = "TRIM({row}director) NOT IN ('', 'N/A')"
+
+
+def _row(expr, row):
+    return expr.format(row=f"{row}." if row else '')
+
+
+def _increment(row):
+    """Trigger statements adding movie ``row`` (``new``) to the summaries."""
+    return f"""
+        INSERT INTO user_stats (user_id, movie_count, rated_count, rating_sum)
+        VALUES ({row}.user_id, 1, {row}.rating IS NOT NULL, COALESCE({row}.rating, 0)),
+               ({ALL_USERS}, 1, {row}.rating IS NOT NULL, COALESCE({row}.rating, 0))
+        ON CONFLICT (user_id) DO UPDATE SET movie_count = movie_count + 1,
+            rated_count = rated_count + excluded.rated_count, rating_sum = rating_sum + excluded.rating_sum;
+        INSERT INTO user_decade_stats (user_id, decade, movie_count)
+        SELECT owner, {_row(DECADE_EXPR, row)}, 1
+        FROM (SELECT {row}.user_id AS owner UNION ALL SELECT {ALL_USERS})
+        WHERE {_row(DECADE_FILTER, row)}
+        ON CONFLICT (user_id, decade) DO UPDATE SET movie_count = movie_count + 1;
+        INSERT INTO user_director_stats (user_id, director, movie_count)
+        SELECT owner, {_row(DIRECTOR_EXPR, row)}, 1
+        FROM (SELECT {row}.user_id AS owner UNION ALL SELECT {ALL_USERS})
+        WHERE {_row(DIRECTOR_FILTER, row)}
+        ON CONFLICT (user_id, director) DO UPDATE SET movie_count = movie_count + 1;
+    """
+
+
+def _decrement(row):
+    """Trigger statements removing movie ``row`` (``old``) from the summaries."""
+    owners = f"user_id IN ({row}.user_id, {ALL_USERS})"
+    decade = f"{owners} AND decade = {_row(DECADE_EXPR, row)}"
+    director = f"{owners} AND director = {_row(DIRECTOR_EXPR, row)}"
+    return f"""
+        UPDATE user_stats SET movie_count = movie_count - 1,
+            rated_count = rated_count - ({row}.rating IS NOT NULL),
+            rating_sum = rating_sum - COALESCE({row}.rating, 0)
+        WHERE {owners};
+        UPDATE user_decade_stats SET movie_count = movie_count - 1 WHERE {decade};
+        DELETE FROM user_decade_stats WHERE {decade} AND movie_count <= 0;
+        UPDATE user_director_stats SET movie_count = movie_count - 1 WHERE {director};
+        DELETE FROM user_director_stats WHERE {director} AND movie_count <= 0;
+    """
+
+
+# DDL applied by schema migration 10.
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS user_stats (
+        user_id INTEGER PRIMARY KEY,
+        movie_count INTEGER NOT NULL DEFAULT 0,
+        rated_count INTEGER NOT NULL DEFAULT 0,
+        rating_sum REAL NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS user_decade_stats (
+        user_id INTEGER NOT NULL,
+        decade INTEGER NOT NULL,
+        movie_count INTEGER NOT NULL,
+        PRIMARY KEY (user_id, decade)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS user_director_stats (
+        user_id INTEGER NOT NULL,
+        director TEXT NOT NULL,
+        movie_count INTEGER NOT NULL,
+        PRIMARY KEY (user_id, director)
+    ) WITHOUT ROWID
+    """,
+    # Top directors are read in count order without sorting the whole partition.
+    """
+    CREATE INDEX IF NOT EXISTS idx_user_director_stats_top
+    ON user_director_stats (user_id, movie_count DESC, director)
+    """,
+    f"CREATE TRIGGER IF NOT EXISTS user_stats_movies_ai AFTER INSERT ON movies BEGIN {_increment('new')} END",
+    f"CREATE TRIGGER IF NOT EXISTS user_stats_movies_ad AFTER DELETE ON movies BEGIN {_decrement('old')} END",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS user_stats_movies_au AFTER UPDATE OF user_id, director, year, rating ON movies
+    BEGIN {_decrement('old')} {_increment('new')} END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS user_stats_users_ad AFTER DELETE ON users BEGIN
+        DELETE FROM user_stats WHERE user_id = old.id;
+        DELETE FROM user_decade_stats WHERE user_id = old.id;
+        DELETE FROM user_director_stats WHERE user_id = old.id;
+    END
+    """,
+)
+
+# Summary table -> (key columns, value columns, query computing it from movies).
+SOURCES = {
+    'user_stats': (('user_id',), ('movie_count', 'rated_count', 'rating_sum'), f"""
+        SELECT user_id, COUNT(*), COUNT(rating), COALESCE(SUM(rating), 0) FROM movies GROUP BY user_id
+        UNION ALL
+        SELECT {ALL_USERS}, COUNT(*), COUNT(rating), COALESCE(SUM(rating), 0) FROM movies
+    """),
+    'user_decade_stats': (('user_id', 'decade'), ('movie_count',), f"""
+        SELECT user_id, {_row(DECADE_EXPR, '')}, COUNT(*) FROM movies
+        WHERE {_row(DECADE_FILTER, '')} GROUP BY 1, 2
+        UNION ALL
+        SELECT {ALL_USERS}, {_row(DECADE_EXPR, '')}, COUNT(*) FROM movies
+        WHERE {_row(DECADE_FILTER, '')} GROUP BY 2
+    """),
+    'user_director_stats': (('user_id', 'director'), ('movie_count',), f"""
+        SELECT user_id, {_row(DIRECTOR_EXPR, '')}, COUNT(*) FROM movies
+        WHERE {_row(DIRECTOR_FILTER, '')} GROUP BY 1, 2
+        UNION ALL
+        SELECT {ALL_USERS}, {_row(DIRECTOR_EXPR, '')}, COUNT(*) FROM movies
+        WHERE {_row(DIRECTOR_FILTER, '')} GROUP BY 2
+    """),
+}
+
+
+def rebuild(conn):
+    """Recomputes every summary table from ``movies``. Does not commit."""
+    for table, (keys, values, query) in SOURCES.items():
+        conn.execute(f"DELETE FROM {table}")
+        conn.execute(f"INSERT INTO {table} ({', '.join(keys + values)}) {query}")
+
+
+def _load(conn, query, key_width):
+    """Maps key tuples to value tuples, dropping rows that count no movies."""
+    rows = {}
+    for row in conn.execute(query):
+        if row[key_width]:
+            rows[tuple(row[:key_width])] = tuple(row[key_width:])
+    return rows
+
+
+def _same(stored, expected):
+    return all(abs(a - b) <= RATING_TOLERANCE if isinstance(a, float) or isinstance(b, float) else a == b
+               for a, b in zip(stored, expected))
+
+
+def check_consistency(conn):
+    """
+    Diffs the stored summaries against a from-scratch recomputation.
+
+    Returns:
+        list: One message per differing row (empty when consistent).
+    """
+    differences = []
+    for table, (keys, values, query) in SOURCES.items():
+        expected = _load(conn, query, len(keys))
+        stored = _load(conn, f"SELECT {', '.join(keys + values)} FROM {table}", len(keys))
+        for key in sorted(expected.keys() | stored.keys(), key=repr):
+            want, have = expected.get(key), stored.get(key)
+            if want is None or have is None or not _same(have, want):
+                label = ', '.join(f"{name}={value!r}" for name, value in zip(keys, key))
+                differences.append(f"{table}({label}): stored {have}, expected {want}")
+    return differences
+
+
+def read_stats(conn, user_id, top_directors=5):
+    """
+    Returns the summary for ``user_id`` (ALL_USERS for the global totals).
+
+    Returns:
+        dict: ``movie_count``, ``rated_count``, ``average_rating`` (None when
+        nothing is rated), ``decades`` as (decade, count) pairs in decade
+        order and ``top_directors`` as (director, count) pairs.
+    """
+    row = conn.execute(
+        "SELECT movie_count, rated_count, rating_sum FROM user_stats WHERE user_id = ?", (user_id,)
+    ).fetchone()
+    movie_count, rated_count, rating_sum = row or (0, 0, 0.0)
+    decades = conn.execute(
+        "SELECT decade, movie_count FROM user_decade_stats WHERE user_id = ? ORDER BY decade", (user_id,)
+    ).fetchall()
+    directors = conn.execute(
+        "SELECT director, movie_count FROM user_director_stats WHERE user_id = ? "
+        "ORDER BY movie_count DESC, director LIMIT ?", (user_id, top_directors)
+    ).fetchall()
+    return {
+        'movie_count': movie_count,
+        'rated_count': rated_count,
+        'average_rating': round(rating_sum / rated_count, 2) if rated_count else None,
+        'decades': [tuple(row) for row in decades],
+        'top_directors': [tuple(row) for row in directors],
+    }
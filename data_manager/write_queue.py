@@ -0,0 +1,234 @@
+import sqlite3
+import logging
+import threading
+import queue
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+# Pragmas applied to every connection in high-concurrency mode.
+# WAL lets readers proceed while the single writer commits; NORMAL
+# synchronous is durable across application crashes in WAL mode and
+# avoids an fsync per transaction; cache_size is in KiB when negative.
+WAL_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -20000",
+    "PRAGMA temp_store = MEMORY",
+)
+
+# Transaction control issued by the writer itself. The marker keeps their text,
+# and so their cached prepared statements, apart from any an operation runs.
+_BEGIN = "BEGIN IMMEDIATE /* write queue */"
+_SAVEPOINT = "SAVEPOINT op /* write queue */"
+_RELEASE = "RELEASE op /* write queue */"
+_ROLLBACK_TO = "ROLLBACK TO op /* write queue */"
+_COMMIT = "COMMIT /* write queue */"
+_ROLLBACK = "ROLLBACK /* write queue */"
+
+
+def apply_wal_pragmas(conn):
+    """Configures a connection for WAL journaling with tuned pragmas."""
+    for pragma in WAL_PRAGMAS:
+        conn.execute(pragma)
+
+
+class SQLiteWriteQueue:
+    """
+    Funnels all writes through one dedicated writer thread.
+
+    Queued write operations are group-committed: the writer drains up to
+    ``batch_size`` pending operations, runs each inside its own SAVEPOINT
+    (so one failing statement does not abort its neighbours) and commits
+    the whole batch with a single COMMIT. Operations cannot end that
+    transaction themselves: such statements are refused with
+    sqlite3.DatabaseError ("not authorized"), which fails only that operation.
+    """
+
+    _STOP = object()
+
+    def __init__(self, db_file, batch_size=64, timeout=10, connection_factory=sqlite3.Connection,
+                 execute_timeout=60):
+        """
+        Starts the writer thread.
+
+        Args:
+            db_file (str): Path to the SQLite database file.
+            batch_size (int): Maximum number of operations per commit.
+            timeout (float): SQLite busy timeout for the writer connection.
+            connection_factory (type): sqlite3.Connection subclass to open.
+            execute_timeout (float): Seconds ``execute()`` waits for its batch to commit.
+        """
+        self.db_file = db_file
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.connection_factory = connection_factory
+        self.execute_timeout = execute_timeout
+        self._queue = queue.Queue()
+        self._closed = False
+        self._in_operation = False  # Writer thread only; consulted by _authorize
+        self._ready = threading.Event()
+        self._startup_error = None
+        self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._startup_error:
+            raise self._startup_error
+
+    def submit(self, operation):
+        """
+        Queues ``operation(conn)`` for the writer and returns a Future.
+
+        The Future resolves to the operation's return value once its batch
+        has been committed, or carries the exception it raised.
+        """
+        if self._closed or not self._thread.is_alive():
+            raise sqlite3.OperationalError("Write queue is closed.")
+        future = Future()
+        self._queue.put((operation, future))
+        return future
+
+    def execute(self, operation, timeout=None):
+        """
+        Submits an operation and blocks until its batch is committed.
+
+        Raises sqlite3.OperationalError if that takes longer than ``timeout``
+        seconds (default ``execute_timeout``); the operation may still run.
+        """
+        timeout = self.execute_timeout if timeout is None else timeout
+        try:
+            return self.submit(operation).result(timeout)
+        except FutureTimeoutError:
+            raise sqlite3.OperationalError(f"Write not committed within {timeout}s.") from None
+
+    def _connect(self):
+        """Opens the writer's connection in manual transaction mode."""
+        conn = sqlite3.connect(self.db_file, timeout=self.timeout, isolation_level=None,
+                               factory=self.connection_factory)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        apply_wal_pragmas(conn)
+        # Installed once: changing the authorizer would expire every prepared statement
+        conn.set_authorizer(self._authorize)
+        return conn
+
+    def _authorize(self, action, arg1, arg2, db_name, trigger):
+        """
+        While an operation runs, refuses BEGIN/COMMIT/ROLLBACK and releasing
+        or rolling back the writer's savepoint; operations may still use
+        savepoints of their own. Checked when a statement is prepared.
+        """
+        if not self._in_operation:
+            return sqlite3.SQLITE_OK
+        if action == sqlite3.SQLITE_TRANSACTION:
+            return sqlite3.SQLITE_DENY
+        if action == sqlite3.SQLITE_SAVEPOINT and arg1 != 'BEGIN' and (arg2 or '').lower() == 'op':
+            return sqlite3.SQLITE_DENY
+        return sqlite3.SQLITE_OK
+
+    def _drain(self, first):
+        """Collects the first item plus whatever else is already waiting."""
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is self._STOP:
+                self._queue.put(self._STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        """Writer loop: drain, apply each op in a savepoint, commit once."""
+        try:
+            conn = self._connect()
+        except sqlite3.Error as e:
+            logging.exception(f"Failed to open writer connection to {self.db_file}: {e}")
+            self._startup_error = e
+            self._ready.set()
+            return
+        self._ready.set()
+
+        while True:
+            item = self._queue.get()
+            if item is self._STOP:
+                break
+            batch = self._drain(item)
+            conn = self._commit_batch(conn, batch)
+
+        conn.close()
+        logging.info(f"Writer thread for {self.db_file} stopped.")
+
+    def _commit_batch(self, conn, batch):
+        """
+        Runs one batch of operations inside a single transaction.
+
+        If the transaction itself fails (BEGIN, a savepoint or COMMIT
+        raising, e.g. SQLITE_BUSY or a broken connection), the batch is
+        rolled back and all its futures fail; the writer keeps running.
+        Returns the connection to use for the next batch.
+        """
+        try:
+            outcomes = self._apply_batch(conn, batch)
+        except Exception as e:
+            logging.exception(f"Writer failed to commit batch of {len(batch)}: {e}")
+            try:
+                conn.execute(_ROLLBACK)
+            except sqlite3.Error:
+                pass
+            for _, future in batch:
+                future.set_exception(e)
+            return self._reconnect_if_broken(conn)
+
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+        return conn
+
+    def _apply_batch(self, conn, batch):
+        """Applies each operation in its own savepoint and commits; returns (future, result, error) tuples."""
+        outcomes = []
+        conn.execute(_BEGIN)
+        for operation, future in batch:
+            conn.execute(_SAVEPOINT)
+            self._in_operation = True
+            try:
+                result = operation(conn)
+            except Exception as e:
+                self._in_operation = False
+                conn.execute(_ROLLBACK_TO)
+                conn.execute(_RELEASE)
+                outcomes.append((future, None, e))
+                continue
+            self._in_operation = False
+            conn.execute(_RELEASE)
+            outcomes.append((future, result, None))
+        conn.execute(_COMMIT)
+        return outcomes
+
+    def _reconnect_if_broken(self, conn):
+        """Replaces the writer connection if it can no longer run statements."""
+        try:
+            conn.execute("SELECT 1")
+            return conn
+        except sqlite3.Error:
+            pass
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        try:
+            return self._connect()
+        except sqlite3.Error as e:
+            logging.exception(f"Writer could not reopen {self.db_file}: {e}")
+            return conn # Later batches fail (and retry the reconnect) instead of hanging
+
+    def close(self):
+        """Flushes pending writes and stops the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(self._STOP)
+        self._thread.join()
@@ -0,0 +1,64 @@
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class StubImageServer:
+    """
+    Local stand-in for a poster image host, for tests and benchmarks.
+
+    ``images`` maps paths (e.g. ``'/heat.jpg'``) to ``(content_type, bytes)``;
+    ``redirects`` maps paths to a Location answered with a 302; other
+    paths answer ``default`` when given, else 404. ``delay`` adds latency (seconds) to every response.
+    Requested paths are recorded in ``requests``.
+    """
+
+    def __init__(self, images=None, delay=0.0, redirects=None, default=None):
+        self.images = dict(images or {})
+        self.default = default
+        self.redirects = dict(redirects or {})
+        self.delay = delay
+        self.requests = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                stub._handle(self)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def _handle(self, handler):
+        with self._lock:
+            self.requests.append(handler.path)
+        if self.delay:
+            time.sleep(self.delay)
+        if handler.path in self.redirects:
+            handler.send_response(302)
+            handler.send_header('Location', self.redirects[handler.path])
+            handler.send_header('Content-Length', '0')
+            handler.end_headers()
+            return
+        found = self.images.get(handler.path, self.default)
+        content_type, body = found or ('text/plain', b'Not found')
+        handler.send_response(200 if found else 404)
+        handler.send_header('Content-Type', content_type)
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,89 @@
+import json
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+
+class StubOMDbServer:
+    """
+    Local stand-in for the OMDb API, for tests and benchmarks.
+
+    ``movies`` maps lower-cased titles to response dicts. ``failures`` maps
+    lower-cased titles to how many times the server should answer 500
+    before succeeding, and ``drops`` how many times it should close the
+    connection without answering. ``delay`` adds latency (seconds) to
+    every response and ``trickle`` (seconds) between the bytes of each
+    body; both may be changed while the server runs.
+    """
+
+    def __init__(self, movies=None, failures=None, delay=0.0, drops=None, trickle=0.0):
+        self.movies = {k.lower(): v for k, v in (movies or {}).items()}
+        self.failures = {k.lower(): v for k, v in (failures or {}).items()}
+        self.drops = {k.lower(): v for k, v in (drops or {}).items()}
+        self.delay = delay
+        self.trickle = trickle
+        self.requests = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                stub._handle(self)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def _handle(self, handler):
+        query = parse_qs(urlparse(handler.path).query)
+        title = query.get('t', [''])[0]
+        key = title.lower()
+        with self._lock:
+            self.requests.append(title)
+            failing = self.failures.get(key, 0) > 0
+            if failing:
+                self.failures[key] -= 1
+            dropping = not failing and self.drops.get(key, 0) > 0
+            if dropping:
+                self.drops[key] -= 1
+        if self.delay:
+            time.sleep(self.delay)
+        if dropping:
+            handler.close_connection = True
+            return
+        if failing:
+            status, payload = 500, {'Response': 'False', 'Error': 'Internal error'}
+        elif key in self.movies:
+            status, payload = 200, dict({'Response': 'True', 'Title': title}, **self.movies[key])
+        else:
+            status, payload = 200, {'Response': 'False', 'Error': 'Movie not found!'}
+        body = json.dumps(payload).encode('utf-8')
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        if not self.trickle:
+            handler.wfile.write(body)
+            return
+        for i in range(len(body)):
+            try:
+                handler.wfile.write(body[i:i + 1])
+                handler.wfile.flush()
+            except OSError:
+                return # The client gave up
+            time.sleep(self.trickle)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,61 @@
+import os
+import sys
+import sqlite3
+import subprocess
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import create_app, make_bulk_fetcher
+from data_manager import migrations
+
+REPO = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def test_import_does_not_touch_the_database(tmp_path):
+    result = subprocess.run([sys.executable, '-c', f"import sys; sys.path.insert(0, {REPO!r}); import app"],
+                            cwd=tmp_path, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert not (tmp_path / 'movies.db').exists()
+
+
+def test_database_opened_on_first_request(tmp_path):
+    db_file = tmp_path / 'lazy.db'
+    app = create_app({'DATABASE': str(db_file), 'TESTING': True})
+    assert not db_file.exists()
+    assert app.test_client().get('/users').status_code == 200
+    assert db_file.exists()
+    app.extensions['movieweb'].close()
+
+
+def test_apps_are_isolated(tmp_path):
+    first = create_app({'DATABASE': str(tmp_path / 'one.db'), 'TESTING': True})
+    second = create_app({'DATABASE': str(tmp_path / 'two.db'), 'TESTING': True})
+    first.test_client().post('/add_user', data={'username': 'alice'})
+    assert b'alice' in first.test_client().get('/users').data
+    assert b'alice' not in second.test_client().get('/users').data
+    for app in (first, second):
+        app.extensions['movieweb'].close()
+
+
+def test_migrate_command_replaces_per_process_schema_check(tmp_path):
+    db_file = str(tmp_path / 'deploy.db')
+    app = create_app({'DATABASE': db_file, 'DB_AUTO_MIGRATE': False, 'TESTING': True})
+    result = app.test_cli_runner().invoke(args=['migrate'])
+    assert result.exit_code == 0 and 'schema at version' in result.output
+    conn = sqlite3.connect(db_file)
+    assert migrations.current_version(conn) == migrations.latest_version()
+    conn.close()
+    assert app.test_client().get('/users').status_code == 200
+    app.extensions['movieweb'].close()
+
+
+def test_settings_are_read_from_the_app_config(tmp_path):
+    app = create_app({'DATABASE': str(tmp_path / 'config.db'), 'PAGE_SIZE': 2, 'OMDB_BULK_WORKERS': 3,
+                      'OMDB_BULK_RATE': 4.0, 'TESTING': True})
+    client = app.test_client()
+    for name in ('alice', 'bob', 'carol'):
+        client.post('/add_user', data={'username': name})
+    page = app.test_client().get('/users').data # A fresh client: no flashed messages
+    assert sum(name in page for name in (b'alice', b'bob', b'carol')) == 2
+    with app.test_request_context():
+        fetcher = make_bulk_fetcher()
+        assert fetcher.workers == 3 and fetcher.bucket.rate == 4.0
+    app.extensions['movieweb'].close()
@@ -0,0 +1,84 @@
+import os
+import sys
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import app as app_module
+from data_manager.sqlite_data_manager import SQLiteDataManager
+
+
+@pytest.fixture
+def dm(tmp_path, monkeypatch):
+    dm = SQLiteDataManager(str(tmp_path / 'batch.db'))
+    dm.add_user('alice')
+    dm.add_user('bob')
+    dm.add_movies_bulk(1, [(f'Movie {i}', 'Director', 2000 + i, '', '', 5.0) for i in range(5)])
+    dm.add_movie(2, 'Bob Movie', 'Director', 1999, '', '', 7.0)
+    monkeypatch.setattr(app_module, 'data_manager', dm)
+    app_module.app.config['TESTING'] = True
+    yield dm
+    dm.close()
+
+
+def owned_ids(dm, user_id):
+    return sorted(m['id'] for m in dm.get_movies_for_user(user_id))
+
+
+def test_delete_movies_skips_other_users_rows(dm):
+    assert dm.delete_movies(1, [1, 2, 6, 99]) == 2
+    assert owned_ids(dm, 1) == [3, 4, 5]
+    assert owned_ids(dm, 2) == [6]
+    assert dm.delete_movies(1, []) == 0
+
+
+def test_update_movies_sets_only_given_fields(dm):
+    assert dm.update_movies(1, [1, 2, 6], {'rating': 9.5}) == 2
+    movies = {m['id']: m for m in dm.get_movies_for_user(1)}
+    assert movies[1]['rating'] == movies[2]['rating'] == 9.5
+    assert movies[1]['year'] == 2000 and movies[3]['rating'] == 5.0
+    assert dm.get_movie_by_id(6)['rating'] == 7.0
+    with pytest.raises(ValueError):
+        dm.update_movies(1, [1], {'title': 'Nope'})
+
+
+def test_move_movies_is_atomic(dm):
+    assert dm.move_movies(1, [1, 2], 2) == 2
+    assert owned_ids(dm, 2) == [1, 2, 6]
+    # A missing target violates the foreign key and rolls back the whole batch
+    assert dm.move_movies(1, [3, 4], 99) is None
+    assert owned_ids(dm, 1) == [3, 4, 5]
+
+
+def test_batch_runs_one_executemany_and_commit(tmp_path):
+    dm = SQLiteDataManager(str(tmp_path / 'trace.db'), pool_size=1)
+    dm.add_user('alice')
+    dm.add_movies_bulk(1, [(f'Movie {i}', None, None, '', '', None) for i in range(100)])
+    statements = []
+    with dm._get_connection() as conn:
+        conn.set_trace_callback(statements.append)
+    assert dm.update_movies(1, list(range(1, 101)), {'year': 2001, 'rating': 6.0}) == 100
+    dm.close()
+    assert sum(1 for s in statements if s.strip().upper() == 'COMMIT') == 1
+    assert sum(1 for s in statements if s.strip().upper().startswith('BEGIN')) == 1
+
+
+def test_batch_routes_validate_like_single_routes(dm):
+    client = app_module.app.test_client()
+    response = client.post('/users/1/movies/update', data={'movie_ids': ['1', '2'], 'rating': '11'},
+                           follow_redirects=True)
+    assert b'Rating must be between 0.0 and 10.0.' in response.data
+    assert dm.get_movie_by_id(1)['rating'] == 5.0
+
+    response = client.post('/users/1/movies/update', data={'movie_ids': ['1', '2', '6'], 'year': '1984'},
+                           follow_redirects=True)
+    assert b'2 movie(s) updated.' in response.data and b'1 selected movie(s) were not found' in response.data
+    assert dm.get_movie_by_id(2)['year'] == 1984
+
+    response = client.post('/users/1/movies/move', data={'movie_ids': ['3'], 'target_user_id': '42'},
+                           follow_redirects=True)
+    assert b'Target user not found.' in response.data
+    client.post('/users/1/movies/move', data={'movie_ids': ['3'], 'target_user_id': '2'})
+    assert dm.get_movie_by_id(3)['user_id'] == 2
+
+    response = client.post('/users/1/movies/delete', data={'movie_ids': ['4', 'x']}, follow_redirects=True)
+    assert b'1 movie(s) deleted.' in response.data
+    assert dm.get_movie_by_id(4) is None
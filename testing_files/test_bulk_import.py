@@ -0,0 +1,89 @@
+import os
+import sys
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from omdb_stub import StubOMDbServer
+from data_manager.sqlite_data_manager import SQLiteDataManager
+from data_manager.bulk_import import BulkOMDbFetcher, TokenBucket, clean_titles, import_titles
+from data_manager.omdb_client import CircuitBreaker, OMDbClient
+
+
+def parse(movie_data, title):
+    return {'title': movie_data.get('Title', title), 'director': movie_data.get('Director'),
+            'year': int(movie_data['Year']) if movie_data.get('Year') else None,
+            'plot': movie_data.get('Plot', ''), 'poster': '', 'rating': None}
+
+
+@pytest.fixture
+def dm(tmp_path):
+    dm = SQLiteDataManager(str(tmp_path / 'bulk.db'))
+    dm.add_user('alice')
+    yield dm
+    dm.close()
+
+
+def test_clean_titles_drops_blanks_and_duplicates():
+    assert clean_titles(['Heat', '', '  heat ', 'Alien\n']) == ['Heat', 'Alien']
+
+
+def test_token_bucket_limits_rate():
+    now = [0.0]
+    slept = []
+
+    def sleep(seconds):
+        slept.append(seconds)
+        now[0] += seconds
+
+    bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0], sleep=sleep)
+    for _ in range(4):
+        bucket.acquire()
+    assert now[0] == pytest.approx(1.0)
+
+
+def test_import_against_stub_server(dm):
+    movies = {f'Movie {i}': {'Director': f'Director {i}', 'Year': str(1990 + i)} for i in range(20)}
+    titles = list(movies) + ['Flaky', 'Missing']
+    movies['Flaky'] = {'Director': 'Someone', 'Year': '2001'}
+    with StubOMDbServer(movies, failures={'Flaky': 2}) as stub:
+        fetcher = BulkOMDbFetcher('key', base_url=stub.url, workers=4, rate=1000, backoff=0.01,
+                                  cache=dm.omdb_cache)
+        report = import_titles(dm, 1, titles, parse, fetcher, batch_size=7)
+        fetcher.close()
+
+        statuses = {entry['title']: entry['status'] for entry in report}
+        assert statuses['Flaky'] == 'added'
+        assert statuses['Missing'] == 'failed'
+        assert [entry['title'] for entry in report] == titles
+        assert len(dm.get_movies_for_user(1)) == 21
+        assert stub.requests.count('Flaky') == 3
+
+        # A second import is answered from the OMDb cache.
+        before = len(stub.requests)
+        fetcher = BulkOMDbFetcher('key', base_url=stub.url, cache=dm.omdb_cache)
+        report = import_titles(dm, 1, ['Movie 1', 'Missing'], parse, fetcher)
+        fetcher.close()
+        assert len(stub.requests) == before
+        assert [entry['status'] for entry in report] == ['added', 'failed']
+
+
+def test_persistent_failures_are_reported(dm):
+    with StubOMDbServer({'Down': {'Year': '2000'}}, failures={'Down': 10}) as stub:
+        fetcher = BulkOMDbFetcher('key', base_url=stub.url, retries=2, backoff=0.01, rate=1000)
+        report = import_titles(dm, 1, ['Down'], parse, fetcher)
+        fetcher.close()
+    assert report[0]['status'] == 'failed' and 'HTTP 500' in report[0]['detail']
+    assert dm.get_movies_for_user(1) == []
+
+
+def test_shared_client_circuit_stops_the_import(dm):
+    breaker = CircuitBreaker(failure_threshold=2, reset_after=60)
+    with StubOMDbServer({'Heat': {'Year': '1995'}}, failures={'Down': 10}) as stub:
+        client = OMDbClient('key', stub.url, breaker=breaker)
+        fetcher = BulkOMDbFetcher(workers=1, retries=5, backoff=0.01, rate=1000, client=client)
+        report = import_titles(dm, 1, ['Down', 'Heat'], parse, fetcher)
+        fetcher.close()
+        assert stub.requests == ['Down', 'Down'] # Then the circuit opened
+        client.close()
+    assert [entry['status'] for entry in report] == ['failed', 'failed']
+    assert 'not retrying' in report[1]['detail']
@@ -0,0 +1,100 @@
+import os
+import sys
+import sqlite3
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import app as app_module
+from data_manager import migrations
+from data_manager.sqlite_data_manager import SQLiteDataManager
+
+HEAT = {'Title': 'Heat', 'Director': 'Michael Mann', 'Year': '1995', 'Plot': 'A heist crew and a detective.',
+        'Poster': 'https://img.example.com/heat.jpg', 'imdbRating': '8.3', 'imdbID': 'tt0113277',
+        'Response': 'True'}
+
+
+@pytest.fixture
+def dm(tmp_path):
+    dm = SQLiteDataManager(str(tmp_path / 'catalog.db'))
+    dm.add_user('alice')
+    dm.add_user('bob')
+    yield dm
+    dm.close()
+
+
+def fields(movie_data=HEAT):
+    return app_module.movie_fields_from_omdb(movie_data, movie_data['Title'])
+
+
+def heat_row(rating=8.3):
+    f = fields()
+    return (f['title'], f['director'], f['year'], f['plot'], f['poster'], rating, f['imdb_id'])
+
+
+def raw_movie(dm, movie_id):
+    conn = sqlite3.connect(dm.db_file)
+    row = conn.execute("SELECT plot, poster, catalog_id FROM movies WHERE id = ?", (movie_id,)).fetchone()
+    conn.close()
+    return row
+
+
+def test_omdb_movies_share_one_catalog_entry(dm):
+    f = fields()
+    assert dm.add_movie(1, f['title'], f['director'], f['year'], f['plot'], f['poster'], 9.0, imdb_id=f['imdb_id'])
+    assert dm.add_movies_bulk(2, [heat_row(7.5)]) == 1
+    alice, bob = dm.get_movies_for_user(1)[0], dm.get_movies_for_user(2)[0]
+    assert (alice.plot, alice.poster, alice.rating) == (HEAT['Plot'], HEAT['Poster'], 9.0)
+    assert bob.plot == HEAT['Plot'] and bob.rating == 7.5
+    assert dm.get_movie_summaries_for_user(2)[0].poster == HEAT['Poster']
+    assert raw_movie(dm, alice.id)[:2] == (None, None)
+    assert raw_movie(dm, alice.id)[2] == raw_movie(dm, bob.id)[2]
+    assert [hit.id for hit in dm.search_movies('detective')] == [alice.id, bob.id]
+
+
+def test_edits_override_only_the_users_copy(dm):
+    dm.add_movies_bulk(1, [heat_row()])
+    dm.add_movies_bulk(2, [heat_row()])
+    dm.update_movie(1, 'Heat', 'Michael Mann', 1995, 'My own notes.', HEAT['Poster'], 10.0)
+    assert dm.get_movie_by_id(1).plot == 'My own notes.'
+    assert dm.get_movie_by_id(2).plot == HEAT['Plot']
+    assert raw_movie(dm, 1)[:2] == ('My own notes.', None)
+    assert dm.search_movies('notes')[0].id == 1
+    assert [hit.id for hit in dm.search_movies('heist')] == [2]
+
+
+def test_fetch_job_completion_links_the_catalog(dm):
+    job = dm.create_fetch_job(1, 'heat')
+    assert dm.complete_fetch_job(job['job_id'], job['movie_id'], fields())
+    assert raw_movie(dm, job['movie_id'])[:2] == (None, None)
+    assert dm.get_movie_by_id(job['movie_id']).poster == HEAT['Poster']
+
+
+def test_backfill_links_existing_rows_from_cached_responses(dm):
+    f = fields()
+    old_rows = [(f['title'], f['director'], f['year'], f['plot'], f['poster'], 8.3)] * 3
+    dm.add_movies_bulk(1, old_rows + [('Home Video', 'Me', 2020, 'Unique plot', '', None)])
+    dm.omdb_cache.put('Heat', HEAT)
+    assert dm.backfill_catalog(app_module.movie_fields_from_omdb, batch_size=2) == {'scanned': 4, 'linked': 3}
+    assert [raw_movie(dm, movie_id)[:2] for movie_id in (1, 2, 3)] == [(None, None)] * 3
+    assert raw_movie(dm, 4) == ('Unique plot', '', None)
+    assert [movie.plot for movie in dm.get_movies_for_user(1)][:3] == [f['plot']] * 3
+    assert dm.check_stats_consistency() == []
+    assert dm.backfill_catalog(app_module.movie_fields_from_omdb) == {'scanned': 1, 'linked': 0}
+    dm.delete_movies(1, [1, 2, 3])
+    assert dm.prune_catalog() == 1
+
+
+def test_migration_keeps_existing_rows_readable(tmp_path):
+    db = str(tmp_path / 'old.db')
+    conn = sqlite3.connect(db)
+    migrations.apply_migrations(conn, target=10)
+    conn.execute("INSERT INTO users (username) VALUES ('carol')")
+    conn.execute("INSERT INTO movies (user_id, title, director, year, plot, poster, rating) "
+                 "VALUES (1, 'Heat', 'Michael Mann', 1995, 'A heist crew.', '', 8.3)")
+    conn.commit()
+    conn.close()
+    dm = SQLiteDataManager(db)
+    try:
+        assert dm.get_movie_by_id(1).plot == 'A heist crew.'
+        assert dm.search_movies('heist')[0].id == 1
+    finally:
+        dm.close()
@@ -0,0 +1,108 @@
+import io
+import os
+import sys
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import app as app_module
+from data_manager.collection_io import (export_csv, export_jsonl, iter_csv_records,
+                                       iter_jsonl_records, import_records, ImportAborted)
+from data_manager.sqlite_data_manager import SQLiteDataManager
+
+
+@pytest.fixture
+def dm(tmp_path):
+    dm = SQLiteDataManager(str(tmp_path / 'collection.db'))
+    dm.add_user('alice')
+    dm.add_user('bob')
+    dm.add_movies_bulk(1, [
+        ('Heat', 'Michael Mann', 1995, 'Cops, robbers\nand "coffee".', 'https://example.com/heat.jpg', 8.3),
+        ('Alien', None, None, '', '', None),
+    ])
+    yield dm
+    dm.close()
+
+
+@pytest.mark.parametrize('export, parse', [(export_csv, iter_csv_records),
+                                           (export_jsonl, iter_jsonl_records)])
+def test_round_trip(dm, export, parse):
+    text = ''.join(export(dm.iter_movies_for_user(1), chunk_rows=1))
+    summary = import_records(dm, 2, parse(io.StringIO(text, newline='')), app_module.validate_movie_record)
+    assert summary == {'imported': 2, 'rejected': 0, 'errors': []}
+    fields = lambda m: (m['title'], m['director'], m['year'], m['plot'], m['poster'], m['rating'])
+    assert [fields(m) for m in dm.get_movies_for_user(2)] == [fields(m) for m in dm.get_movies_for_user(1)]
+
+
+def test_invalid_rows_are_reported_with_line_numbers(dm):
+    text = ('title,director,year,plot,poster,rating\n'
+            'Good,,2001,,,\n'
+            ',,,,,\n'
+            'Bad Year,,19x5,,,\n'
+            'Bad Rating,,,,,11\n')
+    summary = import_records(dm, 2, iter_csv_records(io.StringIO(text)), app_module.validate_movie_record)
+    assert summary['imported'] == 1 and summary['rejected'] == 3
+    assert [e.split(':')[0] for e in summary['errors']] == ['Line 3', 'Line 4', 'Line 5']
+
+    jsonl = '{"title": "Ok"}\nnot json\n[1, 2]\n'
+    summary = import_records(dm, 2, iter_jsonl_records(io.StringIO(jsonl)), app_module.validate_movie_record)
+    assert summary['imported'] == 1 and summary['errors'][0].startswith('Line 2')
+
+
+def test_import_is_chunked(dm, monkeypatch):
+    batches = []
+    original = dm.add_movies_bulk
+    monkeypatch.setattr(dm, 'add_movies_bulk', lambda user_id, rows: batches.append(len(rows)) or original(user_id, rows))
+    records = ((n, {'title': f'Movie {n}'}) for n in range(1, 8))
+    summary = import_records(dm, 2, records, app_module.validate_movie_record, batch_size=3)
+    assert summary['imported'] == 7 and batches == [3, 3, 1]
+
+
+def test_export_and_upload_routes(dm, monkeypatch):
+    monkeypatch.setattr(app_module, 'data_manager', dm)
+    app_module.app.config['TESTING'] = True
+    client = app_module.app.test_client()
+    response = client.get('/users/1/export.csv')
+    assert response.status_code == 200 and 'alice_movies.csv' in response.headers['Content-Disposition']
+    response = client.post('/users/2/import_collection', content_type='multipart/form-data',
+                           data={'collection_file': (io.BytesIO(response.data), 'alice.csv')})
+    assert response.status_code == 302
+    assert len(dm.get_movies_for_user(2)) == 2
+
+
+def flashed(client):
+    with client.session_transaction() as session:
+        return [message for _, message in session.get('_flashes', [])]
+
+
+def test_oversized_field_stops_the_import_cleanly(dm, monkeypatch, tmp_path):
+    monkeypatch.setattr(app_module, 'data_manager', dm)
+    app_module.app.config['TESTING'] = True
+    text = 'title,plot\n' + ''.join(f'Movie {n},Short.\n' for n in range(4)) + 'Long,' + 'x' * 200000 + '\nLast,\n'
+    client = app_module.app.test_client()
+    response = client.post('/users/2/import_collection', content_type='multipart/form-data',
+                           data={'collection_file': (io.BytesIO(text.encode()), 'long.csv')})
+    assert response.status_code == 302
+    assert any('field larger than field limit' in m and '4 movies before' in m for m in flashed(client))
+    assert len(dm.get_movies_for_user(2, limit=None)) == 4
+
+    path = tmp_path / 'long.csv'
+    path.write_text(text)
+    result = app_module.app.test_cli_runner().invoke(args=['import-collection', '2', str(path)])
+    assert result.exit_code == 1 and 'Line 6' in result.output and '4 movies before' in result.output
+
+
+def test_bad_byte_midway_reports_the_rows_already_imported(dm, monkeypatch):
+    good = b'title,year\n' + b''.join(b'Movie %d,1999\n' % n for n in range(3000))
+    stream = io.BytesIO(good + b'Caf\xe9,2000\n' + b'After,2001\n')
+    records = app_module.parse_collection_stream('bad.csv', stream)
+    with pytest.raises(ImportAborted, match='not UTF-8') as aborted:
+        import_records(dm, 2, records, app_module.validate_movie_record, batch_size=500)
+    imported = aborted.value.summary['imported']
+    assert 0 < imported <= 3000 and len(dm.get_movies_for_user(2, limit=None)) == imported
+
+    monkeypatch.setattr(app_module, 'data_manager', dm)
+    app_module.app.config['TESTING'] = True
+    client = app_module.app.test_client()
+    response = client.post('/users/1/import_collection', content_type='multipart/form-data',
+                           data={'collection_file': (io.BytesIO(good + b'\xff\n'), 'bad.csv')})
+    assert response.status_code == 302
+    assert any('not UTF-8' in m and 'were imported' in m for m in flashed(client))
@@ -0,0 +1,83 @@
+import os
+import sys
+import threading
+import sqlite3
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from data_manager.connection_pool import SQLiteConnectionPool
+from data_manager.sqlite_data_manager import SQLiteDataManager
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = SQLiteConnectionPool(str(tmp_path / 'pool.db'), pool_size=2, timeout=0.2)
+    yield pool
+    pool.close()
+
+
+def test_connections_are_reused(pool):
+    """A released connection is handed out again instead of opening a new one."""
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        assert second is first
+    assert pool.stats()['open'] == 1
+
+
+def test_pool_size_is_enforced(pool):
+    """Checkouts beyond pool_size time out with an sqlite3 error."""
+    a = pool.acquire()
+    b = pool.acquire()
+    with pytest.raises(sqlite3.OperationalError):
+        pool.acquire()
+    pool.release(a)
+    pool.release(b)
+
+
+def test_waiting_thread_gets_released_connection(pool):
+    """A blocked checkout is served as soon as another thread releases."""
+    a = pool.acquire()
+    b = pool.acquire()
+    got = []
+    t = threading.Thread(target=lambda: got.append(pool.acquire()))
+    t.start()
+    pool.release(a)
+    t.join(1)
+    assert got == [a]
+    pool.release(b)
+    pool.release(got[0])
+
+
+def test_unhealthy_connection_is_replaced(pool):
+    """Idle connections that fail the health check are discarded."""
+    pool.health_check_interval = 0
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.close()
+    with pool.connection() as fresh:
+        assert fresh is not conn
+        assert fresh.execute("SELECT 1").fetchone()[0] == 1
+
+
+def test_open_transaction_is_rolled_back_on_release(pool):
+    """Uncommitted work never leaks to the next borrower."""
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.commit()
+        conn.execute("INSERT INTO t VALUES (1)")
+    with pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+
+def test_data_manager_uses_pool(tmp_path):
+    """Data manager calls share pooled connections and close cleanly."""
+    dm = SQLiteDataManager(str(tmp_path / 'dm.db'), pool_size=1)
+    assert dm.add_user('alice') is True
+    assert dm.add_user('alice') is False
+    user = dm.get_all_users()[0]
+    assert dm.add_movie(user['id'], 'Heat', 'Michael Mann', 1995, '', '', 8.3)
+    assert dm.get_movies_for_user(user['id'])[0]['title'] == 'Heat'
+    assert dm.pool.stats()['open'] == 1
+    dm.close()
+    with pytest.raises(sqlite3.OperationalError):
+        dm.pool.acquire()
@@ -0,0 +1,95 @@
+import os
+import sys
+import time
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from data_manager.sqlite_data_manager import SQLiteDataManager, OMDbException
+from data_manager.fetch_jobs import OMDbFetchWorker
+
+
+def parse(movie_data, title):
+    return {'title': movie_data.get('Title', title), 'director': movie_data.get('Director'),
+            'year': int(movie_data['Year']), 'plot': movie_data.get('Plot', ''), 'poster': '', 'rating': 8.0}
+
+
+@pytest.fixture
+def dm(tmp_path):
+    dm = SQLiteDataManager(str(tmp_path / 'jobs.db'))
+    dm.add_user('alice')
+    yield dm
+    dm.close()
+
+
+def test_job_fills_placeholder(dm, monkeypatch):
+    monkeypatch.setattr(dm, 'fetch_movie_details_from_omdb',
+                        lambda title: {'Title': 'Heat', 'Director': 'Michael Mann', 'Year': '1995'})
+    ids = dm.create_fetch_job(1, 'heat')
+    placeholder = dm.get_movie_by_id(ids['movie_id'])
+    assert placeholder['title'] == 'heat' and placeholder['director'] is None
+    assert dm.get_fetch_jobs_for_user(1)[ids['movie_id']]['status'] == 'pending'
+
+    worker = OMDbFetchWorker(dm, parse, workers=1)
+    worker.submit(ids['job_id']).result()
+    worker.shutdown()
+
+    movie = dm.get_movie_by_id(ids['movie_id'])
+    assert (movie['title'], movie['director'], movie['year']) == ('Heat', 'Michael Mann', 1995)
+    assert dm.get_fetch_job(ids['job_id'])['status'] == 'done'
+    assert dm.get_fetch_jobs_for_user(1) == {}
+
+
+def test_job_records_omdb_failure(dm, monkeypatch):
+    def not_found(title):
+        raise OMDbException(f"Movie '{title}' not found in OMDb.")
+    monkeypatch.setattr(dm, 'fetch_movie_details_from_omdb', not_found)
+    ids = dm.create_fetch_job(1, 'Nope')
+    worker = OMDbFetchWorker(dm, parse, workers=1)
+    worker.submit(ids['job_id']).result()
+    worker.shutdown()
+    job = dm.get_fetch_job(ids['job_id'])
+    assert job['status'] == 'failed' and 'not found' in job['error']
+
+
+def test_unfinished_jobs_resume_on_start(dm, monkeypatch):
+    monkeypatch.setattr(dm, 'fetch_movie_details_from_omdb',
+                        lambda title: {'Title': title.title(), 'Year': '2000'})
+    first = dm.create_fetch_job(1, 'one')
+    second = dm.create_fetch_job(1, 'two')
+    dm.set_fetch_job_status(second['job_id'], 'running')
+    worker = OMDbFetchWorker(dm, parse, workers=2, lease=0) # The running job counts as abandoned
+    worker.start()
+    deadline = time.monotonic() + 5
+    while dm.get_unfinished_fetch_jobs() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    worker.shutdown()
+    assert dm.get_unfinished_fetch_jobs() == []
+    assert dm.get_movie_by_id(first['movie_id'])['title'] == 'One'
+
+
+def test_jobs_are_claimed_once(dm, monkeypatch):
+    calls = []
+    def lookup(title):
+        calls.append(title)
+        return {'Title': title.title(), 'Year': '2000'}
+    monkeypatch.setattr(dm, 'fetch_movie_details_from_omdb', lookup)
+    pending = dm.create_fetch_job(1, 'pending')
+    running = dm.create_fetch_job(1, 'running elsewhere')
+    assert dm.claim_fetch_job(running['job_id'])
+    assert not dm.claim_fetch_job(running['job_id']) # Its lease is still fresh
+
+    workers = [OMDbFetchWorker(dm, parse, workers=2) for _ in range(3)] # E.g. one per gunicorn worker
+    futures = [worker.submit(pending['job_id']) for worker in workers]
+    futures += [worker.submit(running['job_id']) for worker in workers]
+    for future in futures:
+        future.result()
+    for worker in workers:
+        worker.shutdown()
+    assert calls == ['pending']
+    assert dm.get_fetch_job(running['job_id'])['status'] == 'running'
+    assert not dm.claim_fetch_job(pending['job_id'])
+
+
+def test_deleting_placeholder_removes_job(dm):
+    ids = dm.create_fetch_job(1, 'gone')
+    assert dm.delete_movie(ids['movie_id'])
+    assert dm.get_fetch_job(ids['job_id']) is None
@@ -0,0 +1,66 @@
+import os
+import sys
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import app as app_module
+from data_manager.identity_map import IdentityMap
+from data_manager.sqlite_data_manager import SQLiteDataManager
+
+
+@pytest.fixture
+def dm(tmp_path, monkeypatch):
+    dm = SQLiteDataManager(str(tmp_path / 'idmap.db'), pool_size=1)
+    dm.add_user('alice')
+    dm.add_movie(1, 'Heat', 'Michael Mann', 1995, 'Plot', '', 8.3)
+    monkeypatch.setattr(app_module, 'data_manager', dm)
+    app_module.app.config['TESTING'] = True
+    yield dm
+    dm.close()
+
+
+@pytest.fixture
+def selects(dm):
+    """Records SELECT statements issued against the data manager's only connection."""
+    statements = []
+    with dm._get_connection() as conn:
+        conn.set_trace_callback(statements.append)
+    return lambda: [s for s in statements if s.lstrip().upper().startswith('SELECT')]
+
+
+def test_movie_with_user_single_join(dm):
+    movie, user = dm.get_movie_with_user(1)
+    assert movie['title'] == 'Heat' and 'owner_username' not in movie
+    assert user.as_dict() == {'id': 1, 'username': 'alice'}
+    assert dm.get_movie_with_user(99) == (None, None)
+
+
+def test_identity_map_caches_and_invalidates():
+    calls = []
+    loader = lambda movie_id: calls.append(movie_id) or ({'id': movie_id, 'user_id': 7}, {'id': 7})
+    idmap = IdentityMap()
+    idmap.get_movie_with_user(1, loader)
+    idmap.get_movie_with_user(1, loader)
+    assert idmap.get_user(7, lambda user_id: pytest.fail("should be mapped")) == {'id': 7}
+    idmap.invalidate_movie(1)
+    idmap.get_movie_with_user(1, loader)
+    assert calls == [1, 1]
+
+
+@pytest.mark.parametrize('method, path', [
+    ('get', '/movie/1'),
+    ('get', '/movie/1/update'),
+    ('post', '/movie/1/delete'),
+])
+def test_movie_routes_issue_one_read(dm, selects, method, path):
+    client = app_module.app.test_client()
+    response = getattr(client, method)(path)
+    assert response.status_code in (200, 302)
+    assert len(selects()) == 1, selects()
+
+
+def test_update_post_reads_once(dm, selects):
+    client = app_module.app.test_client()
+    response = client.post('/movie/1/update', data={'title': 'Heat', 'director': 'Mann', 'year': '1995',
+                                                     'plot': '', 'poster': '', 'rating': '8'})
+    assert response.status_code == 302
+    assert len(selects()) == 1, selects()
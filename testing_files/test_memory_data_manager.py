@@ -0,0 +1,174 @@
+import os
+import sys
+import random
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import create_app
+from data_manager.data_manager_interface import DataManagerInterface
+from data_manager.memory_data_manager import InMemoryDataManager
+from data_manager.pagination import MOVIE_SORT_KEYS
+from data_manager.sorted_index import SortedIndex
+from data_manager.sqlite_data_manager import SQLiteDataManager
+
+MOVIES = [
+    ('Heat', 'Michael Mann', 1995, 'A heist crew and a detective.', 'https://img.example.com/heat.jpg', 8.3),
+    ('Thief', 'Michael Mann', 1981, 'A safecracker takes one last job.', '', None),
+    ('Amélie', 'Jean-Pierre Jeunet', 2001, 'A shy waitress in Paris.', '', 8.3),
+    ('Zodiac', 'David Fincher', 2007, 'A cartoonist hunts a killer.', '', 7.7),
+    ('Untitled', None, None, None, None, None),
+    ('heat', 'Someone Else', 1986, 'Another heist.', '', 5.0),
+]
+
+
+def test_sorted_index_matches_a_sorted_list():
+    rng = random.Random(7)
+    index, expected = SortedIndex(load=4), set()
+    for _ in range(2000):
+        key = rng.randrange(300)
+        if rng.random() < 0.6:
+            index.add(key)
+            expected.add(key)
+        else:
+            assert index.discard(key) == (key in expected)
+            expected.discard(key)
+    ordered = sorted(expected)
+    assert list(index) == ordered and len(index) == len(ordered)
+    assert all((key in index) == (key in expected) for key in range(300))
+    for lower, upper in ((None, None), (50, 150), (10, None), (None, 20), (151, 150)):
+        for inclusive in ((True, True), (False, False), (True, False)):
+            want = [key for key in ordered
+                    if (lower is None or key > lower or (inclusive[0] and key == lower))
+                    and (upper is None or key < upper or (inclusive[1] and key == upper))]
+            assert list(index.irange(lower, upper, inclusive)) == want
+            assert list(index.irange(lower, upper, inclusive, reverse=True)) == want[::-1]
+
+
+def run_script(dm):
+    """Applies the same writes to a backend and returns everything it reads back."""
+    for name in ('carol', 'alice', 'bob'):
+        dm.add_user(name)
+    results = {'duplicate_user': dm.add_user('alice')}
+    dm.add_movies_bulk(1, MOVIES)
+    dm.add_movies_bulk(2, MOVIES[:3])
+    dm.add_movie(3, 'Memento', 'Christopher Nolan', 2000, 'A man without memory.', '', 8.4)
+    results['add_to_missing_user'] = dm.add_movie(99, 'Nope', None, None, None, None, None)
+    job = dm.create_fetch_job(1, 'pending title')
+    done = dm.create_fetch_job(2, 'done title')
+    dm.complete_fetch_job(done['job_id'], done['movie_id'], {
+        'title': 'Done Title', 'director': 'Someone', 'year': 1999, 'plot': 'Fetched.', 'poster': '', 'rating': 6.0})
+    dm.set_fetch_job_status(job['job_id'], 'failed', 'Movie not found!')
+    results['update'] = dm.update_movie(2, 'Thief', 'Michael Mann', 1981, 'Heist plot.', '', 7.4)
+    results['update_batch'] = dm.update_movies(1, [3, 4, 9, 99], {'rating': 9.0})
+    results['move'] = dm.move_movies(1, [1, 5], 2)
+    results['move_to_missing'] = dm.move_movies(2, [1], 42)
+    results['delete_batch'] = dm.delete_movies(2, [7, 8, 1, 99])
+    results['delete'] = dm.delete_movie(6)
+    results['delete_user'] = dm.delete_user(3)
+
+    results['users'] = dm.get_all_users()
+    results['users_after'] = dm.get_all_users(limit=1, after='alice')
+    for user_id in (1, 2, 3):
+        for sort in MOVIE_SORT_KEYS:
+            for descending in (False, True):
+                pages, after = [], None
+                while True:
+                    page = dm.get_movies_for_user(user_id, limit=2, after=after, sort=sort, descending=descending)
+                    pages.append(page)
+                    if len(page) < 2:
+                        break
+                    after = (getattr(page[-1], sort), page[-1].id)
+                results[(user_id, sort, descending)] = pages
+        results[(user_id, 'summaries')] = dm.get_movie_summaries_for_user(user_id, sort='rating', descending=True)
+        results[(user_id, 'streamed')] = list(dm.iter_movies_for_user(user_id, fetch_size=2))
+        results[(user_id, 'stats')] = dm.get_user_stats(user_id)
+        results[(user_id, 'jobs')] = {movie_id: (job['id'], job['status'], job['error'])
+                                      for movie_id, job in dm.get_fetch_jobs_for_user(user_id).items()}
+    results['global_stats'] = dm.get_global_stats()
+    results['totals'] = dm.get_user_stat_totals([1, 2, 3])
+    results['with_user'] = [dm.get_movie_with_user(movie_id) for movie_id in (2, 5, 6)]
+    results['unfinished'] = [job['id'] for job in dm.get_unfinished_fetch_jobs()]
+    for query in ('heist', 'HEAT', 'mich', 'amelie', 'michael heist', 'zzz', ''):
+        results[('search', query)] = sorted(hit.id for hit in dm.search_movies(query))
+    results['search_user'] = sorted(hit.id for hit in dm.search_movies('heat', user_id=2))
+    results['consistency'] = dm.check_stats_consistency()
+    return results
+
+
+def test_backends_are_equivalent(tmp_path):
+    sqlite_dm = SQLiteDataManager(str(tmp_path / 'equivalence.db'))
+    memory_dm = InMemoryDataManager()
+    try:
+        assert isinstance(sqlite_dm, DataManagerInterface) and isinstance(memory_dm, DataManagerInterface)
+        expected, actual = run_script(sqlite_dm), run_script(memory_dm)
+        assert expected.keys() == actual.keys()
+        for key in expected:
+            assert actual[key] == expected[key], key
+    finally:
+        sqlite_dm.close()
+
+
+def test_search_ranks_title_matches_first():
+    dm = InMemoryDataManager()
+    dm.add_user('alice')
+    dm.add_movies_bulk(1, [('Plot Twist', 'A', 2000, 'A heist.', '', None), ('Heist', 'B', 2001, '', '', None)])
+    assert [hit.title for hit in dm.search_movies('heist')] == ['Heist', 'Plot Twist']
+    assert dm.search_movies('heist')[0].username == 'alice'
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / 'movies.snapshot')
+    dm = InMemoryDataManager(path)
+    dm.add_user('alice')
+    dm.add_movie(1, 'Heat', 'Michael Mann', 1995, 'A heist crew.', 'p.jpg', 8.3, imdb_id='tt0113277')
+    dm.add_movie(1, 'Heat', 'Michael Mann', 1995, 'A heist crew.', 'p.jpg', 7.0, imdb_id='tt0113277')
+    job = dm.create_fetch_job(1, 'heat')
+    dm.close()
+
+    restored = InMemoryDataManager(path)
+    assert restored.get_all_users() == dm.get_all_users()
+    assert restored.get_movies_for_user(1) == dm.get_movies_for_user(1)
+    assert restored.get_fetch_job(job['job_id']) == dm.get_fetch_job(job['job_id'])
+    assert restored.get_movie_by_id(1).plot is restored.get_movie_by_id(2).plot
+    assert [hit.id for hit in restored.search_movies('heist')] == [1, 2]
+    assert restored.add_user('bob') and restored.get_all_users()[-1].id == 2
+    assert restored.prune_catalog() == 0
+    with open(path, 'w') as f:
+        f.write('{"version": 0}')
+    with pytest.raises(ValueError):
+        InMemoryDataManager(path)
+
+
+def test_copies_keep_catalog_links(tmp_path):
+    source = SQLiteDataManager(str(tmp_path / 'catalog.db'))
+    try:
+        source.add_user('alice')
+        source.add_movie(1, 'Heat', 'Michael Mann', 1995, 'A heist crew.', 'p.jpg', 8.3, imdb_id='tt0113277')
+        source.add_movie(1, 'Heat', 'Michael Mann', 1995, 'A heist crew.', 'p.jpg', 7.0, imdb_id='tt0113277')
+        source.add_movie(1, 'Thief', 'Michael Mann', 1981, '', '', None)
+        source.update_movie(1, 'Heat', 'Michael Mann', 1995, 'My own notes.', 'p.jpg', 8.3) # Copied first
+        copy = InMemoryDataManager.from_data_manager(source)
+        links = source.get_catalog_links(1)
+        assert links == {1: ('tt0113277', 'A heist crew.', 'p.jpg'), 2: ('tt0113277', 'A heist crew.', 'p.jpg')}
+        assert copy.get_catalog_links(1) == links
+        assert copy.get_movies_for_user(1) == source.get_movies_for_user(1)
+        assert copy.prune_catalog() == 0
+    finally:
+        source.close()
+
+
+def test_memory_backend_serves_the_app_and_copies_sqlite(tmp_path):
+    db_file = str(tmp_path / 'source.db')
+    source = create_app({'DATABASE': db_file, 'TESTING': True})
+    source.test_client().post('/add_user', data={'username': 'alice'})
+    snapshot = str(tmp_path / 'copy.snapshot')
+    result = source.test_cli_runner().invoke(args=['snapshot', snapshot])
+    assert result.exit_code == 0, result.output
+    source.extensions['movieweb'].close()
+
+    app = create_app({'DATA_BACKEND': 'memory', 'MEMORY_SNAPSHOT': snapshot, 'TESTING': True})
+    client = app.test_client()
+    assert b'alice' in client.get('/users').data
+    client.post('/add_user', data={'username': 'bob'})
+    assert client.get('/metrics').status_code == 200
+    app.extensions['movieweb'].close()
+    assert [user.username for user in InMemoryDataManager(snapshot).get_all_users()] == ['alice', 'bob']
@@ -0,0 +1,101 @@
+import os
+import sys
+import time
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import app as app_module
+from omdb_stub import StubOMDbServer
+from data_manager.metrics import Instrumentation, InstrumentedDataManager, MetricsRegistry, statement_label
+from data_manager.sqlite_data_manager import SQLiteDataManager, OMDbException
+
+
+@pytest.fixture
+def instrumentation():
+    return Instrumentation(slow_query_threshold=10.0)
+
+
+@pytest.fixture
+def dm(tmp_path, instrumentation):
+    dm = SQLiteDataManager(str(tmp_path / 'metrics.db'), instrumentation=instrumentation)
+    dm.add_user('alice')
+    dm.add_movie(1, 'Heat', 'Michael Mann', 1995, 'Plot', '', 8.3)
+    yield dm
+    dm.close()
+
+
+def test_statement_label_is_low_cardinality():
+    assert statement_label("SELECT id FROM movies WHERE title = 'x'") == 'SELECT movies'
+    assert statement_label("  insert into users (username) values (?)") == 'INSERT users'
+    assert statement_label("UPDATE movies SET rating = ?") == 'UPDATE movies'
+    assert statement_label("PRAGMA foreign_keys = ON") == 'PRAGMA'
+
+
+def test_histogram_renders_prometheus_text():
+    registry = MetricsRegistry()
+    histogram = registry.histogram('demo_seconds', 'Demo.', ('route',), buckets=(0.1, 1.0))
+    histogram.observe(0.05, 'a"b')
+    histogram.observe(0.5, 'a"b')
+    histogram.observe(5.0, 'a"b')
+    text = registry.render()
+    assert '# TYPE demo_seconds histogram' in text
+    assert 'demo_seconds_bucket{route="a\\"b",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{route="a\\"b",le="1.0"} 2' in text
+    assert 'demo_seconds_bucket{route="a\\"b",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{route="a\\"b"} 3' in text
+    assert 'demo_seconds_sum{route="a\\"b"} 5.55' in text
+
+
+def test_statements_and_calls_are_timed(dm, instrumentation):
+    wrapped = InstrumentedDataManager(dm, instrumentation)
+    before = instrumentation.statement_seconds.count('SELECT movie_details')
+    assert wrapped.get_movie_by_id(1)['title'] == 'Heat'
+    assert instrumentation.statement_seconds.count('SELECT movie_details') == before + 1
+    assert instrumentation.call_seconds.count('get_movie_by_id') == 1
+    wrapped.add_movies_bulk(1, [('Alien', None, None, '', '', None)] * 3)
+    assert instrumentation.statement_seconds.count('INSERT movies') >= 2
+
+
+def test_slow_queries_capture_query_plan(dm, instrumentation):
+    instrumentation.slow_query_threshold = 0.0
+    dm.get_movies_for_user(1)
+    slow = [entry for entry in instrumentation.slow_queries() if 'FROM movie_details' in entry['sql']]
+    assert slow and any('INDEX' in step for step in slow[-1]['plan'])
+    assert instrumentation.slow_statements.value('SELECT movie_details') >= 1
+
+
+def test_omdb_requests_are_counted(dm, instrumentation, monkeypatch):
+    monkeypatch.setenv('OMDB_API_KEY', 'test-key')
+    dm.omdb_api_key = 'test-key'
+    with StubOMDbServer({'heat': {'Title': 'Heat', 'Year': '1995'}}) as server:
+        dm.omdb_base_url = server.url
+        dm.fetch_movie_details_from_omdb('Heat')
+        dm.fetch_movie_details_from_omdb('Heat')  # served from cache, no upstream request
+        with pytest.raises(OMDbException):
+            dm.fetch_movie_details_from_omdb('Nope')
+    assert instrumentation.omdb_seconds.count('ok') == 1
+    assert instrumentation.omdb_seconds.count('not_found') == 1
+
+
+def test_metrics_endpoint(dm, monkeypatch):
+    monkeypatch.setattr(app_module, 'data_manager', InstrumentedDataManager(dm, app_module.app.extensions['movieweb'].instrumentation))
+    app_module.app.config['TESTING'] = True
+    client = app_module.app.test_client()
+    assert client.get('/movie/1').status_code == 200
+    response = client.get('/metrics')
+    assert response.status_code == 200 and response.mimetype == 'text/plain'
+    text = response.get_data(as_text=True)
+    assert 'movieweb_request_duration_seconds_count{endpoint="movie_detail",method="GET",status="200"}' in text
+    assert 'movieweb_db_pool_connections{stat="pool_size"} 5' in text
+    assert client.get('/metrics/slow-queries').is_json
+
+
+def test_instrumentation_overhead_is_small(dm, instrumentation):
+    wrapped = InstrumentedDataManager(dm, instrumentation)
+    start = time.perf_counter()
+    for _ in range(2000):
+        instrumentation.observe_statement(None, "SELECT id FROM movies WHERE id = ?", (1,), 0.0001)
+        instrumentation.observe_call('get_movie_by_id', 0.0001)
+    per_observation = (time.perf_counter() - start) / 4000
+    assert per_observation < 50e-6
+    assert wrapped.get_user_by_id(1)['username'] == 'alice'
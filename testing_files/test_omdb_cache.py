@@ -0,0 +1,101 @@
+import os
+import sys
+import json
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from data_manager import omdb_client
+from data_manager.sqlite_data_manager import SQLiteDataManager, OMDbException
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        yield json.dumps(self.payload).encode('utf-8')
+
+
+@pytest.fixture
+def dm(tmp_path, monkeypatch):
+    monkeypatch.setenv('OMDB_API_KEY', 'test-key')
+    dm = SQLiteDataManager(str(tmp_path / 'cache.db'), omdb_cache_size=2)
+    dm.omdb_cache._clock = FakeClock()
+    yield dm
+    dm.close()
+
+
+@pytest.fixture
+def omdb_calls(monkeypatch):
+    calls = []
+
+    def fake_get(session, url, params, stream, timeout):
+        calls.append(params['t'])
+        if params['t'] == 'Nope':
+            return FakeResponse({'Response': 'False', 'Error': 'Movie not found!'})
+        return FakeResponse({'Response': 'True', 'Title': 'Heat', 'Year': '1995'})
+
+    monkeypatch.setattr(omdb_client.requests.Session, 'get', fake_get)
+    return calls
+
+
+def test_repeat_lookup_served_from_memory(dm, omdb_calls):
+    assert dm.fetch_movie_details_from_omdb('Heat')['Title'] == 'Heat'
+    assert dm.fetch_movie_details_from_omdb('  heat ')['Title'] == 'Heat'
+    assert len(omdb_calls) == 1
+    assert dm.omdb_cache.stats()['memory_hits'] == 1
+
+
+def test_not_found_is_negatively_cached(dm, omdb_calls):
+    for _ in range(3):
+        with pytest.raises(OMDbException, match="not found"):
+            dm.fetch_movie_details_from_omdb('Nope')
+    assert len(omdb_calls) == 1
+    assert dm.omdb_cache.stats()['negative_hits'] == 2
+
+
+def test_negative_entries_expire_sooner(dm, omdb_calls):
+    dm.fetch_movie_details_from_omdb('Heat')
+    with pytest.raises(OMDbException):
+        dm.fetch_movie_details_from_omdb('Nope')
+    dm.omdb_cache._clock.now += dm.omdb_cache.negative_ttl + 1
+    dm.fetch_movie_details_from_omdb('Heat')
+    with pytest.raises(OMDbException):
+        dm.fetch_movie_details_from_omdb('Nope')
+    assert len(omdb_calls) == 3
+
+
+def test_disk_tier_survives_lru_eviction_and_restart(dm, omdb_calls, tmp_path):
+    for title in ('Heat', 'Heat 2', 'Heat 3'):
+        dm.fetch_movie_details_from_omdb(title)
+    assert dm.omdb_cache.stats()['evictions'] == 1
+    dm.fetch_movie_details_from_omdb('heat')
+    assert dm.omdb_cache.stats()['disk_hits'] == 1
+
+    restarted = SQLiteDataManager(dm.db_file)
+    restarted.omdb_cache._clock = dm.omdb_cache._clock
+    assert restarted.omdb_cache.get('Heat 3')[0] is True
+    restarted.close()
+    assert len(omdb_calls) == 3
+
+
+def test_purge_expired_removes_disk_rows(dm, omdb_calls):
+    dm.fetch_movie_details_from_omdb('Heat')
+    dm.omdb_cache._clock.now += dm.omdb_cache.ttl + 1
+    assert dm.omdb_cache.purge_expired() == 1
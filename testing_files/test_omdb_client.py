@@ -0,0 +1,125 @@
+import os
+import sys
+import time
+import threading
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from omdb_stub import StubOMDbServer
+from data_manager.metrics import Instrumentation
+from data_manager.omdb_client import CircuitBreaker, OMDbClient, OMDbException, OMDbUnavailable
+
+MOVIES = {'Heat': {'Year': '1995'}, 'Down': {'Year': '2000'}}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def lookup_concurrently(client, titles):
+    results = []
+
+    def lookup(title):
+        try:
+            results.append(client.lookup(title))
+        except OMDbException as e:
+            results.append(e)
+    threads = [threading.Thread(target=lookup, args=(title,)) for title in titles]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_lookups_of_one_title_share_a_request():
+    with StubOMDbServer(MOVIES, delay=0.2) as server:
+        client = OMDbClient('key', server.url)
+        results = lookup_concurrently(client, ['Heat', ' heat', 'HEAT', 'Heat', 'Nope'])
+        assert sorted(server.requests) == ['Heat', 'Nope']
+        assert [r['Year'] for r in results if r.get('Response') == 'True'] == ['1995'] * 4
+        assert client.stats()['coalesced'] == 3 and client.stats()['requests'] == 2
+        client.lookup('Heat')
+        assert len(server.requests) == 3 # Nothing in flight any more: a new request
+
+
+def test_slow_answers_fail_within_the_budget():
+    instrumentation = Instrumentation()
+    with StubOMDbServer(MOVIES, delay=1.0) as server:
+        client = OMDbClient('key', server.url, budget=0.2, instrumentation=instrumentation)
+        started = time.perf_counter()
+        with pytest.raises(OMDbUnavailable, match="timed out"):
+            client.lookup('Heat')
+        assert time.perf_counter() - started < 0.5
+        server.delay = 0
+        assert client.lookup('Heat', budget=2)['Title'] == 'Heat'
+    assert instrumentation.omdb_seconds.count('timeout') == 1
+    assert instrumentation.omdb_seconds.count('ok') == 1
+
+
+def test_trickling_answers_are_cut_off_at_the_deadline():
+    with StubOMDbServer(MOVIES, trickle=0.02) as server: # About a second per answer
+        client = OMDbClient('key', server.url, budget=0.3)
+        started = time.perf_counter()
+        with pytest.raises(OMDbUnavailable, match="timed out"):
+            client.lookup('Heat')
+        assert time.perf_counter() - started < 0.6
+        client.close()
+
+
+def test_circuit_opens_on_repeated_faults_and_closes_after_a_probe():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=3, reset_after=30, clock=clock)
+    with StubOMDbServer(MOVIES, failures={'Down': 2}, drops={'Down': 1}) as server:
+        client = OMDbClient('key', server.url, breaker=breaker)
+        for _ in range(3):
+            with pytest.raises(OMDbUnavailable):
+                client.lookup('Down')
+        assert breaker.state == CircuitBreaker.OPEN
+        with pytest.raises(OMDbUnavailable, match="unavailable"):
+            client.lookup('Heat') # Refused without a request
+        assert server.requests == ['Down'] * 3
+
+        clock.now += 31
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert client.lookup('Heat')['Title'] == 'Heat'
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert client.lookup('Down')['Year'] == '2000'
+    assert client.stats() == {'requests': 5, 'coalesced': 0, 'opened': 1, 'rejected': 1, 'circuit_open': 0}
+
+
+def test_probe_failing_with_an_unexpected_error_reopens_the_circuit(monkeypatch):
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_after=30, clock=clock)
+    with StubOMDbServer(MOVIES) as server:
+        client = OMDbClient('key', server.url, breaker=breaker)
+        breaker.record_failure()
+        clock.now += 31
+
+        def broken_get(*args):
+            raise RuntimeError("bug in the request path")
+        monkeypatch.setattr(client, '_get', broken_get)
+        with pytest.raises(RuntimeError):
+            client.lookup('Heat') # The half-open probe
+        assert breaker.state == CircuitBreaker.OPEN
+
+        monkeypatch.undo()
+        clock.now += 31
+        assert client.lookup('Heat')['Title'] == 'Heat'
+        assert breaker.state == CircuitBreaker.CLOSED
+        client.close()
+
+
+def test_failed_probe_reopens_the_circuit():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_after=30, clock=clock)
+    breaker.record_failure()
+    clock.now += 31
+    assert breaker.allow() and not breaker.allow() # One probe at a time
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+    assert breaker.counters == {'opened': 2, 'rejected': 2}
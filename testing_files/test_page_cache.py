@@ -0,0 +1,91 @@
+import os
+import sys
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import create_app
+from data_manager.memory_data_manager import InMemoryDataManager
+from data_manager.page_cache import FLASH_SLOT, PageCache
+from data_manager.user_stats import ALL_USERS
+
+
+@pytest.fixture(params=['sqlite', 'memory'])
+def app(request, tmp_path):
+    app = create_app({'DATA_BACKEND': request.param, 'DATABASE': str(tmp_path / 'pages.db'), 'TESTING': True})
+    dm = app.extensions['movieweb'].data_manager
+    dm.add_user('alice')
+    dm.add_user('bob')
+    yield app
+    app.extensions['movieweb'].close()
+
+
+def revalidate(client, url, etag):
+    return client.get(url, headers={'If-None-Match': etag})
+
+
+def test_repeat_visits_get_304_until_the_users_content_changes(app):
+    client, dm = app.test_client(), app.extensions['movieweb'].data_manager
+    first = client.get('/users/1')
+    etag = first.headers['ETag']
+    assert first.status_code == 200 and first.headers['Cache-Control'] == 'private, no-cache'
+    not_modified = revalidate(client, '/users/1', etag)
+    assert not_modified.status_code == 304 and not_modified.data == b''
+    assert revalidate(client, '/users/1?sort=year', etag).status_code == 200
+
+    dm.add_movie(2, 'Heat', 'Michael Mann', 1995, '', '', 8.3)
+    assert revalidate(client, '/users/1', etag).status_code == 304
+    users_etag = client.get('/users').headers['ETag']
+    dm.add_movie(1, 'Thief', 'Michael Mann', 1981, '', '', 7.4)
+    changed = revalidate(client, '/users/1', etag)
+    assert changed.status_code == 200 and b'Thief' in changed.data
+    assert changed.headers['ETag'] != etag
+    assert revalidate(client, '/users', users_etag).status_code == 200
+
+
+def test_cached_pages_are_reused_and_counted(app):
+    client, page_cache = app.test_client(), app.extensions['movieweb'].page_cache
+    assert client.get('/users').data == client.get('/users').data
+    stats = page_cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 1)
+    assert 0 < stats['bytes'] <= stats['max_bytes']
+    assert b'movieweb_page_cache{stat="hits"} 1' in client.get('/metrics').data
+
+
+def test_flash_messages_are_shown_once_and_never_cached(app):
+    client = app.test_client()
+    etag = client.get('/users').headers['ETag']
+    client.post('/add_user', data={'username': 'carol'})
+    with client.session_transaction() as session:
+        session['_flashes'] = [('info', 'Shown once.')]
+    flashed = revalidate(client, '/users', etag)
+    assert flashed.status_code == 200 and b'Shown once.' in flashed.data
+    assert 'ETag' not in flashed.headers and flashed.headers['Cache-Control'] == 'no-store'
+    assert FLASH_SLOT.encode() not in flashed.data
+    again = client.get('/users')
+    assert b'Shown once.' not in again.data and b'carol' in again.data
+    assert revalidate(client, '/users', again.headers['ETag']).status_code == 304
+
+
+def test_fetch_job_changes_bump_only_the_owner():
+    dm = InMemoryDataManager()
+    dm.add_user('alice')
+    job = dm.create_fetch_job(1, 'heat')
+    before = dm.get_content_version(1), dm.get_content_version(ALL_USERS)
+    dm.set_fetch_job_status(job['job_id'], 'failed', 'Movie not found!')
+    assert dm.get_content_version(1)[0] > before[0][0]
+    assert dm.get_content_version(ALL_USERS) == before[1]
+
+
+def test_memory_bound_and_version_reuse():
+    now = [0.0]
+    cache = PageCache(max_bytes=30, check_interval=5, clock=lambda: now[0])
+    cache.put('/a', 1, 'a', 'x' * 20)
+    cache.put('/b', 1, 'b', 'y' * 20)
+    assert cache.get('/a', 1) is None and cache.get('/b', 1) == ('b', 'y' * 20, '')
+    assert cache.stats()['evictions'] == 1 and cache.stats()['bytes'] == 20
+    loads = []
+    load = lambda scope: loads.append(scope) or (len(loads), 0)
+    assert cache.version(1, load) == cache.version(1, load) == (1, 0)
+    now[0] = 6.0
+    assert cache.version(1, load) == (2, 0)
+    cache.forget_versions()
+    assert cache.version(1, load) == (3, 0)
@@ -0,0 +1,80 @@
+import os
+import sys
+import random
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import create_app
+from data_manager.sqlite_data_manager import SQLiteDataManager
+from data_manager.pagination import MOVIE_SORT_KEYS, encode_cursor, decode_cursor
+
+
+@pytest.fixture(scope='module')
+def dm(tmp_path_factory):
+    dm = SQLiteDataManager(str(tmp_path_factory.mktemp('pages') / 'pages.db'))
+    for name in ('carol', 'alice', 'bob', 'dave', 'erin'):
+        dm.add_user(name)
+    rng = random.Random(7)
+    rows = [(f'Movie {rng.randint(0, 20)}', 'D', rng.choice([None, 1990, 2000, 2010]),
+             '', '', rng.choice([None, 5.0, 7.5, 9.0])) for _ in range(60)]
+    dm.add_movies_bulk(1, rows)
+    dm.add_movies_bulk(2, rows[:5])
+    yield dm
+    dm.close()
+
+
+def _sort_key(movie, sort):
+    value = movie[sort]
+    return (value is not None, value if value is not None else 0, movie['id'])
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(['Heat', 12]), 2) == ('Heat', 12)
+    assert decode_cursor(encode_cursor([None, 3]), 2) == (None, 3)
+    assert decode_cursor('not-a-cursor', 2) is None
+    assert decode_cursor(encode_cursor([1]), 2) is None
+    assert decode_cursor(encode_cursor([2.5, 2 ** 63 - 1]), 2) == (2.5, 2 ** 63 - 1)
+
+
+def test_crafted_cursors_are_rejected():
+    for values in ([['x'], 1], [{'a': 1}, 1], [2 ** 70, 1], ['Heat', -2 ** 63 - 1], [True, 1]):
+        assert decode_cursor(encode_cursor(values), 2) is None
+
+
+def test_grid_ignores_crafted_cursors(tmp_path):
+    app = create_app({'DATABASE': str(tmp_path / 'cursors.db'), 'TESTING': True})
+    app.extensions['movieweb'].data_manager.add_user('alice')
+    client = app.test_client()
+    for values in ([['x'], 1], [2 ** 70, 1]):
+        assert client.get(f'/users/1?after={encode_cursor(values)}').status_code == 200
+    app.extensions['movieweb'].close()
+
+
+def test_user_pages_cover_all_users(dm):
+    seen, after = [], None
+    while True:
+        page = dm.get_all_users(limit=2, after=after)
+        if not page:
+            break
+        seen.extend(u['username'] for u in page)
+        after = page[-1]['username']
+    assert seen == ['alice', 'bob', 'carol', 'dave', 'erin']
+
+
+@pytest.mark.parametrize('sort', MOVIE_SORT_KEYS)
+@pytest.mark.parametrize('descending', [False, True])
+def test_movie_pages_match_full_ordering(dm, sort, descending):
+    expected = sorted(dm.get_movies_for_user(1), key=lambda m: _sort_key(m, sort), reverse=descending)
+    seen, after = [], None
+    while True:
+        page = dm.get_movies_for_user(1, limit=7, after=after, sort=sort, descending=descending)
+        if not page:
+            break
+        seen.extend(page)
+        after = (page[-1][sort], page[-1]['id'])
+    assert [m['id'] for m in seen] == [m['id'] for m in expected]
+    assert all(m['user_id'] == 1 for m in seen)
+
+
+def test_unknown_sort_key_rejected(dm):
+    with pytest.raises(ValueError):
+        dm.get_movies_for_user(1, sort='plot')
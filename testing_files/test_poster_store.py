@@ -0,0 +1,105 @@
+import os
+import sys
+import threading
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from image_stub import StubImageServer
+from app import create_app
+from data_manager import poster_store
+from data_manager.poster_store import PosterStore, check_public_url
+from data_manager.static_assets import CACHE_CONTROL
+
+JPEG = b'\xff\xd8\xff\xe0' + b'poster bytes' * 100
+PNG = b'\x89PNG\r\n\x1a\n' + b'other poster' * 50
+IMAGES = {'/heat.jpg': ('image/jpeg', JPEG), '/copy-of-heat.jpg': ('image/jpeg', JPEG),
+          '/thief.png': ('image/png', PNG), '/page.html': ('text/html', b'<html></html>')}
+
+
+def test_posters_are_downloaded_once_and_deduplicated(tmp_path):
+    now = [1000.0]
+    store = PosterStore(str(tmp_path / 'posters'), clock=lambda: now[0], retry_after=60, allowed_hosts=['127.0.0.1'])
+    with StubImageServer(IMAGES, delay=0.05) as server:
+        url = server.url + '/heat.jpg'
+        digests = []
+        threads = [threading.Thread(target=lambda: digests.append(store.fetch(url))) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(set(digests)) == 1 and digests[0] is not None
+        assert server.requests == ['/heat.jpg']
+        assert store.fetch(server.url + '/copy-of-heat.jpg') == digests[0]
+        assert PosterStore(str(tmp_path / 'posters')).digest_for(url) == digests[0] # Persisted
+        with open(store.object_path(digests[0]), 'rb') as f:
+            assert f.read() == JPEG
+        assert store.object_path(digests[0], thumbnail=True) is not None
+
+        assert store.fetch(server.url + '/missing.jpg') is None
+        assert store.fetch(server.url + '/page.html') is None
+        assert store.fetch(server.url + '/missing.jpg') is None
+        assert server.requests.count('/missing.jpg') == 1 # Failure remembered
+        now[0] += 61
+        store.fetch(server.url + '/missing.jpg')
+        assert server.requests.count('/missing.jpg') == 2
+    assert store.stats()['downloads'] == 1 and store.stats()['deduplicated'] == 1
+    assert store.stats()['failures'] == 3
+
+
+def test_grid_serves_mirrored_posters(tmp_path):
+    app = create_app({'DATABASE': str(tmp_path / 'posters.db'), 'POSTER_MIRROR': True,
+                      'POSTER_DIR': str(tmp_path / 'posters'), 'POSTER_ALLOWED_HOSTS': ['127.0.0.1'],
+                      'TESTING': True})
+    services = app.extensions['movieweb']
+    client = app.test_client()
+    with StubImageServer(IMAGES) as server:
+        dm = services.data_manager
+        dm.add_user('alice')
+        dm.add_movie(1, 'Heat', 'Michael Mann', 1995, '', server.url + '/heat.jpg', 8.3)
+        dm.add_movie(1, 'No Poster', 'Nobody', 2000, '', '', None)
+        dm.add_movie(1, 'Broken', 'Nobody', 2001, '', server.url + '/missing.jpg', None)
+
+        page = client.get('/users/1').data.decode()
+        assert server.url not in page # Never hot-linked
+        lazy = client.get('/movies/1/poster/thumb')
+        assert lazy.status_code == 302 and '/posters/thumb/' in lazy.headers['Location']
+        assert client.get('/movies/3/poster/thumb').headers['Location'].endswith('placeholder.png')
+        services.poster_store.shutdown(wait=True)
+        services.page_cache.clear()
+
+        page = client.get('/users/1').data.decode()
+        digest = services.poster_store.digest_for(server.url + '/heat.jpg')
+        assert f'/posters/thumb/{digest}' in page and 'placeholder.png' in page
+        image = client.get(f'/posters/full/{digest}')
+        assert image.data == JPEG and image.mimetype == 'image/jpeg'
+        assert image.headers['Cache-Control'] == CACHE_CONTROL
+        assert client.get('/static/placeholder.png').status_code == 200
+    services.close()
+
+
+def test_internal_addresses_are_never_fetched(tmp_path):
+    for url in ('http://127.0.0.1/a.jpg', 'http://localhost/a.jpg', 'http://10.1.2.3/a.jpg',
+                'http://169.254.169.254/latest/meta-data/', 'http://[::1]/a.jpg', 'file:///etc/passwd'):
+        with pytest.raises(ValueError):
+            check_public_url(url)
+    check_public_url('http://8.8.8.8/a.jpg')
+
+    with StubImageServer(IMAGES, redirects={'/redirect': 'http://169.254.169.254/latest/meta-data/'}) as server:
+        store = PosterStore(str(tmp_path / 'posters'))
+        assert store.fetch(server.url + '/heat.jpg') is None
+        assert server.requests == []
+        # A trusted host may not redirect to an untrusted internal one
+        redirecting = PosterStore(str(tmp_path / 'posters2'), allowed_hosts=['127.0.0.1'])
+        assert redirecting.fetch(server.url + '/redirect') is None
+        assert server.requests == ['/redirect']
+
+
+def test_disk_errors_are_not_raised(tmp_path, monkeypatch):
+    store = PosterStore(str(tmp_path / 'posters'), allowed_hosts=['127.0.0.1'])
+    def disk_full(path, data):
+        raise OSError(28, 'No space left on device')
+    monkeypatch.setattr(poster_store, '_write_atomic', disk_full)
+    with StubImageServer(IMAGES) as server:
+        assert store.fetch(server.url + '/heat.jpg') is None
+        assert store.fetch(server.url + '/missing.jpg') is None
+    assert store.stats()['failures'] == 2
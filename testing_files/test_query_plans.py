@@ -0,0 +1,149 @@
+import os
+import sys
+import sqlite3
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from data_manager import migrations
+from data_manager.sqlite_data_manager import SQLiteDataManager
+
+
+@pytest.fixture
+def traced_dm(tmp_path):
+    """A data manager on a single pooled connection whose statements are recorded."""
+    dm = SQLiteDataManager(str(tmp_path / 'plans.db'), pool_size=1)
+    statements = []
+    with dm._get_connection() as conn:
+        conn.set_trace_callback(statements.append)
+    yield dm, statements
+    dm.close()
+
+
+def _parse(movie_data, title):
+    return {'title': movie_data['Title'], 'director': movie_data['Director'], 'year': int(movie_data['Year']),
+            'plot': movie_data['Plot'], 'poster': movie_data['Poster'], 'rating': None,
+            'imdb_id': movie_data['imdbID']}
+
+
+def _exercise(dm):
+    """
+    Calls every public data-manager read and write at least once, including
+    each sort and cursor, except check_stats_consistency: a deliberate full
+    recomputation of the statistics.
+    """
+    dm.add_user('alice')
+    dm.add_user('bob')
+    user_id, other_id = [user['id'] for user in dm.get_all_users()]
+    dm.get_all_users(limit=1, after='alice')
+    dm.get_user_by_id(user_id)
+    dm.add_movie(user_id, 'Heat', 'Michael Mann', 1995, 'Plot', '', 8.3)
+    dm.add_movie(user_id, 'Thief', 'Michael Mann', 1981, 'Plot', '', None, imdb_id='tt0083190')
+    dm.add_movies_bulk(user_id, [('Alien', 'Ridley Scott', 1979, 'Plot', '', 8.5),
+                                 ('Collateral', 'Michael Mann', 2004, 'Plot', '', 7.5, 'tt0369339')])
+    movie_id = dm.get_movies_for_user(user_id)[0]['id']
+    for read in (dm.get_movies_for_user, dm.get_movie_summaries_for_user):
+        for sort in ('title', 'year', 'rating'):
+            for descending in (False, True):
+                first = read(user_id, limit=1, sort=sort, descending=descending)[0]
+                read(user_id, limit=2, after=(first[sort], first['id']), sort=sort, descending=descending)
+                read(user_id, limit=2, after=(None, first['id']), sort=sort, descending=descending)
+    list(dm.iter_movies_for_user(user_id))
+    dm.get_movie_by_id(movie_id)
+    dm.get_movie_with_user(movie_id)
+    dm.search_movies('mann')
+    dm.search_movies('he', user_id=user_id, limit=5, offset=5)
+    dm.get_movie_titles()
+    dm.get_user_stats(user_id)
+    dm.get_global_stats()
+    dm.get_user_stat_totals((user_id, other_id))
+    dm.get_content_version(user_id)
+    dm.update_movie(movie_id, 'Heat', 'Michael Mann', 1995, 'Plot', '', 8.4)
+    ids = [movie['id'] for movie in dm.get_movies_for_user(user_id)]
+    dm.update_movies(user_id, ids[:2], {'rating': 7.0, 'year': 1990})
+    dm.move_movies(user_id, ids[2:3], other_id)
+    dm.delete_movies(other_id, ids[2:3])
+
+    dm.omdb_cache.put('Heat', {'Title': 'Heat', 'Director': 'Michael Mann', 'Year': '1990', 'Plot': 'Plot',
+                               'Poster': '', 'imdbID': 'tt0113277', 'Response': 'True'})
+    dm.omdb_cache.put_not_found('Nope')
+    dm.omdb_cache._memory.clear() # So the next get reads the table
+    dm.omdb_cache.get('Heat')
+    dm.omdb_cache.titles()
+    dm.omdb_cache.purge_expired()
+    dm.backfill_catalog(_parse)
+    dm.get_catalog_links(user_id)
+    dm.prune_catalog()
+
+    job = dm.create_fetch_job(user_id, 'Manhunter')
+    dm.get_fetch_job(job['job_id'])
+    dm.get_fetch_jobs_for_user(user_id)
+    dm.get_unfinished_fetch_jobs()
+    dm.claim_fetch_job(job['job_id'])
+    dm.set_fetch_job_status(job['job_id'], 'running')
+    dm.complete_fetch_job(job['job_id'], job['movie_id'], {
+        'title': 'Manhunter', 'director': 'Michael Mann', 'year': 1986, 'plot': 'Plot', 'poster': '',
+        'rating': 7.2, 'imdb_id': 'tt0091474'})
+    dm.delete_movie(movie_id)
+    dm.omdb_cache.clear()
+    dm.delete_user(user_id)
+
+
+def _plan(conn, sql):
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+
+
+def test_migrations_are_versioned_and_idempotent(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'm.db'))
+    assert migrations.current_version(conn) == 0
+    assert migrations.apply_migrations(conn) == [v for v, _, _ in migrations.MIGRATIONS]
+    assert migrations.apply_migrations(conn) == []
+    assert migrations.current_version(conn) == migrations.latest_version()
+    conn.close()
+
+
+def test_cli_applies_migrations(tmp_path, capsys):
+    db = str(tmp_path / 'cli.db')
+    assert migrations.main([db, '--target', '1']) == 0
+    assert migrations.main([db, '--status']) == 0
+    assert 'pending 2' in capsys.readouterr().out
+    assert migrations.main([db]) == 0
+    conn = sqlite3.connect(db)
+    assert migrations.current_version(conn) == migrations.latest_version()
+    conn.close()
+
+
+def test_no_data_manager_query_scans_movies(traced_dm):
+    """Every statement the data manager issues avoids full scans of movies and temp sorts."""
+    dm, statements = traced_dm
+    _exercise(dm)
+    queries = {s for s in statements
+               if s.lstrip().split(None, 1)[0].upper() in ('SELECT', 'UPDATE', 'DELETE')
+               and 'schema_version' not in s}
+    assert queries, "no statements were traced"
+    with dm._get_connection() as conn:
+        conn.set_trace_callback(None)
+        for sql in queries:
+            for detail in _plan(conn, sql):
+                assert not (detail.startswith('SCAN movies') and 'INDEX' not in detail), (sql, detail)
+                if 'movies_fts' in sql and detail == 'USE TEMP B-TREE FOR ORDER BY':
+                    continue # Full-text hits can only be ranked once matched; the sort covers matches only
+                assert 'TEMP B-TREE' not in detail, (sql, detail)
+
+
+def test_cascade_lookup_uses_index(traced_dm):
+    """The ON DELETE CASCADE child lookup on movies.user_id is index-backed."""
+    dm, _ = traced_dm
+    with dm._get_connection() as conn:
+        plan = _plan(conn, "SELECT 1 FROM movies WHERE user_id = 1")
+    assert any('USING' in detail and 'INDEX' in detail and '(user_id=?)' in detail for detail in plan), plan
+
+
+def test_summary_query_is_covered(traced_dm):
+    """The grid query is answered from the covering index without touching table rows."""
+    dm, statements = traced_dm
+    dm.add_user('alice')
+    dm.get_movie_summaries_for_user(1)
+    sql = next(s for s in statements if s.lstrip().startswith('SELECT id, user_id, title'))
+    with dm._get_connection() as conn:
+        conn.set_trace_callback(None)
+        plan = _plan(conn, sql)
+    assert any('COVERING INDEX idx_movies_user_summary' in detail for detail in plan), plan
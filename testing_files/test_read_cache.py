@@ -0,0 +1,80 @@
+import os
+import sys
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from data_manager.read_cache import CachingDataManager
+from data_manager.sqlite_data_manager import SQLiteDataManager
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    return str(tmp_path / 'cache.db')
+
+
+@pytest.fixture
+def cached(db_file):
+    dm = CachingDataManager(SQLiteDataManager(db_file), max_entries=3)
+    dm.add_user('alice')
+    yield dm
+    dm.close()
+
+
+def test_repeat_reads_hit(cached):
+    first = cached.get_all_users(limit=10)
+    assert cached.get_all_users(limit=10) is first
+    assert cached.cache_stats()['hits'] == 1
+
+
+def test_own_writes_invalidate(cached):
+    assert cached.get_movies_for_user(1, limit=10) == []
+    cached.add_movie(1, 'Heat', 'Mann', 1995, '', '', 8.0)
+    assert [m['title'] for m in cached.get_movies_for_user(1, limit=10)] == ['Heat']
+    assert cached.cache_stats()['invalidations'] == 1
+
+
+def test_movie_writes_keep_user_entries(cached):
+    users = cached.get_all_users(limit=10)
+    cached.add_movie(1, 'Heat', 'Mann', 1995, '', '', 8.0)
+    assert cached.get_all_users(limit=10) is users
+
+
+def test_writes_from_another_process_invalidate(cached, db_file):
+    """A separate data manager stands in for another gunicorn worker."""
+    assert [u['username'] for u in cached.get_all_users()] == ['alice']
+    other = SQLiteDataManager(db_file)
+    other.add_user('bob')
+    other.close()
+    assert [u['username'] for u in cached.get_all_users()] == ['alice', 'bob']
+
+
+def test_user_delete_invalidates_movies(cached):
+    cached.add_movie(1, 'Heat', 'Mann', 1995, '', '', 8.0)
+    assert len(cached.get_movies_for_user(1)) == 1
+    cached.delete_user(1)
+    assert cached.get_movies_for_user(1) == []
+
+
+def test_lru_is_bounded(cached):
+    for user_id in range(10):
+        cached.get_user_by_id(user_id)
+    stats = cached.cache_stats()
+    assert stats['entries'] == 3 and stats['evictions'] == 7
+
+
+def test_check_interval_reuses_version(db_file):
+    now = [0.0]
+    dm = CachingDataManager(SQLiteDataManager(db_file), check_interval=1.0, clock=lambda: now[0])
+    dm.get_all_users(limit=10)
+    dm.data_manager.add_user('zoe')
+    assert dm.get_all_users(limit=10) == []  # Within the staleness window
+    now[0] = 2.0
+    assert [u['username'] for u in dm.get_all_users(limit=10)] == ['zoe']
+    dm.close()
+
+
+def test_unbounded_and_unhashable_reads_bypass_the_cache(cached):
+    assert cached.get_all_users() is not cached.get_all_users()
+    assert cached.get_movies_for_user(1) == cached.get_movies_for_user(1, None)
+    assert cached.get_movie_summaries_for_user(1, limit=5, after=(['x'], 1)) == []
+    stats = cached.cache_stats()
+    assert stats['entries'] == 0 and stats['bypassed'] == 5
@@ -0,0 +1,40 @@
+import os
+import sys
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from data_manager.records import Movie, MovieSummary, User
+from data_manager.sqlite_data_manager import SQLiteDataManager
+
+
+@pytest.fixture
+def dm(tmp_path):
+    dm = SQLiteDataManager(str(tmp_path / 'records.db'))
+    dm.add_user('alice')
+    dm.add_movie(1, 'Heat', 'Michael Mann', 1995, 'Plot', '', 8.3)
+    yield dm
+    dm.close()
+
+
+def test_records_have_no_instance_dict():
+    movie = Movie(1, 1, 'Heat', 'Mann', 1995, 'Plot', '', 8.3)
+    assert not hasattr(movie, '__dict__')
+    assert not hasattr(User(1, 'alice'), '__dict__')
+
+
+def test_attribute_subscript_and_dict_access(dm):
+    movie = dm.get_movie_by_id(1)
+    assert isinstance(movie, Movie)
+    assert movie.title == movie['title'] == 'Heat'
+    assert movie['user_id'] == 1 and movie.get('missing') is None
+    assert dict(movie)['director'] == 'Michael Mann'
+    with pytest.raises(KeyError):
+        movie['missing']
+    user = dm.get_user_by_id(1)
+    assert user.username == user['username'] == 'alice'
+
+
+def test_all_read_paths_return_records(dm):
+    assert all(isinstance(u, User) for u in dm.get_all_users())
+    assert all(isinstance(m, Movie) for m in dm.get_movies_for_user(1))
+    assert all(isinstance(m, MovieSummary) for m in dm.get_movie_summaries_for_user(1))
+    assert dm.search_movies('heat')[0]['username'] == 'alice'
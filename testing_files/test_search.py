@@ -0,0 +1,61 @@
+import os
+import sys
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import create_app
+from data_manager.sqlite_data_manager import SQLiteDataManager
+
+
+@pytest.fixture
+def dm(tmp_path):
+    dm = SQLiteDataManager(str(tmp_path / 'search.db'))
+    dm.add_user('alice')
+    dm.add_user('bob')
+    dm.add_movies_bulk(1, [
+        ('The Matrix', 'Lana Wachowski', 1999, 'A hacker discovers reality is simulated.', '', 8.7),
+        ('Heat', 'Michael Mann', 1995, 'A detective hunts a crew of thieves in the matrix of LA.', '', 8.3),
+    ])
+    dm.add_movies_bulk(2, [('Collateral', 'Michael Mann', 2004, 'A cab driver and a hitman.', '', 7.5)])
+    yield dm
+    dm.close()
+
+
+def titles(results):
+    return [movie['title'] for movie in results]
+
+
+def test_title_matches_rank_above_plot_matches(dm):
+    assert titles(dm.search_movies('matrix')) == ['The Matrix', 'Heat']
+
+
+def test_prefix_and_user_filter(dm):
+    assert set(titles(dm.search_movies('man'))) == {'Heat', 'Collateral'}
+    assert titles(dm.search_movies('man', user_id=2)) == ['Collateral']
+    assert dm.search_movies('man', user_id=2)[0]['username'] == 'bob'
+
+
+def test_index_follows_updates_and_deletes(dm):
+    heat = dm.search_movies('heat')[0]
+    dm.update_movie(heat['id'], 'Heat', 'Someone Else', 1995, 'No plot.', '', 8.3)
+    assert titles(dm.search_movies('mann')) == ['Collateral']
+    dm.delete_user(2)
+    assert dm.search_movies('mann') == []
+    assert dm.search_movies('someone')[0]['id'] == heat['id']
+
+
+def test_limit_offset_and_hostile_input(dm):
+    assert len(dm.search_movies('a', limit=1)) == 1
+    assert dm.search_movies('"unbalanced AND (') == []
+    assert dm.search_movies('   ') == []
+
+
+def test_search_page_ignores_out_of_range_numbers(tmp_path):
+    app = create_app({'DATABASE': str(tmp_path / 'search_page.db'), 'TESTING': True})
+    app.extensions['movieweb'].data_manager.add_user('alice')
+    app.extensions['movieweb'].data_manager.add_movie(1, 'Heat', 'Michael Mann', 1995, '', '', 8.3)
+    client = app.test_client()
+    huge = 10 ** 20
+    assert client.get(f'/search?q=heat&page={huge}').status_code == 200
+    page = client.get(f'/search?q=heat&user_id={huge}')
+    assert page.status_code == 200 and b'Heat' in page.data
+    app.extensions['movieweb'].close()
@@ -0,0 +1,60 @@
+import os
+import sys
+import gzip
+import json
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import create_app
+from data_manager.static_assets import CACHE_CONTROL, MANIFEST, build_assets, hashed_name
+
+STYLES = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'static', 'styles.css'))
+
+
+def test_build_fingerprints_and_precompresses(tmp_path):
+    static, build = tmp_path / 'static', tmp_path / 'static' / 'build'
+    (static / 'img').mkdir(parents=True)
+    css = open(STYLES, 'rb').read()
+    (static / 'styles.css').write_bytes(css)
+    (static / 'img' / 'logo.png').write_bytes(b'\x89PNG not really')
+
+    manifest = build_assets(str(static), str(build))
+    assert manifest == {'styles.css': hashed_name('styles.css', css), 'img/logo.png': manifest['img/logo.png']}
+    assert manifest['img/logo.png'].startswith('img/logo.') and manifest['img/logo.png'].endswith('.png')
+    css_file = build / manifest['styles.css']
+    assert css_file.read_bytes() == css
+    assert gzip.decompress((build / (manifest['styles.css'] + '.gz')).read_bytes()) == css
+    assert not (build / (manifest['img/logo.png'] + '.gz')).exists()
+    assert json.loads((build / MANIFEST).read_text()) == manifest
+
+    (static / 'styles.css').write_bytes(css + b'\n.new {}\n')
+    rebuilt = build_assets(str(static), str(build))
+    assert rebuilt['styles.css'] != manifest['styles.css']
+    assert css_file.exists() # Still served to pages rendered before the rebuild
+    assert 'build' not in ''.join(rebuilt)
+
+
+def test_pages_link_hashed_assets_served_precompressed(tmp_path):
+    app = create_app({'DATABASE': str(tmp_path / 'assets.db'), 'ASSET_BUILD_DIR': str(tmp_path / 'build'),
+                      'TESTING': True})
+    client = app.test_client()
+    assert b'/static/styles.css' in client.get('/').data # No build yet
+
+    result = app.test_cli_runner().invoke(args=['build-assets'])
+    assert result.exit_code == 0, result.output
+    app = create_app({'DATABASE': str(tmp_path / 'assets.db'), 'ASSET_BUILD_DIR': str(tmp_path / 'build'),
+                      'TESTING': True}) # A new build takes effect on restart
+    client = app.test_client()
+    hashed = app.extensions['movieweb'].assets.hashed('styles.css')
+    assert f'/assets/{hashed}'.encode() in client.get('/').data
+
+    compressed = client.get(f'/assets/{hashed}', headers={'Accept-Encoding': 'gzip, deflate'})
+    assert compressed.status_code == 200 and compressed.headers['Content-Encoding'] == 'gzip'
+    assert compressed.headers['Content-Type'].startswith('text/css')
+    assert compressed.headers['Cache-Control'] == CACHE_CONTROL
+    assert compressed.headers['Vary'] == 'Accept-Encoding'
+    assert gzip.decompress(compressed.data) == open(STYLES, 'rb').read()
+    plain = client.get(f'/assets/{hashed}', headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in plain.headers and plain.data == open(STYLES, 'rb').read()
+    assets = app.extensions['movieweb'].assets
+    for missing in ('styles.css', MANIFEST, '../assets.db'):
+        assert assets.resolve(missing, {'gzip': 1}) == (None, None, False)
+    app.extensions['movieweb'].close()
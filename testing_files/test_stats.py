@@ -0,0 +1,76 @@
+import os
+import sys
+import sqlite3
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import app as app_module
+from data_manager.sqlite_data_manager import SQLiteDataManager
+
+
+@pytest.fixture
+def dm(tmp_path, monkeypatch):
+    dm = SQLiteDataManager(str(tmp_path / 'stats.db'))
+    dm.add_user('alice')
+    dm.add_user('bob')
+    dm.add_movies_bulk(1, [
+        ('Memento', 'Christopher Nolan', 2000, '', '', 8.4),
+        ('Following', 'Christopher Nolan', 1998, '', '', None),
+        ('Blue Velvet', 'David Lynch', 1986, '', '', 7.7),
+        ('Placeholder', 'N/A', None, '', '', None),
+    ])
+    dm.add_movie(2, 'Eraserhead', 'David Lynch', 1977, '', '', 7.3)
+    monkeypatch.setattr(app_module, 'data_manager', dm)
+    app_module.app.config['TESTING'] = True
+    yield dm
+    dm.close()
+
+
+def test_user_and_global_stats(dm):
+    stats = dm.get_user_stats(1)
+    assert stats['movie_count'] == 4 and stats['rated_count'] == 2
+    assert stats['average_rating'] == 8.05
+    assert stats['decades'] == [(1980, 1), (1990, 1), (2000, 1)]
+    assert stats['top_directors'] == [('Christopher Nolan', 2), ('David Lynch', 1)]
+    totals = dm.get_global_stats()
+    assert totals['movie_count'] == 5
+    assert totals['top_directors'][0] == ('Christopher Nolan', 2)
+    assert dm.get_user_stat_totals([1, 2, 99]) == {
+        1: {'movie_count': 4, 'average_rating': 8.05},
+        2: {'movie_count': 1, 'average_rating': 7.3},
+    }
+
+
+def test_triggers_track_every_kind_of_write(dm):
+    dm.update_movie(1, 'Memento', 'Christopher Nolan', 2000, '', '', 9.0)
+    dm.move_movies(1, [3], 2)
+    dm.delete_movies(1, [2])
+    dm.update_movies(2, [3, 5], {'year': 2010})
+    assert dm.get_user_stats(1)['top_directors'] == [('Christopher Nolan', 1)]
+    assert dm.get_user_stats(2)['decades'] == [(2010, 2)]
+    assert dm.check_stats_consistency() == []
+    dm.delete_user(2)
+    assert dm.get_user_stats(2)['movie_count'] == 0
+    assert dm.get_global_stats()['movie_count'] == 2
+    assert dm.check_stats_consistency() == []
+
+
+def test_consistency_check_reports_and_repairs_drift(dm):
+    conn = sqlite3.connect(dm.db_file)
+    conn.execute("UPDATE user_stats SET movie_count = 42 WHERE user_id = 1")
+    conn.execute("DELETE FROM user_director_stats WHERE user_id = 0")
+    conn.commit()
+    conn.close()
+    differences = dm.check_stats_consistency()
+    assert any(d.startswith('user_stats(user_id=1)') for d in differences)
+    assert len(differences) == 3
+    assert dm.check_stats_consistency(repair=True) == differences
+    assert dm.check_stats_consistency() == []
+    assert dm.get_user_stats(1)['movie_count'] == 4
+
+
+def test_users_page_shows_stats(dm):
+    with app_module.app.test_client() as client:
+        users_page = client.get('/users').get_data(as_text=True)
+        assert 'All collections' in users_page and '4 movies, avg 8.05' in users_page
+        movies_page = client.get('/users/1').get_data(as_text=True)
+        assert 'Collection statistics' in movies_page and 'Christopher Nolan (2)' in movies_page
@@ -0,0 +1,80 @@
+import os
+import sys
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import create_app
+from data_manager.title_index import TitleIndex, fold_title
+
+
+def test_prefixes_match_regardless_of_case_accents_and_articles():
+    index = TitleIndex()
+    index.rebuild(['The Dark Knight', 'Dark City', 'Amélie', 'A Beautiful Mind', 'Heat', 'Heathers', 'Heat'])
+    assert fold_title('  AMÉLIE  ') == 'amelie'
+    assert index.suggest('dark') == ['Dark City', 'The Dark Knight']
+    assert index.suggest('the dark') == ['The Dark Knight']
+    assert index.suggest('AME') == ['Amélie']
+    assert index.suggest('beautiful m') == ['A Beautiful Mind']
+    assert index.suggest('heat') == ['Heat', 'Heathers']
+    assert index.suggest('heat', limit=1) == ['Heat']
+    assert index.suggest('') == [] and index.suggest('zz') == []
+    assert len(index) == 6
+
+
+def test_titles_are_reference_counted():
+    now = [0.0]
+    index = TitleIndex(clock=lambda: now[0])
+    index.rebuild(['Heat', 'Heat'], version=(1, 0))
+    index.add('Thief')
+    index.discard('Heat')
+    index.discard('Not indexed')
+    assert index.suggest('h') == ['Heat'] and index.suggest('th') == ['Thief']
+    index.discard('Heat')
+    assert index.suggest('h') == []
+    assert not index.is_stale(10)
+    now[0] = 11
+    assert index.is_stale(10)
+    index.mark_current()
+    assert not index.is_stale(10)
+
+
+@pytest.fixture(params=['sqlite', 'memory'])
+def app(request, tmp_path):
+    app = create_app({'DATA_BACKEND': request.param, 'DATABASE': str(tmp_path / 'titles.db'), 'TESTING': True})
+    dm = app.extensions['movieweb'].data_manager
+    dm.add_user('alice')
+    dm.add_movie(1, 'Heat', 'Michael Mann', 1995, '', '', 8.3)
+    dm.add_movie(1, 'The Thin Red Line', 'Terrence Malick', 1998, '', '', 7.6)
+    dm.omdb_cache.put('thief', {'Title': 'Thief', 'Response': 'True'})
+    dm.omdb_cache.put_not_found('thieves')
+    yield app
+    app.extensions['movieweb'].close()
+
+
+def suggest(client, q, **params):
+    return client.get('/api/titles/suggest', query_string={'q': q, **params}).get_json()['suggestions']
+
+
+def test_suggestions_follow_the_routes_that_change_movies(app):
+    client = app.test_client()
+    assert suggest(client, 'th') == ['The Thin Red Line', 'Thief']
+    assert suggest(client, '') == []
+    assert suggest(client, 'h', limit=500) == ['Heat']
+
+    client.post('/users/1/add_movie', data={'add_method': 'manual', 'title': 'Heathers', 'director': 'Michael Lehmann'})
+    assert suggest(client, 'hea') == ['Heat', 'Heathers']
+    client.post('/movie/1/update', data={'title': 'Collateral', 'director': 'Michael Mann'})
+    assert suggest(client, 'hea') == ['Heathers'] and suggest(client, 'coll') == ['Collateral']
+    client.post('/movie/2/delete')
+    assert suggest(client, 'thin') == []
+
+
+def test_writes_from_elsewhere_are_picked_up_by_the_refresh(app):
+    services = app.extensions['movieweb']
+    client = app.test_client()
+    assert suggest(client, 'm') == []
+    services.data_manager.add_movie(1, 'Manhunter', 'Michael Mann', 1986, '', '', 7.2) # Not through a route
+    index = services.title_index
+    assert index.suggest('m') == []
+    index.checked_at -= services.config['TITLE_INDEX_REFRESH'] + 1
+    services._refresh_title_index()
+    assert suggest(client, 'm') == ['Manhunter']
@@ -0,0 +1,131 @@
+import os
+import sys
+import sqlite3
+import threading
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from data_manager.sqlite_data_manager import SQLiteDataManager
+
+
+@pytest.fixture
+def dm(tmp_path):
+    dm = SQLiteDataManager(str(tmp_path / 'wal.db'), high_concurrency=True)
+    yield dm
+    dm.close()
+
+
+def test_wal_mode_enabled(dm):
+    """High-concurrency mode switches the database to WAL journaling."""
+    with dm._get_connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+
+
+def test_results_match_default_mode(dm):
+    """Routes still get the same True/False results through the writer."""
+    assert dm.add_user('alice') is True
+    assert dm.add_user('alice') is False
+    user_id = dm.get_all_users()[0]['id']
+    assert dm.add_movie(user_id, 'Alien', 'Ridley Scott', 1979, '', '', 8.5) is True
+    movie_id = dm.get_movies_for_user(user_id)[0]['id']
+    assert dm.update_movie(movie_id, 'Aliens', 'James Cameron', 1986, '', '', 8.4) is True
+    assert dm.update_movie(9999, 'x', 'y', None, '', '', None) is False
+    assert dm.delete_movie(movie_id) is True
+    assert dm.delete_movie(movie_id) is False
+    assert dm.delete_user(user_id) is True
+
+
+def test_failed_statement_does_not_abort_batch(dm):
+    """A constraint violation only fails its own operation, not the whole group commit."""
+    assert dm.add_user('bob') is True
+    futures = [dm.write_queue.submit(lambda conn, name=name: conn.execute(
+        "INSERT INTO users (username) VALUES (?)", (name,)).rowcount) for name in ('carol', 'bob', 'dave')]
+    outcomes = []
+    for future in futures:
+        try:
+            outcomes.append(future.result())
+        except Exception as e:
+            outcomes.append(type(e).__name__)
+    assert outcomes == [1, 'IntegrityError', 1]
+    assert {u['username'] for u in dm.get_all_users()} == {'bob', 'carol', 'dave'}
+
+
+def test_concurrent_writers(dm):
+    """Many threads writing at once all succeed without lock errors."""
+    dm.add_user('crowd')
+    user_id = dm.get_all_users()[0]['id']
+    results = []
+
+    def worker(n):
+        for i in range(25):
+            results.append(dm.add_movie(user_id, f'Movie {n}-{i}', 'D', 2000, '', '', 5.0))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results.count(True) == 200
+    assert len(dm.get_movies_for_user(user_id)) == 200
+
+
+def test_operations_cannot_end_the_batch_transaction(dm):
+    """COMMIT/ROLLBACK or releasing the writer's savepoint fail that operation alone, rolled back."""
+    def insert(name, then=None):
+        def operation(conn):
+            conn.execute("INSERT INTO users (username) VALUES (?)", (name,))
+            if then:
+                conn.execute(then)
+            return name
+        return operation
+
+    def own_savepoint(conn):
+        conn.execute("SAVEPOINT mine")
+        conn.execute("INSERT INTO users (username) VALUES ('frank')")
+        conn.execute("ROLLBACK TO mine")
+        conn.execute("RELEASE mine")
+        return 'frank'
+
+    operations = [insert('carol'), insert('lost', "COMMIT"), insert('lost2', "ROLLBACK"),
+                  insert('lost3', "RELEASE op"), insert('dave', "BEGIN"), own_savepoint, insert('erin')]
+    futures = [dm.write_queue.submit(operation) for operation in operations]
+    outcomes = []
+    for future in futures:
+        try:
+            outcomes.append(future.result(10))
+        except sqlite3.DatabaseError as e:
+            outcomes.append(str(e))
+    assert outcomes == ['carol', 'not authorized', 'not authorized', 'not authorized', 'not authorized',
+                        'frank', 'erin']
+    assert {u['username'] for u in dm.get_all_users()} == {'carol', 'erin'}
+
+
+def test_broken_transaction_fails_its_batch_and_writer_survives(dm):
+    """A batch whose COMMIT fails is rolled back with every future failed; later writes still go through."""
+    user_id = dm.add_user('owner') and dm.get_all_users()[0]['id']
+    release = threading.Event()
+    dm.write_queue.submit(lambda conn: release.wait(5)) # Holds the writer so the next three form one batch
+
+    def deferred_violation(conn):
+        conn.execute("PRAGMA defer_foreign_keys = ON") # The constraint is checked at COMMIT instead
+        conn.execute("INSERT INTO movies (user_id, title) VALUES (?, 'Orphan')", (user_id + 100,))
+
+    insert = lambda name: lambda conn: conn.execute("INSERT INTO users (username) VALUES (?)", (name,)).rowcount
+    futures = [dm.write_queue.submit(operation) for operation in (insert('gus'), deferred_violation, insert('hal'))]
+    release.set()
+    for future in futures:
+        with pytest.raises(sqlite3.IntegrityError, match="FOREIGN KEY"):
+            future.result(10)
+    assert {u['username'] for u in dm.get_all_users()} == {'owner'}
+    assert dm.get_movies_for_user(user_id) == []
+    assert dm.add_user('erin') is True
+    assert {u['username'] for u in dm.get_all_users()} == {'owner', 'erin'}
+
+
+def test_execute_times_out(dm):
+    """Callers are not blocked forever behind a stuck writer."""
+    release = threading.Event()
+    dm.write_queue.submit(lambda conn: release.wait(5))
+    with pytest.raises(sqlite3.OperationalError, match="within"):
+        dm.write_queue.execute(lambda conn: None, timeout=0.1)
+    release.set()
+    assert dm.add_user('frank') is True